@@ -1,53 +1,142 @@
-from llama_index.core.agent import ReActAgent
+from llama_index.core.agent import ReActAgent, ReActChatFormatter
+from llama_index.core.agent.react.prompts import CONTEXT_REACT_CHAT_SYSTEM_HEADER
+from llama_index.core.agent.react.types import (
+    ActionReasoningStep, BaseReasoningStep, ObservationReasoningStep, ResponseReasoningStep
+)
+from llama_index.core.chat_engine.types import StreamingAgentChatResponse
 from llama_index.core.tools import FunctionTool
-from typing import Optional, Dict, Any
+from llama_index.core.llms import ChatMessage, MessageRole
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
+import asyncio
 import logging
-from llama_index.llms.bedrock_converse import BedrockConverse
+import uuid
 from llamaIndex.memory import AgentMemory
-from llama_index.embeddings.bedrock import BedrockEmbedding
 import json
-from llama_index.core import (
-    SimpleDirectoryReader, VectorStoreIndex, Settings
-)
 from pydantic import BaseModel
 from typing import List
-import boto3
-import time
+from services.aws.athena_service import get_athena_executor, AthenaQueryError
+from services.aws.athena_results import AthenaResultReader
+from services.aws.clients import get_llm
+from services.aws.prompt_cache import get_prompt_cache_policy
+from config.settings import get_settings
+from core.admission import AdmissionRejected
+from core.metrics import instrumented, record_athena_statistics, timed
+from core.tracing import span, traced
+from agent.sql_cache import get_sql_result_cache, is_cacheable
+from agent.index_service import get_index_service
+from agent.semantic_cache import get_semantic_cache
+from agent.schema_catalog import get_schema_catalog
+from agent.sql_guard import get_sql_guard, SQLValidationError
+from agent.result_store import get_result_store
+from agent.intent_router import AGENT, CONVERSATIONAL, SQL, get_intent_router
+from agent.fast_path import FastPathFailed, get_fast_path
+from agent.prefetch import TurnPrefetch
+from agent.tool_calling import ToolCallingRunner, get_tool_executor, in_context_async
+from agent.observations import (
+    column_stats, compact_sql_observation, compact_text, find_result, record_result, start_turn
+)
 from dotenv import load_dotenv
 load_dotenv()
 
+CONVERSATIONAL_PROMPT = (
+    "You are the friendly assistant of a SQL data chatbot for post-trade data. Reply briefly "
+    "to the user's message. Do not invent data or SQL.\n\n"
+    "Recent conversation:\n{history}\n\nUser message: {message}"
+)
+
+# Added to the agent context when tools are called natively (AGENT_MODE=tool_calling)
+PARALLEL_TOOLS_HINT = (
+    "When several lookups or queries do not depend on each other's results, request all of "
+    "them in the same response; they run in parallel."
+)
+
 class SQLResponse(BaseModel):
     sql_query: str
     data: List[dict]
     explanation: str
+    truncated: bool = False
+    columns: List[str] = []
+    row_count: int = 0
+    column_stats: Dict[str, Dict[str, Any]] = {}
+    # Set when only a sample is in ``data``; the full rows are paged via /agent/results
+    result_handle: Optional[str] = None
 
+@traced("tool")
+@instrumented("tool")
 def execute_sql(query: str) -> SQLResponse:
-    client = boto3.client('athena', region_name='us-east-1')
-    response = client.start_query_execution(
-        QueryString=query,
-        QueryExecutionContext={'Database': "athena_db"},
-        ResultConfiguration={'OutputLocation': "s3://bedrock-350474408512-us-east-1"}
+    guard = get_sql_guard()
+    try:
+        # Broken or unbounded queries are rejected before they reach Athena
+        validated = guard.validate(query)
+    except SQLValidationError as e:
+        raise Exception(f"Query rejected: {str(e)}")
+    # The guard only rewrites a query to add a LIMIT to an exploratory SELECT *
+    limit_added = validated != query
+    query = validated
+
+    executor = get_athena_executor()
+    cache = get_sql_result_cache()
+    cacheable = is_cacheable(query)
+    if cacheable:
+        cached = cache.get(query, executor.database)
+        # A cached sample is only useful while its stored result is still there
+        if cached is not None and (not cached.get("result_handle")
+                                   or get_result_store().exists(cached["result_handle"])):
+            return SQLResponse(**cached)
+
+    try:
+        with timed("athena"), span("athena.query", database=executor.database) as query_span:
+            execution = executor.run_sync(query)
+            statistics = execution.get("Statistics", {})
+            query_span.set_attribute("athena.query_execution_id", execution.get("QueryExecutionId"))
+            query_span.set_attribute("athena.queue_ms", statistics.get("QueryQueueTimeInMillis"))
+            query_span.set_attribute("athena.engine_ms", statistics.get("EngineExecutionTimeInMillis"))
+            query_span.set_attribute("athena.scanned_bytes", statistics.get("DataScannedInBytes"))
+    except AthenaQueryError as e:
+        raise Exception(f"Query failed: {e.reason}")
+    record_athena_statistics(statistics)
+
+    settings = get_settings()
+    reader = AthenaResultReader(
+        executor.client,
+        max_rows=settings["ATHENA_MAX_ROWS"],
+        max_bytes=settings["ATHENA_MAX_BYTES"]
     )
-    query_execution_id = response['QueryExecutionId']
-
-    while True:
-        response = client.get_query_execution(QueryExecutionId=query_execution_id)
-        state = response['QueryExecution']['Status']['State']
-        if state in ['SUCCEEDED', 'FAILED', 'CANCELLED']:
-            break
-        time.sleep(1)
-
-    if state == 'SUCCEEDED':
-        result = client.get_query_results(QueryExecutionId=query_execution_id)
-        columns = [col['Name'] for col in result['ResultSet']['ResultSetMetadata']['ColumnInfo']]
-        rows = result['ResultSet']['Rows'][1:]
-        data = [dict(zip(columns, [item.get('VarCharValue', '') for item in row['Data']])) for row in rows]
-        explanation = f"Executed query: {query}. Retrieved {len(data)} records."
-        return SQLResponse(sql_query=query, data=data, explanation=explanation)
-    else:
-        reason = response['QueryExecution']['Status'].get('StateChangeReason', 'Unknown')
-        raise Exception(f"Query failed: {reason}")
+    with timed("athena_results"):
+        result = reader.read(execution)
+        data = result.to_records()
+    explanation = f"Executed query: {query}. Retrieved {len(data)} records."
+    truncated = result.truncated
+    if truncated:
+        explanation += " The result was truncated at the configured row/size limit."
+    elif limit_added and len(data) >= guard.default_limit:
+        truncated = True
+        explanation += (f" LIMIT {guard.default_limit} was added to this exploratory SELECT *, "
+                        "so more rows may exist.")
 
+    # Large results stay server-side so the rows never enter the prompt
+    sample_rows = settings["RESULT_SAMPLE_ROWS"]
+    handle = None
+    if len(data) > sample_rows:
+        handle = get_result_store().put(query, result.columns, data, truncated)
+        explanation += (f" Showing the first {sample_rows} records; the full result is stored "
+                        f"with result_handle {handle}.")
+    response = SQLResponse(
+        sql_query=query,
+        data=data[:sample_rows],
+        explanation=explanation,
+        truncated=truncated,
+        columns=result.columns,
+        row_count=len(data),
+        column_stats=column_stats(data, result.columns),
+        result_handle=handle
+    )
+    if cacheable:
+        cache.put(query, executor.database, response.model_dump())
+    return response
+
+@traced("tool")
+@instrumented("tool")
 def process_query(query: str) -> str:
     """
     Processes a query using Bedrock LLM and embeddings.
@@ -58,30 +147,62 @@ def process_query(query: str) -> str:
     Returns:
         str: The response generated by the LLM.
     """
-    # Initialize Bedrock LLM
-    llm = BedrockConverse(
-            model="us.anthropic.claude-3-sonnet-20240229-v1:0",
-            region_name="us-east-1",
-        )
-    Settings.llm = llm
-
-    # Initialize Bedrock Embedding
-    embed_model = BedrockEmbedding(
-        aws_access_key_id="",
-        aws_secret_access_key="", # Optional, if using temporary credentials
-        region_name="us-east-1",
-        model_name="amazon.titan-embed-text-v1"
-    )
+    # The index is built once and refreshed only when files in ./data change
+    return get_index_service().query(query)
 
-    # Load documents
-    documents = SimpleDirectoryReader(input_dir="./data").load_data()
+def sql_tool(query: str) -> str:
+    """
+    Execute an Athena SQL query.
 
-    # Create an index
-    index = VectorStoreIndex.from_documents(
-        documents=documents,
-        embed_model=embed_model,
-        llm=llm
-    )
+    Returns the row count, per-column statistics, the result_handle of the
+    stored rows and the first rows of the result.
+    """
+    response = execute_sql(query)
+    # The agent only sees a compact observation; the full result goes to the final response
+    record_result(query, response)
+    return compact_sql_observation(response, get_settings()["OBSERVATION_TOKEN_BUDGET"])
+
+def knowledge_tool(query: str) -> str:
+    """
+    Processes a query using Bedrock LLM and embeddings.
+
+    Args:
+        query (str): The user's query.
+
+    Returns:
+        str: The response generated by the LLM.
+    """
+    return compact_text(process_query(query), get_settings()["OBSERVATION_TOKEN_BUDGET"])
+
+class TurnContextFormatter(ReActChatFormatter):
+    """
+    ReAct formatter that adds per-turn context (the relevant table schemas) as
+    a system message right after the static header. The context never enters
+    chat memory and stays behind the header's prompt cache point.
+    """
+
+    turn_context: str = ""
+
+    def format(self, tools, chat_history, current_reasoning=None) -> List[ChatMessage]:
+        messages = super().format(tools, chat_history, current_reasoning)
+        if self.turn_context:
+            messages.insert(1, ChatMessage(role=MessageRole.SYSTEM, content=self.turn_context))
+        return messages
+
+_shared_tools: Optional[List[FunctionTool]] = None
+
+
+def get_shared_tools() -> List[FunctionTool]:
+    """Tool objects are stateless, so one set is shared by every session."""
+    global _shared_tools
+    if _shared_tools is None:
+        _shared_tools = [
+            # The async twins keep the turn's context (recorded results, timings, spans) in the tool thread
+            FunctionTool.from_defaults(fn=sql_tool, async_fn=in_context_async(sql_tool), name="execute_sql"),
+            FunctionTool.from_defaults(fn=knowledge_tool, async_fn=in_context_async(knowledge_tool),
+                                       name="process_query"),
+        ]
+    return _shared_tools
 
 class BedrockAgent:
     """A specialized agent for handling SQL queries with AWS Bedrock and memory management."""
@@ -94,19 +215,17 @@ class BedrockAgent:
             logger: Optional logger instance
         """
         self.logger = logger or logging.getLogger(__name__)
+        # Version of the memory state last loaded from or saved to the session store
+        self.memory_version = 0
+        # Semantic cache scope for answers that depend on this conversation
+        self.cache_scope = uuid.uuid4().hex
         self._initialize_components()
         
     def _initialize_components(self):
         """Initialize all required components for the agent."""
-        # Initialize tools
-        self.execute_sql_tool = FunctionTool.from_defaults(fn=execute_sql)
-        self.query_gen_tool = FunctionTool.from_defaults(fn=process_query)
-        
-        # Initialize LLM
-        self.llm = BedrockConverse(
-            model="anthropic.claude-3-sonnet-20240229-v1:0",
-            region_name="us-east-1",
-        )
+        # Shared tools and LLM; only the memory below is per session
+        self.execute_sql_tool, self.query_gen_tool = get_shared_tools()
+        self.llm = get_llm("anthropic.claude-3-sonnet-20240229-v1:0")
         
         # Initialize memory
         self.agent_memory = AgentMemory()
@@ -116,81 +235,438 @@ class BedrockAgent:
         You are an expert in writing Athena ANSI SQL standard queries. You can answer database-related queries 
         compatible with AWS Athena. Use the QueryProcessor to prepare SQL queries. If the question is not 
         directly related to the database or SQL, retrieve the relevant information from your conversation memory. 
-        You can also use the SQL execution tool to execute SQL queries and retrieve results. Run limit queries 
-        to get sample data from the database. Use CAST in case of any type mismatch in the query. 
+        You can also use the SQL execution tool to execute SQL queries and retrieve results. The schemas and 
+        sample rows of the relevant tables are given in the system context; only run limit queries for tables 
+        that are not described there. Use CAST in case of any type mismatch in the query. 
+        Large results are returned as a sample with a result_handle; never try to list all rows, copy the 
+        sample into data and pass the result_handle through unchanged. 
         Always return Final ans with below format:
-        Final Answer: { "sql_query": "...", "data": [...], "explanation": "..." }
+        Final Answer: { "sql_query": "...", "data": [...], "explanation": "...", "result_handle": "..." }
         """
         
         # Create the agent
+        tools = [self.execute_sql_tool, self.query_gen_tool]
+        self.react_formatter = formatter = TurnContextFormatter(
+            system_header=CONTEXT_REACT_CHAT_SYSTEM_HEADER,
+            context=self.agent_context
+        )
         self.agent = ReActAgent.from_tools(
-            tools=[self.execute_sql_tool, self.query_gen_tool],
+            tools=tools,
             llm=self.llm,
             memory=self.agent_memory.composable_memory(),
             max_iterations=20,
-            context=self.agent_context,
+            react_chat_formatter=formatter,
             verbose=True
         )
+        # The instructions and tool descriptions are identical for every session and
+        # iteration; Bedrock caches them once the prefix is marked
+        prompt_cache = get_prompt_cache_policy()
+        prompt_cache.register_static_prefix(formatter.format(tools, chat_history=[])[0].content)
+
+        # Converse native tool use lets the model request independent tool calls together
+        self.tool_runner = None
+        if get_settings()["AGENT_MODE"] == "tool_calling":
+            self.tool_runner = ToolCallingRunner(
+                self.llm,
+                tools,
+                system_prompt=f"{self.agent_context.strip()}\n{PARALLEL_TOOLS_HINT}",
+                executor=get_tool_executor(),
+                max_iterations=20
+            )
+            prompt_cache.register_static_prefix(self.tool_runner.system_prompt)
     
     def generate_response(self, user_input: str) -> Dict[str, Any]:
         """
         Generate a response for the user input with proper memory handling.
         Enforces the output format for Streamlit rendering.
         """
+        with span("agent.generate_response") as agent_span:
+            result = self._generate_response(user_input)
+            agent_span.set_attribute("agent.success", result.get("success"))
+            agent_span.set_attribute("agent.cached", result.get("cached", False))
+            return result
+
+    def _generate_response(self, user_input: str) -> Dict[str, Any]:
+        checkpoint = None
         try:
             # Get fresh memory reference
             current_memory = self.agent_memory.composable_memory()
             current_messages = len(current_memory.get())
             self.logger.debug(f"Memory before cleaning: {current_messages} messages remaining")
 
-            # Generate response
-            response = self.agent.chat(user_input)
-            response_str = str(response)
-
-            # Enforce output format
-            sql_query = None
-            data = None
-            explanation = None
-            if "Final Answer:" in response_str:
-                try:
-                    json_str = response_str.split("Final Answer:")[1].strip()
-                    parsed = json.loads(json_str)
-                    sql_query = parsed.get("sql_query", "")
-                    data = parsed.get("data", "")
-                    explanation = parsed.get("explanation", "")
-                except Exception as e:
-                    self.logger.warning(f"Could not parse response: {str(e)}")
-            else:
-                explanation = response_str
-
-            enforced_response = {
-                "sql_query": sql_query or "",
-                "data": data or "",
-                "explanation": explanation or ""
-            }
-
-            # Handle non-SQL queries
-            cleaned = False
-            if "Tell me a joke" in user_input:
-                self.logger.info("Detected non-SQL query, cleaning memory")
-                self.agent_memory.remove_last_n(2)
-                cleaned = True
-                remaining_messages = len(self.agent_memory.composable_memory().get())
-                self.logger.debug(f"Memory after cleaning: {remaining_messages} messages remaining")
+            # The schema lookup overlaps with embedding and intent classification
+            prefetch = TurnPrefetch(user_input)
+            routed, question_vector, intent = self._route(user_input)
+            if routed is not None:
+                return routed
+            if intent == SQL:
+                result = self._fast_path_response(user_input, prefetch.schema_context())
+                if result is not None:
+                    self._cache_response(user_input, result, question_vector, intent)
+                    return result
 
-            return {
-                "success": True,
-                "response": enforced_response,
-                "cleaned_memory": cleaned
-            }
+            # Generate response
+            checkpoint = self.agent_memory.checkpoint()
+            response_str = self._run_agent(user_input, self._schema_context(user_input, prefetch.schema_context()))
+            result = self._build_response(response_str)
+            self._cache_response(user_input, result, question_vector, intent)
+            return result
 
+        except AdmissionRejected:
+            # Surfaced as 429 by the API layer
+            self._rollback(checkpoint)
+            raise
         except Exception as e:
             self.logger.error(f"Error generating response: {str(e)}")
+            self._rollback(checkpoint)
             return {
                 "success": False,
                 "error": str(e),
                 "response": "Sorry, I encountered an error processing your request"
             }
+
+    def _run_agent(self, user_input: str, turn_context: str = "") -> str:
+        """
+        Run the ReAct loop (or the native tool-use loop) to completion with one span per iteration.
+
+        ``turn_context`` is sent as a system message for this turn only; memory
+        keeps just the user's question.
+        """
+        start_turn()
+        if self.tool_runner is not None:
+            answer = self.tool_runner.run(self._tool_calling_history(user_input), user_input, turn_context)
+            self._remember_turn(user_input, answer)
+            return answer
+        self.react_formatter.turn_context = turn_context
+        task = self.agent.create_task(user_input)
+        iteration = 0
+        while True:
+            iteration += 1
+            with span("react.iteration", iteration=iteration):
+                step_output = self.agent.run_step(task.task_id)
+            if step_output.is_last:
+                break
+        return str(self.agent.finalize_response(task.task_id, step_output))
+
+    def _tool_calling_history(self, user_input: str) -> List[ChatMessage]:
+        return self.agent_memory.composable_memory().get(input=user_input)
+
+    def _remember_turn(self, user_input: str, answer: str) -> None:
+        """Store a tool-calling turn in memory the way the ReAct agent stores its turns."""
+        memory = self.agent_memory.composable_memory()
+        memory.put(ChatMessage(role=MessageRole.USER, content=user_input))
+        memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=answer))
+
+    async def astream_events(self, user_input: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the ReAct loop step by step and yield events as they are produced.
+
+        Yields dicts with an ``event`` name and ``data`` payload: ``thought``,
+        ``tool_call`` and ``observation`` for each reasoning step, ``token`` for
+        chunks of the final answer, then a single ``final`` event carrying the
+        same structure ``generate_response`` returns (or ``error``).
+
+        Blocking steps (embedding, routing, Athena, memory and cache I/O) run
+        in worker threads so one slow question does not stall the event loop.
+        """
+        with span("agent.astream_events"):
+            checkpoint = None
+            try:
+                prefetch = await asyncio.to_thread(TurnPrefetch, user_input)
+                routed, question_vector, intent = await asyncio.to_thread(self._route, user_input)
+                if routed is not None:
+                    yield {"event": "final", "data": routed}
+                    return
+                schema_context = await asyncio.to_thread(prefetch.schema_context)
+                if intent == SQL:
+                    result = await asyncio.to_thread(self._fast_path_response, user_input, schema_context)
+                    if result is not None:
+                        await asyncio.to_thread(self._cache_response, user_input, result, question_vector, intent)
+                        yield {"event": "final", "data": result}
+                        return
+
+                checkpoint = self.agent_memory.checkpoint()
+                start_turn()
+                turn_context = self._schema_context(user_input, schema_context)
+                if self.tool_runner is not None:
+                    answer = ""
+                    history = await asyncio.to_thread(self._tool_calling_history, user_input)
+                    async for event in self.tool_runner.astream(history, user_input, turn_context):
+                        if event["event"] == "answer":
+                            answer = event["data"]
+                        else:
+                            yield event
+                    await asyncio.to_thread(self._remember_turn, user_input, answer)
+                    result = await asyncio.to_thread(self._build_response, answer)
+                    await asyncio.to_thread(self._cache_response, user_input, result, question_vector, intent)
+                    yield {"event": "final", "data": result}
+                    return
+
+                self.react_formatter.turn_context = turn_context
+                task = self.agent.create_task(user_input)
+                seen_steps = 0
+                iteration = 0
+                while True:
+                    iteration += 1
+                    with span("react.iteration", iteration=iteration):
+                        step_output = await self.agent.astream_step(task.task_id)
+
+                    reasoning = task.extra_state.get("current_reasoning", [])
+                    for step in reasoning[seen_steps:]:
+                        for event in self._reasoning_events(step):
+                            yield event
+                    seen_steps = len(reasoning)
+
+                    if step_output.is_last:
+                        break
+
+                output = step_output.output
+                if isinstance(output, StreamingAgentChatResponse):
+                    async for token in output.async_response_gen():
+                        yield {"event": "token", "data": token}
+                response = await asyncio.to_thread(self.agent.finalize_response, task.task_id, step_output)
+                result = await asyncio.to_thread(self._build_response, str(response))
+                await asyncio.to_thread(self._cache_response, user_input, result, question_vector, intent)
+                yield {"event": "final", "data": result}
+
+            except AdmissionRejected as e:
+                self.logger.warning(f"Model capacity exhausted: {str(e)}")
+                self._rollback(checkpoint)
+                yield {
+                    "event": "error",
+                    "data": {
+                        "success": False,
+                        "error": str(e),
+                        "retry_after": e.retry_after,
+                        "response": "The service is busy, please retry shortly"
+                    }
+                }
+            except Exception as e:
+                self.logger.error(f"Error streaming response: {str(e)}")
+                self._rollback(checkpoint)
+                yield {
+                    "event": "error",
+                    "data": {
+                        "success": False,
+                        "error": str(e),
+                        "response": "Sorry, I encountered an error processing your request"
+                    }
+                }
+
+    async def agenerate_response(self, user_input: str) -> Dict[str, Any]:
+        """Async counterpart of ``generate_response`` built on ``astream_events``."""
+        result: Dict[str, Any] = {}
+        async for event in self.astream_events(user_input):
+            if event["event"] in ("final", "error"):
+                result = event["data"]
+        if "retry_after" in result:
+            raise AdmissionRejected(result["error"], result["retry_after"])
+        return result
+
+    def _schema_context(self, user_input: str, context: Optional[str] = None) -> str:
+        """Per-turn system context with the cached schemas of the tables the question is likely about."""
+        if context is None:
+            context = get_schema_catalog().context_for(user_input)
+        if not context:
+            return ""
+        return f"Relevant tables for this question:\n{context}"
+
+    def _route(self, user_input: str) -> Tuple[Optional[Dict[str, Any]], Optional[Any], str]:
+        """
+        Classify the turn and answer it without the ReAct loop when possible.
+
+        Conversational turns get a single call to the small model and are kept
+        out of memory; other turns are looked up in the semantic cache.
+
+        Returns:
+            The answer (None when the agent has to run), the question embedding
+            and the classified intent
+        """
+        try:
+            vector = get_semantic_cache().embed(user_input)
+        except Exception as e:
+            self.logger.warning(f"Could not embed question: {str(e)}")
+            return None, None, AGENT
+
+        intent = AGENT
+        if get_settings()["INTENT_ROUTER_ENABLED"]:
+            with span("intent.classify") as intent_span:
+                try:
+                    intent = get_intent_router().classify(user_input, vector)
+                except Exception as e:
+                    self.logger.warning(f"Intent routing failed: {str(e)}")
+                intent_span.set_attribute("intent", intent)
+            if intent == CONVERSATIONAL:
+                return self._conversational_response(user_input), vector, intent
+        return self._cached_response(user_input, vector, intent), vector, intent
+
+    def _conversational_response(self, user_input: str) -> Dict[str, Any]:
+        """Answer small talk with one call to the small model; the turn is not stored in memory."""
+        prompt = CONVERSATIONAL_PROMPT.format(
+            history=self._recent_history() or "(none)",
+            message=user_input
+        )
+        answer = str(get_llm(get_settings()["INTENT_MODEL"]).complete(prompt)).strip()
+        return {
+            "success": True,
+            "response": {"sql_query": "", "data": "", "explanation": answer, "result_handle": None, "row_count": 0},
+            "cleaned_memory": True
+        }
+
+    def _recent_history(self, messages: int = 6) -> str:
+        """The last user and assistant messages as plain text."""
+        recent = [
+            f"{m.role.value}: {m.content}" for m in self.agent_memory.chat_memory_buffer.get()[-messages:]
+            if m.role in (MessageRole.USER, MessageRole.ASSISTANT) and m.content
+        ]
+        return "\n".join(recent)
+
+    def _fast_path_response(self, user_input: str, schema: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Answer a self-contained data question with one SQL generation call.
+
+        Returns None when the fast path is disabled or fails, so the caller
+        runs the ReAct agent instead.
+        """
+        if not get_settings()["FAST_PATH_ENABLED"]:
+            return None
+        with span("fast_path") as fast_span:
+            try:
+                response = get_fast_path().answer(user_input, schema, self._recent_history())
+            except AdmissionRejected:
+                raise
+            except FastPathFailed as e:
+                self.logger.info(f"Fast path fell back to the agent: {str(e)}")
+                fast_span.set_attribute("fast_path.fallback", str(e))
+                return None
+
+        # Keep the exchange in memory so follow-up questions have context
+        self._remember_exchange(user_input, response)
+        return {"success": True, "response": response, "cleaned_memory": False}
+
+    def _remember_exchange(self, user_input: str, response: Dict[str, Any]) -> None:
+        memory = self.agent_memory.composable_memory()
+        memory.put(ChatMessage(role=MessageRole.USER, content=user_input))
+        memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=json.dumps(response, default=str)))
+
+    def _rollback(self, checkpoint: Optional[Tuple[int, int]]) -> None:
+        """Drop what a failed turn left in memory."""
+        if checkpoint is not None:
+            self.agent_memory.rollback(checkpoint)
+
+    def _cache_scope(self, intent: str) -> Optional[str]:
+        """
+        Self-contained data questions share cached answers across sessions; any
+        other turn may be a follow-up whose meaning depends on this
+        conversation, so its answers are only reused within it.
+        """
+        return None if intent == SQL else self.cache_scope
+
+    def _cached_response(self, user_input: str, vector: Any, intent: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer from the semantic cache when a similar question was already answered.
+
+        The ReAct loop is skipped entirely on a hit; with SEMANTIC_CACHE_REFRESH_DATA
+        the cached SQL is re-run so the data is current.
+        """
+        try:
+            cached, _ = get_semantic_cache().lookup(
+                user_input, get_athena_executor().database, vector, scope=self._cache_scope(intent)
+            )
+        except Exception as e:
+            self.logger.warning(f"Semantic cache lookup failed: {str(e)}")
+            return None
+        if cached is None:
+            return None
+
+        response = dict(cached)
+        if get_settings()["SEMANTIC_CACHE_REFRESH_DATA"] and response.get("sql_query"):
+            fresh = execute_sql(response["sql_query"])
+            response["data"] = fresh.data
+            response["result_handle"] = fresh.result_handle
+            response["row_count"] = fresh.row_count
+        elif response.get("result_handle") and not get_result_store().exists(response["result_handle"]):
+            # The stored rows expired; only the sample in the cached answer remains
+            response["result_handle"] = None
+
+        # Keep the exchange in memory so follow-up questions have context
+        self._remember_exchange(user_input, response)
+        return {"success": True, "response": response, "cleaned_memory": False, "cached": True}
+
+    def _cache_response(self, user_input: str, result: Dict[str, Any], vector: Optional[Any], intent: str) -> None:
+        """Store answers that came with SQL in the semantic cache."""
+        if not result.get("success") or result.get("cleaned_memory"):
+            return
+        if not result["response"].get("sql_query"):
+            return
+        try:
+            get_semantic_cache().store(
+                user_input, get_athena_executor().database, result["response"], vector,
+                scope=self._cache_scope(intent)
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not cache response: {str(e)}")
+
+    def _reasoning_events(self, step: BaseReasoningStep) -> List[Dict[str, Any]]:
+        """Convert a ReAct reasoning step into stream events."""
+        if isinstance(step, ActionReasoningStep):
+            return [
+                {"event": "thought", "data": step.thought},
+                {"event": "tool_call", "data": {"tool": step.action, "input": step.action_input}},
+            ]
+        if isinstance(step, ObservationReasoningStep):
+            return [{"event": "observation", "data": step.observation}]
+        if isinstance(step, ResponseReasoningStep):
+            return [{"event": "thought", "data": step.thought}]
+        return []
+
+    def _build_response(self, response_str: str) -> Dict[str, Any]:
+        """Parse the agent output into the enforced format."""
+        # Enforce output format
+        sql_query = None
+        data = None
+        explanation = None
+        result_handle = None
+        if "Final Answer:" in response_str:
+            try:
+                json_str = response_str.split("Final Answer:")[1].strip()
+                parsed = json.loads(json_str)
+                sql_query = parsed.get("sql_query", "")
+                data = parsed.get("data", "")
+                explanation = parsed.get("explanation", "")
+                result_handle = parsed.get("result_handle")
+            except Exception as e:
+                self.logger.warning(f"Could not parse response: {str(e)}")
+        else:
+            explanation = response_str
+
+        enforced_response = {
+            "sql_query": sql_query or "",
+            "data": data or "",
+            "explanation": explanation or "",
+            "result_handle": None,
+            "row_count": len(data) if isinstance(data, list) else 0
+        }
+        full_result = find_result(sql_query)
+        if full_result is not None:
+            # Rows come from the tool result, not from what the model copied
+            enforced_response["data"] = full_result.data
+            enforced_response["row_count"] = full_result.row_count
+            result_handle = full_result.result_handle or result_handle
+
+        store = get_result_store()
+        if not store.exists(result_handle) and sql_query:
+            # The model may drop or garble the handle; recover it from the query
+            result_handle = store.handle_for(sql_query)
+        if store.exists(result_handle):
+            enforced_response["result_handle"] = result_handle
+            enforced_response["row_count"] = store.metadata(result_handle)["row_count"]
+
+        return {
+            "success": True,
+            "response": enforced_response,
+            "cleaned_memory": False
+        }
     
     def _format_response(self, response: str) -> Dict[str, Any]:
         """
@@ -215,4 +691,9 @@ class BedrockAgent:
     def clear_memory(self) -> None:
         """Completely reset the agent's conversation memory."""
         self.agent_memory.clear_memory()
-        self.logger.info("Agent memory cleared")
\ No newline at end of file
+        self.logger.info("Agent memory cleared")
+
+    def close(self) -> None:
+        """Release the per-session memory when the session is evicted."""
+        self.agent_memory.close()
+        self.agent = None
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Side-by-side latency and LLM call count of the text-to-SQL fast path and the ReAct agent.
+
+Usage:
+    python -m agent.benchmark questions.txt [--repeat 3]
+
+``questions.txt`` holds one question per line. The SQL result cache is
+cleared before every run so both paths pay for their Athena queries. A run
+that raises is recorded as failed and the benchmark moves on.
+"""
+import argparse
+import statistics
+from typing import Any, Callable, Dict, List
+
+from agent.agent import BedrockAgent
+from agent.fast_path import get_fast_path
+from agent.sql_cache import get_sql_result_cache
+from core.logger import get_application_logger
+from core.metrics import start_request_timings
+
+
+def _measure(run: Callable[[], Any]) -> Dict[str, Any]:
+    get_sql_result_cache().clear()
+    timings = start_request_timings()
+    error = None
+    try:
+        run()
+    except Exception as e:
+        # FastPathFailed, Athena errors, admission rejections: record and keep going
+        error = f"{type(e).__name__}: {str(e)}"
+        get_application_logger().warning(f"Benchmark run failed: {error}")
+    summary = timings.summary()
+    return {
+        "seconds": summary["total_seconds"],
+        "llm_calls": sum(p["count"] for name, p in summary["phases"].items() if name.startswith("llm")),
+        "tokens": sum(summary["tokens"].values()),
+        "succeeded": error is None,
+        "error": error,
+    }
+
+
+def run_fast_path(question: str) -> Dict[str, Any]:
+    return _measure(lambda: get_fast_path().answer(question))
+
+
+def run_agent(question: str) -> Dict[str, Any]:
+    # A fresh agent per run so memory from earlier questions does not help
+    agent = BedrockAgent()
+    try:
+        return _measure(lambda: agent._run_agent(question, agent._schema_context(question)))
+    finally:
+        agent.close()
+
+
+def _summarize(runs: List[Dict[str, Any]]) -> str:
+    return (f"{statistics.median(r['seconds'] for r in runs):8.2f}s "
+            f"{statistics.mean(r['llm_calls'] for r in runs):6.1f} calls "
+            f"{statistics.mean(r['tokens'] for r in runs):8.0f} tokens "
+            f"{sum(r['succeeded'] for r in runs)}/{len(runs)} ok")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("questions", help="File with one question per line")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per question and path")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+
+    totals: Dict[str, List[Dict[str, Any]]] = {"fast_path": [], "agent": []}
+    for question in questions:
+        print(question)
+        for name, runner in (("fast_path", run_fast_path), ("agent", run_agent)):
+            runs = [runner(question) for _ in range(args.repeat)]
+            totals[name].extend(runs)
+            print(f"  {name:<10} {_summarize(runs)}")
+            for error in sorted({r["error"] for r in runs if r["error"]}):
+                print(f"  {'':<10} failed: {error}")
+
+    print("\nAll questions")
+    for name, runs in totals.items():
+        if runs:
+            print(f"  {name:<10} {_summarize(runs)}")
+
+
+if __name__ == "__main__":
+    main()
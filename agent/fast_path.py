@@ -0,0 +1,135 @@
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from llama_index.core.prompts import PromptTemplate
+from pydantic import BaseModel, Field
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+from core.tracing import span
+from agent.schema_catalog import get_schema_catalog
+from services.aws.clients import get_llm
+
+SQL_PROMPT = PromptTemplate(
+    "You write Athena (Presto/Trino) SQL for a single data question.\n"
+    "Only use the tables and columns below. Use CAST in case of any type mismatch. "
+    "If the question cannot be answered with one query over these tables, set answerable to false. "
+    "Resolve references such as \"and for last month?\" using the recent conversation; if the "
+    "question depends on context that is not there, set answerable to false.\n\n"
+    "Tables:\n{schema}\n\nRecent conversation:\n{history}\n\nQuestion: {question}"
+)
+
+EXPLAIN_PROMPT = (
+    "Explain in one or two sentences what this result shows, for the question asked. "
+    "Do not repeat the SQL.\n\nQuestion: {question}\nSQL: {sql}\nRows returned: {row_count}\n"
+    "First rows: {sample}\nExplanation:"
+)
+
+
+class GeneratedSQL(BaseModel):
+    """SQL statement answering the user's question."""
+
+    answerable: bool = Field(description="False when the question cannot be answered with one query")
+    sql_query: str = Field(default="", description="A single Athena SQL statement")
+
+
+class FastPathFailed(Exception):
+    """The fast path could not answer; the caller falls back to the ReAct agent."""
+
+
+class TextToSQLFastPath:
+    """
+    Answers self-contained data questions without the ReAct loop.
+
+    The relevant schema comes from the schema catalog, the SQL from one
+    structured-output LLM call, and the statement runs through ``execute_sql``
+    (guard, cache, Athena). The explanation is a template or, optionally, one
+    call to a small model. Any failure raises ``FastPathFailed`` so the full
+    agent can take over.
+    """
+
+    def __init__(self, llm: Any, explain_llm: Optional[Any] = None):
+        """
+        Args:
+            llm: Model that writes the SQL
+            explain_llm: Small model for the explanation, None to use a template
+        """
+        self.logger = get_application_logger()
+        self.llm = llm
+        self.explain_llm = explain_llm
+
+    def generate_sql(self, question: str, schema: Optional[str] = None, history: str = "") -> str:
+        if schema is None:
+            schema = get_schema_catalog().context_for(question)
+        if not schema:
+            raise FastPathFailed("No schema available for the question")
+        with span("fast_path.generate_sql"):
+            generated = self.llm.structured_predict(
+                GeneratedSQL, SQL_PROMPT, schema=schema, history=history or "(none)", question=question
+            )
+        if not generated.answerable or not generated.sql_query.strip():
+            raise FastPathFailed("The question needs more than one query")
+        return generated.sql_query.strip()
+
+    def explain(self, question: str, sql_query: str, row_count: int, sample: list) -> str:
+        template = f"The query returned {row_count} rows."
+        if self.explain_llm is None:
+            return template
+        try:
+            with span("fast_path.explain"):
+                prompt = EXPLAIN_PROMPT.format(
+                    question=question, sql=sql_query, row_count=row_count,
+                    sample=json.dumps(sample[:5], default=str)
+                )
+                return str(self.explain_llm.complete(prompt)).strip()
+        except Exception as e:
+            self.logger.warning(f"Could not explain fast path result: {str(e)}")
+            return template
+
+    def answer(self, question: str, schema: Optional[str] = None, history: str = "") -> Dict[str, Any]:
+        """
+        Return the answer in the same shape as the agent's final response.
+
+        ``schema`` is the question's schema context when the caller already has
+        it; ``history`` holds the recent turns, so a follow-up routed here
+        keeps its referent.
+        """
+        # Imported here because agent.agent imports this module
+        from agent.agent import execute_sql
+
+        try:
+            sql_query = self.generate_sql(question, schema, history)
+        except FastPathFailed:
+            raise
+        except Exception as e:
+            raise FastPathFailed(f"SQL generation failed: {str(e)}")
+        try:
+            result = execute_sql(sql_query)
+        except Exception as e:
+            raise FastPathFailed(str(e))
+
+        return {
+            "sql_query": result.sql_query,
+            "data": result.data,
+            "explanation": self.explain(question, result.sql_query, result.row_count, result.data),
+            "result_handle": result.result_handle,
+            "row_count": result.row_count,
+        }
+
+
+_fast_path: Optional[TextToSQLFastPath] = None
+_fast_path_lock = threading.Lock()
+
+
+def get_fast_path() -> TextToSQLFastPath:
+    """Return the process-wide text-to-SQL fast path."""
+    global _fast_path
+    with _fast_path_lock:
+        if _fast_path is None:
+            settings = get_settings()
+            _fast_path = TextToSQLFastPath(
+                get_llm(settings["FAST_PATH_MODEL"]),
+                explain_llm=get_llm(settings["INTENT_MODEL"]) if settings["FAST_PATH_EXPLAIN"] == "llm" else None
+            )
+        return _fast_path
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from llama_index.core import (
+    SimpleDirectoryReader, StorageContext, VectorStoreIndex, load_index_from_storage
+)
+
+from core.logger import get_application_logger
+from services.aws.clients import get_embed_model, get_llm
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class KnowledgeIndexService:
+    """
+    Long-lived vector index over the files in the data directory.
+
+    The index is built once, persisted to ``persist_dir`` and reloaded on
+    restart. A manifest records the mtime, size, content hash and document ids
+    of every indexed file, so a refresh only re-embeds files whose content
+    actually changed and drops documents of deleted files.
+    """
+
+    def __init__(self,
+                 data_dir: str = "./data",
+                 persist_dir: str = "./storage/query_processor",
+                 llm_model: str = "us.anthropic.claude-3-sonnet-20240229-v1:0",
+                 embed_model_name: str = "amazon.titan-embed-text-v1",
+                 refresh_interval: float = 30.0):
+        """
+        Args:
+            data_dir: Directory with the source documents
+            persist_dir: Directory where the index and manifest are stored
+            llm_model: Bedrock model used by the query engine
+            embed_model_name: Bedrock embedding model used for the index
+            refresh_interval: Minimum seconds between two scans of data_dir
+        """
+        self.logger = get_application_logger()
+        self.data_dir = data_dir
+        self.persist_dir = persist_dir
+        self.llm = get_llm(llm_model)
+        self.embed_model = get_embed_model(embed_model_name)
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._index: Optional[VectorStoreIndex] = None
+        self._query_engine: Optional[Any] = None
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._last_scan = 0.0
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.persist_dir, MANIFEST_FILE)
+
+    def _load(self) -> None:
+        if os.path.exists(self._manifest_path):
+            self.logger.info(f"Loading persisted index from {self.persist_dir}")
+            storage_context = StorageContext.from_defaults(persist_dir=self.persist_dir)
+            self._index = load_index_from_storage(storage_context, embed_model=self.embed_model)
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                self._manifest = json.load(f)
+        else:
+            self.logger.info("Creating empty index for QueryProcessor")
+            self._index = VectorStoreIndex.from_documents([], embed_model=self.embed_model)
+            self._manifest = {}
+
+    def _persist(self) -> None:
+        os.makedirs(self.persist_dir, exist_ok=True)
+        self._index.storage_context.persist(persist_dir=self.persist_dir)
+        with open(self._manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        files = {}
+        for root, _, names in os.walk(self.data_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                files[path] = os.stat(path)
+        return files
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Bring the index in line with the data directory.
+
+        Args:
+            force: Scan even if the refresh interval has not elapsed
+
+        Returns:
+            True if any document was added, updated or removed
+        """
+        with self._lock:
+            if self._index is None:
+                self._load()
+            elif not force and time.time() - self._last_scan < self.refresh_interval:
+                return False
+            self._last_scan = time.time()
+
+            current = self._scan()
+            changed: List[str] = []
+            new_manifest: Dict[str, Dict[str, Any]] = {}
+            for path, stat in current.items():
+                entry = self._manifest.get(path)
+                if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                    new_manifest[path] = entry
+                    continue
+                # mtime changed; only re-embed if the content did too
+                digest = _file_hash(path)
+                if entry and entry["sha256"] == digest:
+                    new_manifest[path] = dict(entry, mtime=stat.st_mtime, size=stat.st_size)
+                    continue
+                new_manifest[path] = {"mtime": stat.st_mtime, "size": stat.st_size,
+                                      "sha256": digest, "doc_ids": []}
+                changed.append(path)
+
+            removed = [path for path in self._manifest if path not in current]
+            for path in removed + changed:
+                for doc_id in self._manifest.get(path, {}).get("doc_ids", []):
+                    self._index.delete_ref_doc(doc_id, delete_from_docstore=True)
+
+            if changed:
+                self.logger.info(f"Indexing {len(changed)} new or modified files")
+                documents = SimpleDirectoryReader(input_files=changed, filename_as_id=True).load_data()
+                for document in documents:
+                    self._index.insert(document)
+                    path = document.metadata.get("file_path", "")
+                    for candidate in changed:
+                        if os.path.abspath(candidate) == os.path.abspath(path):
+                            new_manifest[candidate]["doc_ids"].append(document.doc_id)
+
+            self._manifest = new_manifest
+            if changed or removed or not os.path.exists(self._manifest_path):
+                self._persist()
+                self._query_engine = None
+                return True
+            return False
+
+    def query_engine(self) -> Any:
+        """Return the cached query engine, refreshing the index if needed."""
+        with self._lock:
+            self.refresh()
+            if self._query_engine is None:
+                self._query_engine = self._index.as_query_engine(llm=self.llm)
+            return self._query_engine
+
+    def query(self, question: str) -> str:
+        """Answer a question from the indexed documents."""
+        return str(self.query_engine().query(question))
+
+
+_service: Optional[KnowledgeIndexService] = None
+_service_lock = threading.Lock()
+
+
+def get_index_service() -> KnowledgeIndexService:
+    """Return the process-wide knowledge index service."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = KnowledgeIndexService()
+        return _service
@@ -0,0 +1,144 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+from core.metrics import get_metrics_registry
+from services.aws.clients import get_embed_model, get_llm
+
+CONVERSATIONAL = "conversational"
+SQL = "sql"
+AGENT = "agent"
+
+INTENTS = (CONVERSATIONAL, SQL, AGENT)
+
+# Example messages per intent; a question is routed to the intent of its nearest examples
+PROTOTYPES: Dict[str, List[str]] = {
+    CONVERSATIONAL: [
+        "hi", "hello there", "good morning", "thanks, that's great", "thank you", "bye",
+        "tell me a joke", "how are you?", "who are you?", "what can you do?",
+        "ok", "cool", "nice work", "you are awesome",
+    ],
+    SQL: [
+        "how many trades were settled yesterday",
+        "show the total amount by account",
+        "list the top 10 securities by market value",
+        "what is the average trade price for each counterparty",
+        "count the failed settlements this month",
+        "show me all trades for account 1234",
+        "what was the total notional traded last week",
+        "give me the number of records in the positions table",
+    ],
+    AGENT: [
+        "why did the settlement volume drop compared to last month and which accounts drove it",
+        "compare the trades from my previous question with last year",
+        "what was my previous question",
+        "use the same filter as before but group by region",
+        "explain the query you ran earlier",
+        "find anomalies in the trade data and explain them",
+        "which tables contain counterparty information and how are they related",
+        "break that down by month instead",
+    ],
+}
+
+CLASSIFY_PROMPT = (
+    "Classify the user message for a SQL data assistant. Answer with exactly one word:\n"
+    "conversational - greetings, thanks, small talk, questions about the assistant itself\n"
+    "sql - a self-contained data question answerable with one SQL query\n"
+    "agent - anything else: follow-ups that depend on earlier turns, multi-step analysis, "
+    "schema exploration\n\nMessage: {message}\nIntent:"
+)
+
+ROUTES = get_metrics_registry().counter("intent_routes_total", "Turns per classified intent", ("intent", "method"))
+
+
+class IntentRouter:
+    """
+    Classifies a turn before any agent work is done.
+
+    The question embedding (the same one the semantic cache uses) is compared
+    with example messages of each intent. A confident nearest-neighbour match
+    decides the route; ambiguous messages are classified by one call to a
+    small model, and anything still unclear goes to the full agent.
+    """
+
+    def __init__(self, embed_model: Optional[Any] = None, llm: Optional[Any] = None,
+                 min_similarity: float = 0.45, min_margin: float = 0.05):
+        """
+        Args:
+            embed_model: Embedding model of the examples, matching the question embeddings
+            llm: Small model used for ambiguous messages, None to route them to the agent
+            min_similarity: Similarity the nearest example must reach
+            min_margin: Lead the best intent needs over the runner-up
+        """
+        self.logger = get_application_logger()
+        self.embed_model = embed_model or get_embed_model()
+        self.llm = llm
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self._lock = threading.Lock()
+        self._labels: Optional[np.ndarray] = None
+        self._matrix: Optional[np.ndarray] = None
+
+    def _prototypes(self) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if self._matrix is None:
+                texts, labels = [], []
+                for intent, examples in PROTOTYPES.items():
+                    texts.extend(examples)
+                    labels.extend([INTENTS.index(intent)] * len(examples))
+                matrix = np.asarray(self.embed_model.get_text_embedding_batch(texts), dtype=np.float32)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._matrix = matrix / np.where(norms == 0, 1, norms)
+                self._labels = np.asarray(labels)
+            return self._matrix, self._labels
+
+    def scores(self, vector: np.ndarray) -> Dict[str, float]:
+        """Similarity of the nearest example of each intent."""
+        matrix, labels = self._prototypes()
+        similarities = matrix @ vector
+        return {intent: float(similarities[labels == i].max()) for i, intent in enumerate(INTENTS)}
+
+    def classify(self, message: str, vector: Optional[np.ndarray] = None) -> str:
+        """Return CONVERSATIONAL, SQL or AGENT for a message."""
+        if vector is None:
+            vector = np.asarray(self.embed_model.get_query_embedding(message), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else vector
+        ranked = sorted(self.scores(vector).items(), key=lambda item: item[1], reverse=True)
+        (best, best_score), (_, second_score) = ranked[0], ranked[1]
+        if best_score >= self.min_similarity and best_score - second_score >= self.min_margin:
+            ROUTES.inc(intent=best, method="embedding")
+            return best
+
+        if self.llm is not None:
+            try:
+                answer = str(self.llm.complete(CLASSIFY_PROMPT.format(message=message))).strip().lower()
+                intent = next((i for i in INTENTS if answer.startswith(i)), None)
+                if intent is not None:
+                    ROUTES.inc(intent=intent, method="llm")
+                    return intent
+            except Exception as e:
+                self.logger.warning(f"Intent classification failed: {str(e)}")
+        ROUTES.inc(intent=AGENT, method="fallback")
+        return AGENT
+
+
+_router: Optional[IntentRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_intent_router() -> IntentRouter:
+    """Return the process-wide intent router."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            settings = get_settings()
+            _router = IntentRouter(
+                llm=get_llm(settings["INTENT_MODEL"]),
+                min_similarity=settings["INTENT_MIN_SIMILARITY"],
+                min_margin=settings["INTENT_MIN_MARGIN"]
+            )
+        return _router
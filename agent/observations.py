@@ -0,0 +1,102 @@
+import json
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from core.admission import estimate_tokens
+from agent.sql_cache import normalize_sql
+
+# Distinct values tracked per text column before giving up on an exact count
+_MAX_DISTINCT = 1000
+
+
+def column_stats(rows: List[Dict[str, Any]], columns: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Per-column null count plus min/max/mean for numeric columns or distinct count for others."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    for column in columns:
+        values = [row.get(column) for row in rows]
+        present = [v for v in values if v is not None]
+        entry: Dict[str, Any] = {"nulls": len(values) - len(present)}
+        numbers = [float(v) for v in present if isinstance(v, (int, float)) and not isinstance(v, bool)]
+        if present and len(numbers) == len(present):
+            entry.update(min=min(numbers), max=max(numbers), mean=round(sum(numbers) / len(numbers), 4))
+        elif present:
+            distinct = set()
+            for value in present:
+                distinct.add(str(value))
+                if len(distinct) > _MAX_DISTINCT:
+                    break
+            entry["distinct"] = len(distinct) if len(distinct) <= _MAX_DISTINCT else f">{_MAX_DISTINCT}"
+        stats[column] = entry
+    return stats
+
+
+def _shorten(value: Any, max_chars: int) -> Any:
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + "..."
+    return value
+
+
+def compact_text(text: str, token_budget: int) -> str:
+    """Cut free text down to roughly ``token_budget`` tokens."""
+    if estimate_tokens(text) <= token_budget:
+        return text
+    # estimate_tokens counts four characters per token
+    return text[:token_budget * 4] + " ...[truncated]"
+
+
+def compact_sql_observation(response: Any, token_budget: int, max_rows: int = 10, max_chars: int = 80) -> str:
+    """
+    Render an ``SQLResponse`` as a tool observation that fits ``token_budget``.
+
+    The observation keeps the SQL, row count, column statistics and result
+    handle, and as many of the first rows (with long strings shortened) as the
+    budget allows.
+    """
+    rows = [{k: _shorten(v, max_chars) for k, v in row.items()} for row in response.data[:max_rows]]
+    observation: Dict[str, Any] = {
+        "sql_query": response.sql_query,
+        "row_count": response.row_count,
+        "truncated": response.truncated,
+        "result_handle": response.result_handle,
+        "column_stats": response.column_stats,
+        "sample_rows": rows,
+    }
+    shown = len(rows)
+    while True:
+        observation["sample_rows"] = rows[:shown]
+        text = json.dumps(observation, default=str)
+        if estimate_tokens(text) <= token_budget:
+            return text
+        if shown:
+            shown //= 2
+        elif observation["column_stats"]:
+            observation["column_stats"] = {}
+        else:
+            return compact_text(text, token_budget)
+
+
+# Full results of the tool calls made during the current turn, keyed by normalized SQL
+_turn_results: ContextVar[Optional[Dict[str, Any]]] = ContextVar("turn_results", default=None)
+
+
+def start_turn() -> None:
+    """Begin recording tool results for a new agent turn in the current context."""
+    _turn_results.set({})
+
+
+def record_result(query: str, response: Any) -> None:
+    """Keep the full result of a tool call for the final response builder."""
+    results = _turn_results.get()
+    if results is None:
+        return
+    # The guard may have rewritten the statement; the model can echo either form
+    results[normalize_sql(query)] = response
+    results[normalize_sql(response.sql_query)] = response
+
+
+def find_result(sql_query: str) -> Optional[Any]:
+    """Full result recorded this turn for a query, if any."""
+    results = _turn_results.get()
+    if not results or not sql_query:
+        return None
+    return results.get(normalize_sql(sql_query))
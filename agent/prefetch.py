@@ -0,0 +1,30 @@
+from concurrent.futures import Future
+
+from core.logger import get_application_logger
+from agent.schema_catalog import get_schema_catalog
+from agent.tool_calling import get_tool_executor, run_in_context
+
+
+class TurnPrefetch:
+    """
+    Schema context for a turn, looked up speculatively before routing.
+
+    The lookup (relevant tables plus their cached sample rows) runs on the
+    tool pool while the question is embedded and classified, so neither the
+    fast path nor the agent waits for it afterwards. Turns answered by the
+    router or the semantic cache simply never read it.
+    """
+
+    def __init__(self, question: str):
+        self.logger = get_application_logger()
+        self._context: Future = get_tool_executor().submit(
+            run_in_context(get_schema_catalog().context_for, question)
+        )
+
+    def schema_context(self) -> str:
+        """Schema context for the question; waits for the lookup if it is still running."""
+        try:
+            return self._context.result()
+        except Exception as e:
+            self.logger.warning(f"Schema prefetch failed: {str(e)}")
+            return ""
@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+from agent.sql_cache import normalize_sql
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+
+class ResultNotFound(KeyError):
+    """The result handle is unknown or has expired."""
+
+
+class ResultStore:
+    """
+    Server-side storage of full query results, addressed by opaque handles.
+
+    Rows are written to a local directory as Parquet when pyarrow is
+    installed, otherwise as JSON lines, next to a small JSON metadata file.
+    The agent only sees the schema, row count and a sample; clients page
+    through the full rows with the handle. Results expire after
+    ``ttl_seconds``.
+    """
+
+    def __init__(self, directory: str = "./storage/results", ttl_seconds: float = 3600.0):
+        """
+        Args:
+            directory: Directory holding the result files
+            ttl_seconds: Seconds after which a result is deleted
+        """
+        self.logger = get_application_logger()
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # Latest handle of each normalized query, to recover handles the LLM dropped
+        self._by_query: Dict[str, str] = {}
+        self._last_sweep = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _meta_path(self, handle: str) -> str:
+        return os.path.join(self.directory, f"{handle}.json")
+
+    def put(self, sql_query: str, columns: List[str], rows: List[Dict[str, Any]],
+            truncated: bool = False) -> str:
+        """Store result rows and return their handle."""
+        handle = uuid.uuid4().hex
+        data_format = "jsonl"
+        if pa is not None:
+            try:
+                table = pa.Table.from_pylist(rows) if rows else pa.table({c: [] for c in columns})
+                pq.write_table(table, os.path.join(self.directory, f"{handle}.parquet"))
+                data_format = "parquet"
+            except (pa.ArrowException, TypeError, ValueError) as e:
+                # Columns with mixed value types cannot be written as Parquet
+                self.logger.debug(f"Falling back to JSON lines for result {handle}: {str(e)}")
+        if data_format == "jsonl":
+            with open(os.path.join(self.directory, f"{handle}.jsonl"), "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=str) + "\n")
+
+        meta = {
+            "handle": handle,
+            "sql_query": sql_query,
+            "columns": columns,
+            "row_count": len(rows),
+            "truncated": truncated,
+            "format": data_format,
+            "created": time.time(),
+        }
+        with open(self._meta_path(handle), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        with self._lock:
+            self._by_query[normalize_sql(sql_query)] = handle
+            sweep_due = meta["created"] - self._last_sweep > self.ttl_seconds
+            if sweep_due:
+                self._last_sweep = meta["created"]
+        if sweep_due:
+            self.sweep()
+        return handle
+
+    def metadata(self, handle: str) -> Dict[str, Any]:
+        """Return the metadata of a result, raising ResultNotFound if it is unknown or expired."""
+        # Handles are generated hex strings; anything else never names a file
+        if not handle.isalnum():
+            raise ResultNotFound(handle)
+        try:
+            with open(self._meta_path(handle), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise ResultNotFound(handle)
+        if time.time() - meta["created"] > self.ttl_seconds:
+            self._delete(handle, meta["format"])
+            raise ResultNotFound(handle)
+        return meta
+
+    def exists(self, handle: Optional[str]) -> bool:
+        if not handle or not isinstance(handle, str):
+            return False
+        try:
+            self.metadata(handle)
+            return True
+        except ResultNotFound:
+            return False
+
+    def handle_for(self, sql_query: str) -> Optional[str]:
+        """Latest live handle stored for a query, if any."""
+        with self._lock:
+            handle = self._by_query.get(normalize_sql(sql_query))
+        return handle if self.exists(handle) else None
+
+    def page(self, handle: str, offset: int = 0, limit: int = 1000) -> Dict[str, Any]:
+        """Return ``limit`` rows starting at ``offset`` along with the result metadata."""
+        meta = self.metadata(handle)
+        if meta["format"] == "parquet":
+            if pq is None:
+                raise ImportError("pyarrow is required to read Parquet results")
+            rows = pq.read_table(os.path.join(self.directory, f"{handle}.parquet")).slice(offset, limit).to_pylist()
+        else:
+            rows = []
+            with open(os.path.join(self.directory, f"{handle}.jsonl"), "r", encoding="utf-8") as f:
+                for index, line in enumerate(f):
+                    if index >= offset + limit:
+                        break
+                    if index >= offset:
+                        rows.append(json.loads(line))
+        end = offset + len(rows)
+        return {
+            "handle": handle,
+            "columns": meta["columns"],
+            "row_count": meta["row_count"],
+            "truncated": meta["truncated"],
+            "offset": offset,
+            "rows": rows,
+            "next_offset": end if end < meta["row_count"] else None,
+        }
+
+    def _delete(self, handle: str, data_format: str) -> None:
+        for path in (self._meta_path(handle), os.path.join(self.directory, f"{handle}.{data_format}")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def sweep(self) -> int:
+        """Delete expired results; returns how many were removed."""
+        removed = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                self.metadata(name[:-len(".json")])
+            except ResultNotFound:
+                removed += 1
+            except (ValueError, KeyError):
+                continue
+        return removed
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Return the process-wide result store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            settings = get_settings()
+            _store = ResultStore(settings["RESULT_STORE_DIR"], ttl_seconds=settings["RESULT_TTL_SECONDS"])
+        return _store
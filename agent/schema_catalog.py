@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+from services.aws.athena_results import AthenaResultReader
+from services.aws.athena_service import get_athena_executor
+from services.aws.clients import get_embed_model
+
+_MAX_SAMPLE_VALUE_LENGTH = 50
+
+
+class SchemaCatalog:
+    """
+    Local snapshot of table and column metadata for one Athena database.
+
+    The snapshot (with a few sample rows per table) is read from the Athena
+    data catalog, stored as JSON and refreshed when older than
+    ``refresh_interval``. Questions are matched against table descriptions by
+    embedding similarity so only the relevant tables are put in the prompt.
+    """
+
+    def __init__(self,
+                 database: str = "athena_db",
+                 catalog_name: str = "AwsDataCatalog",
+                 snapshot_dir: str = "./storage",
+                 refresh_interval: float = 3600.0,
+                 sample_rows: int = 3,
+                 top_k: int = 5,
+                 embed_model: Optional[Any] = None):
+        """
+        Args:
+            database: Athena database to describe
+            catalog_name: Data catalog that holds the database
+            snapshot_dir: Directory of the JSON snapshot
+            refresh_interval: Seconds after which the snapshot is refreshed
+            sample_rows: Sample rows cached per table, 0 to disable sampling
+            top_k: Number of tables returned for a question
+            embed_model: Embedding model for table descriptions
+        """
+        self.logger = get_application_logger()
+        self.database = database
+        self.catalog_name = catalog_name
+        self.snapshot_path = os.path.join(snapshot_dir, f"schema_catalog_{database}.json")
+        self.refresh_interval = refresh_interval
+        self.sample_rows = sample_rows
+        self.top_k = top_k
+        self.embed_model = embed_model or get_embed_model()
+        self._lock = threading.RLock()
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at = 0.0
+        self._names: List[str] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._load_snapshot()
+
+    def _load_snapshot(self) -> None:
+        if not os.path.exists(self.snapshot_path):
+            return
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        self._tables = snapshot.get("tables", {})
+        self._refreshed_at = snapshot.get("refreshed_at", 0.0)
+
+    def _save_snapshot(self) -> None:
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        with open(self.snapshot_path, "w", encoding="utf-8") as f:
+            json.dump({"refreshed_at": self._refreshed_at, "tables": self._tables}, f, default=str)
+
+    def is_stale(self) -> bool:
+        return time.time() - self._refreshed_at > self.refresh_interval
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-read table metadata and samples when the snapshot is stale."""
+        if not force and not self.is_stale():
+            return
+        self.logger.info(f"Refreshing schema catalog for {self.database}")
+        executor = get_athena_executor()
+        paginator = executor.client.get_paginator("list_table_metadata")
+        tables: Dict[str, Dict[str, Any]] = {}
+        for page in paginator.paginate(CatalogName=self.catalog_name, DatabaseName=self.database):
+            for table in page.get("TableMetadataList", []):
+                columns = table.get("Columns", []) + table.get("PartitionKeys", [])
+                tables[table["Name"]] = {
+                    "columns": [
+                        {"name": c["Name"], "type": c.get("Type", ""), "comment": c.get("Comment", "")}
+                        for c in columns
+                    ],
+                    "samples": [],
+                }
+
+        if self.sample_rows:
+            reader = AthenaResultReader(executor.client, max_rows=self.sample_rows, s3_threshold_bytes=None)
+            for name, table in tables.items():
+                try:
+                    execution = executor.run_sync(f'SELECT * FROM "{name}" LIMIT {self.sample_rows}')
+                    table["samples"] = [
+                        [str(v)[:_MAX_SAMPLE_VALUE_LENGTH] if v is not None else None for v in row]
+                        for row in reader.read(execution)
+                    ]
+                except Exception as e:
+                    self.logger.warning(f"Could not sample table {name}: {str(e)}")
+
+        with self._lock:
+            self._tables = tables
+            self._refreshed_at = time.time()
+            self._vectors = None
+            self._save_snapshot()
+
+    def start_refresher(self) -> None:
+        """Refresh the snapshot on a schedule from a daemon thread."""
+        if self._refresher is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    self.logger.warning(f"Schema catalog refresh failed: {str(e)}")
+                time.sleep(min(self.refresh_interval, 300))
+
+        self._refresher = threading.Thread(target=run, name="schema-catalog", daemon=True)
+        self._refresher.start()
+
+    def table_names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._tables)
+
+    def columns(self, table: str) -> List[Dict[str, str]]:
+        with self._lock:
+            return self._tables.get(table, {}).get("columns", [])
+
+    def describe(self, table: str, with_samples: bool = True) -> str:
+        """Compact text description of a table for prompts."""
+        with self._lock:
+            info = self._tables.get(table)
+        if info is None:
+            return ""
+        columns = ", ".join(f"{c['name']} {c['type']}" for c in info["columns"])
+        lines = [f"Table {table} ({columns})"]
+        if with_samples and info.get("samples"):
+            lines.append("  Sample rows: " + json.dumps(info["samples"]))
+        return "\n".join(lines)
+
+    def _table_vectors(self) -> np.ndarray:
+        with self._lock:
+            if self._vectors is None or len(self._names) != len(self._tables):
+                self._names = sorted(self._tables)
+                texts = [self.describe(name, with_samples=False) for name in self._names]
+                vectors = np.asarray(self.embed_model.get_text_embedding_batch(texts), dtype=np.float32)
+                norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                self._vectors = vectors / np.where(norms == 0, 1, norms)
+            return self._vectors
+
+    def relevant_tables(self, question: str, top_k: Optional[int] = None) -> List[str]:
+        """Names of the tables whose descriptions best match the question."""
+        if not self._tables:
+            return []
+        top_k = min(top_k or self.top_k, len(self._tables))
+        vectors = self._table_vectors()
+        if len(self._tables) <= top_k:
+            return list(self._names)
+        query = np.asarray(self.embed_model.get_query_embedding(question), dtype=np.float32)
+        scores = vectors @ query
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        return [self._names[i] for i in top[np.argsort(-scores[top])]]
+
+    def context_for(self, question: str) -> str:
+        """Schema context for the tables relevant to a question."""
+        try:
+            tables = self.relevant_tables(question)
+        except Exception as e:
+            self.logger.warning(f"Schema lookup failed: {str(e)}")
+            return ""
+        if not tables:
+            return ""
+        return "\n".join(self.describe(name) for name in tables)
+
+
+_catalog: Optional[SchemaCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_schema_catalog() -> SchemaCatalog:
+    """Return the process-wide schema catalog of the Athena database."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            settings = get_settings()
+            _catalog = SchemaCatalog(
+                database=get_athena_executor().database,
+                refresh_interval=settings["SCHEMA_CATALOG_REFRESH_SECONDS"],
+                sample_rows=settings["SCHEMA_CATALOG_SAMPLE_ROWS"],
+                top_k=settings["SCHEMA_CATALOG_TOP_K"]
+            )
+        return _catalog
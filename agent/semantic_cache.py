@@ -0,0 +1,167 @@
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+from services.aws.clients import get_embed_model
+
+# Quoted strings, ISO dates, numbers and month names ("may" is left out, it is
+# mostly the verb): the parts of a question that embeddings barely distinguish
+# but that change its answer
+_LITERAL_RE = re.compile(
+    r"'[^']*'|\"[^\"]*\"|\d{4}-\d{2}-\d{2}|\d+(?:[.,]\d+)*"
+    r"|\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|june?|july?|aug(?:ust)?"
+    r"|sep(?:t|tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b",
+    re.IGNORECASE
+)
+
+
+def question_literals(question: str) -> Tuple[str, ...]:
+    """Literals of a question in order of appearance, lowercased."""
+    return tuple(match.group().lower() for match in _LITERAL_RE.finditer(question))
+
+
+class SemanticAnswerCache:
+    """
+    Cache of agent answers looked up by question similarity.
+
+    Question embeddings are L2-normalized and kept as rows of one float32
+    matrix, so a lookup is a single matrix-vector product. A hit requires a
+    cosine similarity of at least ``threshold`` with a fresh entry for the same
+    database and scope whose question has the same literals (numbers, dates,
+    quoted strings), so "trades for account 1234" never answers "trades for
+    account 5678". Answers stored with ``scope=None`` are shared by every
+    session; a session id as scope keeps answers that depend on the
+    conversation so far private to that conversation.
+    """
+
+    def __init__(self,
+                 embed_model: Optional[Any] = None,
+                 threshold: float = 0.92,
+                 ttl_seconds: float = 3600.0,
+                 max_entries: int = 1000):
+        """
+        Args:
+            embed_model: Embedding model for questions, the shared Titan model by default
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Seconds an answer stays valid
+            max_entries: Maximum number of cached answers; the oldest are dropped
+        """
+        self.logger = get_application_logger()
+        self.embed_model = embed_model or get_embed_model()
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._created = np.empty(0, dtype=np.float64)
+        self._databases: List[str] = []
+        self._scopes: List[Optional[str]] = []
+        self._literals: List[Tuple[str, ...]] = []
+        self._entries: List[Dict[str, Any]] = []
+
+    def embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embed_model.get_query_embedding(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, question: str, database: str, vector: Optional[np.ndarray] = None,
+               scope: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], np.ndarray]:
+        """
+        Find a cached answer for a similar question stored under the same scope.
+
+        Returns:
+            The cached answer (or None) and the question embedding, which can be
+            passed to ``store`` to avoid embedding the question twice
+        """
+        if vector is None:
+            vector = self.embed(question)
+        literals = question_literals(question)
+        with self._lock:
+            self._expire(time.time())
+            if self._vectors is not None and len(self._entries):
+                scores = self._vectors @ vector
+                same_key = np.fromiter(
+                    (db == database and s == scope and lits == literals
+                     for db, s, lits in zip(self._databases, self._scopes, self._literals)),
+                    dtype=bool, count=len(self._databases)
+                )
+                scores[~same_key] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    self.logger.info(f"Semantic cache hit (similarity {scores[best]:.3f})")
+                    return self._entries[best]["response"], vector
+            self.misses += 1
+            return None, vector
+
+    def store(self, question: str, database: str, response: Dict[str, Any],
+              vector: Optional[np.ndarray] = None, scope: Optional[str] = None) -> None:
+        """Remember the answer to a question."""
+        if vector is None:
+            vector = self.embed(question)
+        with self._lock:
+            row = vector.reshape(1, -1)
+            self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+            self._created = np.append(self._created, time.time())
+            self._databases.append(database)
+            self._scopes.append(scope)
+            self._literals.append(question_literals(question))
+            self._entries.append({"question": question, "response": response})
+            if len(self._entries) > self.max_entries:
+                self._keep(np.arange(len(self._entries)) >= len(self._entries) - self.max_entries)
+
+    def invalidate(self, database: Optional[str] = None) -> None:
+        """Drop cached answers for a database, or all answers when None."""
+        with self._lock:
+            if database is None:
+                self._keep(np.zeros(len(self._entries), dtype=bool))
+            else:
+                self._keep(np.array([db != database for db in self._databases], dtype=bool))
+
+    def _expire(self, now: float) -> None:
+        if len(self._entries):
+            fresh = now - self._created <= self.ttl_seconds
+            if not fresh.all():
+                self._keep(fresh)
+
+    def _keep(self, mask: np.ndarray) -> None:
+        indices = np.flatnonzero(mask)
+        self._vectors = self._vectors[indices] if len(indices) else None
+        self._created = self._created[indices]
+        self._databases = [self._databases[i] for i in indices]
+        self._scopes = [self._scopes[i] for i in indices]
+        self._literals = [self._literals[i] for i in indices]
+        self._entries = [self._entries[i] for i in indices]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+_cache: Optional[SemanticAnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> SemanticAnswerCache:
+    """Return the process-wide semantic answer cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = SemanticAnswerCache(
+                threshold=settings["SEMANTIC_CACHE_THRESHOLD"],
+                ttl_seconds=settings["SEMANTIC_CACHE_TTL_SECONDS"]
+            )
+        return _cache
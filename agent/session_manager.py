@@ -0,0 +1,182 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from core.logger import get_application_logger
+
+T = TypeVar("T")
+
+
+class _Entry(Generic[T]):
+    __slots__ = ("value", "last_used", "leases")
+
+    def __init__(self, value: T):
+        self.value = value
+        self.last_used = time.monotonic()
+        self.leases = 0
+
+
+class SessionPool(Generic[T]):
+    """
+    Bounded LRU pool of per-session objects with idle expiry.
+
+    Objects are handed out as leases (``acquire``/``release`` or ``lease``);
+    an entry with an active lease is never evicted. Beyond that, at most
+    ``max_sessions`` entries are kept, the least recently used idle one being
+    evicted when the pool is full, and entries idle for longer than
+    ``idle_ttl`` seconds are evicted by ``sweep``. Every eviction calls
+    ``on_evict`` so the entry can release its resources.
+
+    New objects are built outside the pool lock, so a slow factory only
+    delays requests for the same session.
+    """
+
+    def __init__(self,
+                 factory: Callable[[str], T],
+                 max_sessions: int = 200,
+                 idle_ttl: float = 3600.0,
+                 on_evict: Optional[Callable[[str, T], None]] = None):
+        """
+        Args:
+            factory: Creates the object for a new session id
+            max_sessions: Maximum number of live sessions
+            idle_ttl: Seconds of inactivity after which a session is evicted
+            on_evict: Called with the session id and object on eviction
+        """
+        self.logger = get_application_logger()
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.evictions = 0
+        self._entries: "OrderedDict[str, _Entry[T]]" = OrderedDict()
+        # Sessions whose object is being built; waiters block on the event
+        self._creating: Dict[str, threading.Event] = {}
+        self._lock = threading.RLock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def acquire(self, session_id: str) -> T:
+        """Lease the object for a session, creating it if needed; pair with ``release``."""
+        while True:
+            with self._lock:
+                entry = self._entries.get(session_id)
+                if entry is not None:
+                    entry.leases += 1
+                    entry.last_used = time.monotonic()
+                    self._entries.move_to_end(session_id)
+                    return entry.value
+                pending = self._creating.get(session_id)
+                creator = pending is None
+                if creator:
+                    pending = self._creating[session_id] = threading.Event()
+            if creator:
+                return self._create(session_id, pending)
+            pending.wait()
+
+    def _create(self, session_id: str, pending: threading.Event) -> T:
+        try:
+            value = self.factory(session_id)
+        except Exception:
+            with self._lock:
+                del self._creating[session_id]
+            pending.set()
+            raise
+        with self._lock:
+            evicted = self._expired(time.monotonic())
+            evicted.extend(self._over_capacity())
+            entry = _Entry(value)
+            entry.leases = 1
+            self._entries[session_id] = entry
+            del self._creating[session_id]
+        pending.set()
+        self._evict(evicted)
+        return value
+
+    def release(self, session_id: str) -> None:
+        """End a lease taken with ``acquire``."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.leases > 0:
+                entry.leases -= 1
+                entry.last_used = time.monotonic()
+                # Keep the order by last use, which ``_expired`` relies on
+                self._entries.move_to_end(session_id)
+
+    @contextmanager
+    def lease(self, session_id: str) -> Iterator[T]:
+        """Hold the object for a session for the duration of a block."""
+        value = self.acquire(session_id)
+        try:
+            yield value
+        finally:
+            self.release(session_id)
+
+    def remove(self, session_id: str) -> None:
+        """Drop a session explicitly."""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._evict([(session_id, entry)])
+
+    def sweep(self) -> int:
+        """Evict idle sessions and return how many were removed."""
+        with self._lock:
+            evicted = self._expired(time.monotonic())
+        self._evict(evicted)
+        return len(evicted)
+
+    def _expired(self, now: float) -> List[Tuple[str, _Entry[T]]]:
+        # Entries are in access order, so the idle ones are at the front; leased ones are skipped
+        expired = []
+        for session_id, entry in list(self._entries.items()):
+            if now - entry.last_used <= self.idle_ttl:
+                break
+            if entry.leases == 0:
+                expired.append((session_id, self._entries.pop(session_id)))
+        return expired
+
+    def _over_capacity(self) -> List[Tuple[str, _Entry[T]]]:
+        """Make room for one more entry, evicting the least recently used idle ones."""
+        evicted = []
+        for session_id, entry in list(self._entries.items()):
+            if len(self._entries) < self.max_sessions:
+                break
+            if entry.leases == 0:
+                evicted.append((session_id, self._entries.pop(session_id)))
+        if len(self._entries) >= self.max_sessions:
+            self.logger.warning(f"All {len(self._entries)} sessions are in use; exceeding max_sessions")
+        return evicted
+
+    def _evict(self, evicted: List[Tuple[str, _Entry[T]]]) -> None:
+        for session_id, entry in evicted:
+            self.evictions += 1
+            self.logger.info(f"Evicting session {session_id}")
+            if self.on_evict is not None:
+                try:
+                    self.on_evict(session_id, entry.value)
+                except Exception as e:
+                    self.logger.warning(f"Error evicting session {session_id}: {str(e)}")
+
+    def start_sweeper(self, interval: float = 60.0) -> None:
+        """Run ``sweep`` periodically on a daemon thread."""
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.sweep()
+
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
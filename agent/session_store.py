@@ -0,0 +1,423 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+
+
+# Snapshot to write: (session_id, expected stored version, new version, state)
+SaveItem = Tuple[str, int, int, Dict[str, Any]]
+
+
+class SessionStore(ABC):
+    """Persistent storage of per-session memory state, keyed by session id."""
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Return ``(version, state)`` for a session, or None if it is unknown."""
+
+    @abstractmethod
+    def version(self, session_id: str) -> Optional[int]:
+        """Return the stored version of a session without loading its state."""
+
+    @abstractmethod
+    def save_many(self, items: Iterable[SaveItem]) -> List[str]:
+        """
+        Persist ``(session_id, expected, version, state)`` tuples in one batch.
+
+        Each write is conditional: it only happens if the stored version still
+        equals ``expected`` (0 for a session that is not stored yet).
+
+        Returns:
+            List[str]: Ids of the sessions that were not written because another
+            worker changed them first
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Remove a session."""
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session store for a single host; all workers share one SQLite file."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions "
+            "(session_id TEXT PRIMARY KEY, version INTEGER NOT NULL, state TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def load(self, session_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version, state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def version(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, items: Iterable[SaveItem]) -> List[str]:
+        now = time.time()
+        rows = [(session_id, expected, version, json.dumps(state)) for session_id, expected, version, state in items]
+        conflicts = []
+        with self._lock:
+            for session_id, expected, version, state in rows:
+                if expected == 0:
+                    cursor = self._db.execute(
+                        "INSERT INTO sessions (session_id, version, state, updated) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(session_id) DO NOTHING",
+                        (session_id, version, state, now)
+                    )
+                else:
+                    cursor = self._db.execute(
+                        "UPDATE sessions SET version = ?, state = ?, updated = ? "
+                        "WHERE session_id = ? AND version = ?",
+                        (version, state, now, session_id, expected)
+                    )
+                if cursor.rowcount == 0:
+                    conflicts.append(session_id)
+            self._db.commit()
+        return conflicts
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+
+class WatchError(Exception):
+    """A watched key changed before a transaction ran (mirrors ``redis.exceptions.WatchError``)."""
+
+
+try:
+    from redis.exceptions import WatchError as RedisWatchError
+except ImportError:
+    RedisWatchError = None
+
+_WATCH_ERRORS = (WatchError, RedisWatchError) if RedisWatchError is not None else (WatchError,)
+
+
+class InMemoryKeyValue:
+    """Minimal stand-in for the subset of the Redis client API used by KeyValueSessionStore."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        # Per-key write counters, so a pipeline can tell whether a watched key changed
+        self._writes: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        elif isinstance(value, int):
+            value = str(value).encode("utf-8")
+        with self._lock:
+            self._data[key] = (value, time.time() + ex if ex else None)
+            self._writes[key] = self._writes.get(key, 0) + 1
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            for key in keys:
+                self._writes[key] = self._writes.get(key, 0) + 1
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def pipeline(self) -> "_InMemoryPipeline":
+        return _InMemoryPipeline(self)
+
+
+class _InMemoryPipeline:
+    """WATCH/MULTI/EXEC subset of a Redis pipeline for ``InMemoryKeyValue``."""
+
+    def __init__(self, client: InMemoryKeyValue):
+        self.client = client
+        self._watched: Dict[str, int] = {}
+        self._queued: List[Tuple[str, Any, Optional[int]]] = []
+        self._buffering = False
+
+    def __enter__(self) -> "_InMemoryPipeline":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.reset()
+
+    def watch(self, *keys: str) -> None:
+        with self.client._lock:
+            for key in keys:
+                self._watched[key] = self.client._writes.get(key, 0)
+
+    def unwatch(self) -> None:
+        self._watched = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def multi(self) -> None:
+        self._buffering = True
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> None:
+        if not self._buffering:
+            self.client.set(key, value, ex=ex)
+            return
+        self._queued.append((key, value, ex))
+
+    def execute(self) -> List[bool]:
+        with self.client._lock:
+            if any(self.client._writes.get(key, 0) != count for key, count in self._watched.items()):
+                raise WatchError("Watched variable changed")
+            results = [self.client.set(key, value, ex=ex) for key, value, ex in self._queued]
+        self.reset()
+        return results
+
+    def reset(self) -> None:
+        self._watched = {}
+        self._queued = []
+        self._buffering = False
+
+
+class KeyValueSessionStore(SessionStore):
+    """
+    Session store on a Redis-compatible client.
+
+    Only ``get``, ``set(key, value, ex=...)``, ``delete`` and a pipeline
+    with WATCH/MULTI/EXEC are used, so a ``redis.Redis`` instance and
+    ``InMemoryKeyValue`` are interchangeable. Writes watch the version key and
+    are skipped when another worker bumped it first.
+    """
+
+    def __init__(self, client: Any, key_prefix: str = "session:", ttl_seconds: Optional[int] = None):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _state_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}:state"
+
+    def _version_key(self, session_id: str) -> str:
+        return f"{self.key_prefix}{session_id}:version"
+
+    def load(self, session_id: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        raw = self.client.get(self._state_key(session_id))
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return payload["version"], payload["state"]
+
+    def version(self, session_id: str) -> Optional[int]:
+        raw = self.client.get(self._version_key(session_id))
+        return int(raw) if raw is not None else None
+
+    def save_many(self, items: Iterable[SaveItem]) -> List[str]:
+        conflicts = []
+        for session_id, expected, version, state in items:
+            if not self._save(session_id, expected, version, state):
+                conflicts.append(session_id)
+        return conflicts
+
+    def _save(self, session_id: str, expected: int, version: int, state: Dict[str, Any]) -> bool:
+        version_key = self._version_key(session_id)
+        payload = json.dumps({"version": version, "state": state})
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(version_key)
+                current = pipe.get(version_key)
+                if (int(current) if current is not None else 0) != expected:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.set(self._state_key(session_id), payload, ex=self.ttl_seconds)
+                pipe.set(version_key, version, ex=self.ttl_seconds)
+                pipe.execute()
+                return True
+            except _WATCH_ERRORS:
+                return False
+
+    def delete(self, session_id: str) -> None:
+        self.client.delete(self._state_key(session_id), self._version_key(session_id))
+
+
+class SessionPersistence:
+    """
+    Lazy loading and write-behind persistence of agent memory.
+
+    ``refresh`` loads a session's state when the store holds a newer version
+    than the in-process copy, so any worker can pick up a session. ``save``
+    only snapshots the state into a pending map; a background thread writes
+    pending sessions in batches, coalescing repeated saves of the same session.
+
+    Writes are conditional on the version the snapshot was based on. When
+    another worker wrote the session first, the snapshot is dropped, the
+    conflict is logged and the session is reloaded on its next ``refresh``.
+    """
+
+    def __init__(self, store: SessionStore, flush_interval: float = 1.0, batch_size: int = 50):
+        """
+        Args:
+            store: Backend that persists session state
+            flush_interval: Maximum seconds a snapshot waits before being written
+            batch_size: Number of pending sessions that triggers an early flush
+        """
+        self.logger = get_application_logger()
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # session_id -> (expected stored version, new version, state)
+        self._pending: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+        # Sessions whose local memory lost a write conflict and must be reloaded
+        self._stale: set = set()
+        self.conflicts = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._writer.start()
+
+    def refresh(self, session_id: str, agent: Any) -> None:
+        """Load the stored memory into ``agent`` if it is newer than what the agent holds."""
+        with self._lock:
+            pending = self._pending.get(session_id)
+            stale = session_id in self._stale
+        if pending is not None:
+            _, version, state = pending
+            if version == agent.memory_version:
+                # The agent holds the latest state and it has not been written yet
+                return
+            if version > agent.memory_version:
+                # A snapshot left by an evicted agent of this session is newer than the store
+                self.logger.info(f"Rehydrating session {session_id} from pending version {version}")
+                agent.agent_memory.load_state(state)
+                agent.memory_version = version
+                return
+        stored_version = self.store.version(session_id)
+        if stored_version is None or (stored_version <= agent.memory_version and not stale):
+            return
+        loaded = self.store.load(session_id)
+        if loaded is None:
+            return
+        version, state = loaded
+        self.logger.info(f"Rehydrating session {session_id} at version {version}")
+        agent.agent_memory.load_state(state)
+        agent.memory_version = version
+        with self._lock:
+            self._stale.discard(session_id)
+
+    def save(self, session_id: str, agent: Any) -> None:
+        """Snapshot the agent memory and schedule it for writing."""
+        expected = agent.memory_version
+        agent.memory_version += 1
+        state = agent.agent_memory.to_state()
+        with self._lock:
+            pending = self._pending.get(session_id)
+            if pending is not None:
+                # Coalesced snapshots are still based on the last written version
+                expected = pending[0]
+            self._pending[session_id] = (expected, agent.memory_version, state)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        """Write every pending snapshot now."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            conflicts = self.store.save_many(
+                (sid, expected, version, state) for sid, (expected, version, state) in pending.items()
+            )
+        except Exception as e:
+            self.logger.error(f"Could not persist {len(pending)} sessions: {str(e)}")
+            with self._lock:
+                for session_id, entry in pending.items():
+                    newer = self._pending.get(session_id)
+                    # Keep newer snapshots taken while the write was failing, based on the unwritten version
+                    self._pending[session_id] = entry if newer is None else (entry[0], newer[1], newer[2])
+            return
+        if conflicts:
+            self.logger.warning(
+                f"Discarded {len(conflicts)} session snapshots changed by another worker: {', '.join(conflicts)}"
+            )
+            with self._lock:
+                self.conflicts += len(conflicts)
+                self._stale.update(conflicts)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the writer thread after a final flush."""
+        self._stop.set()
+        self._wakeup.set()
+        self._writer.join(timeout=5)
+        self.flush()
+
+
+def create_session_store(kind: str, url: Optional[str] = None) -> Optional[SessionStore]:
+    """
+    Build the session store selected by configuration.
+
+    Args:
+        kind: "sqlite", "redis", "memory" or "none"
+        url: SQLite file path or Redis URL
+    """
+    if kind == "sqlite":
+        return SQLiteSessionStore(url or "./storage/sessions.sqlite")
+    if kind == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("The redis package is required for SESSION_STORE=redis")
+        return KeyValueSessionStore(redis.Redis.from_url(url or "redis://localhost:6379/0"))
+    if kind == "memory":
+        return KeyValueSessionStore(InMemoryKeyValue())
+    return None
+
+
+_persistence: Optional[SessionPersistence] = None
+_persistence_created = False
+_persistence_lock = threading.Lock()
+
+
+def get_session_persistence() -> Optional[SessionPersistence]:
+    """Return the process-wide session persistence, or None when disabled."""
+    global _persistence, _persistence_created
+    with _persistence_lock:
+        if not _persistence_created:
+            settings = get_settings()
+            store = create_session_store(settings["SESSION_STORE"], settings["SESSION_STORE_URL"])
+            if store is not None:
+                _persistence = SessionPersistence(store, flush_interval=settings["SESSION_STORE_FLUSH_SECONDS"])
+            _persistence_created = True
+        return _persistence
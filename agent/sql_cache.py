@@ -0,0 +1,180 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+
+_TOKEN_RE = re.compile(
+    r"(?P<string>'(?:[^']|'')*')"
+    r"|(?P<ident>\"(?:[^\"]|\"\")*\")"
+    r"|(?P<line_comment>--[^\n]*)"
+    r"|(?P<block_comment>/\*.*?\*/)"
+    r"|(?P<space>\s+)"
+    r"|(?P<punct>[(),;=<>!+\-*/%.|])"
+    r"|(?P<word>[^\s'\"(),;=<>!+\-*/%.|]+)",
+    re.DOTALL
+)
+
+_READ_ONLY_PREFIXES = ("select", "with", "show", "describe", "explain", "values")
+
+
+def tokenize_sql(query: str) -> List[Tuple[str, str]]:
+    """Split a statement into ``(kind, text)`` tokens, comments and whitespace included."""
+    return [(match.lastgroup, match.group()) for match in _TOKEN_RE.finditer(query)]
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Canonical form of a SQL statement used as a cache key.
+
+    Comments are dropped, whitespace is collapsed, keywords and identifiers are
+    lowercased (Athena identifiers are case-insensitive) and trailing
+    semicolons removed. String literals are kept verbatim, so queries that
+    differ only in a filter value never share an entry.
+    """
+    # Tokens never depend on the original spacing, so joining them with a
+    # single space gives the same text for any formatting of the statement
+    tokens = []
+    for kind, text in tokenize_sql(query):
+        if kind in ("space", "line_comment", "block_comment"):
+            continue
+        tokens.append(text if kind == "string" else text.lower())
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def is_cacheable(query: str) -> bool:
+    """Only read-only statements are cached."""
+    return normalize_sql(query).startswith(_READ_ONLY_PREFIXES)
+
+
+class SQLResultCache:
+    """
+    Two-tier cache of SQL results keyed by normalized query text and database.
+
+    The in-process tier is a size-bounded LRU; the optional on-disk tier is a
+    SQLite file that survives restarts. Both tiers honour the same TTL.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0,
+                 disk_path: Optional[str] = None):
+        """
+        Args:
+            max_entries: Maximum number of results kept in memory
+            ttl_seconds: Seconds after which an entry is considered stale
+            disk_path: Optional SQLite file for the persistent tier
+        """
+        self.logger = get_application_logger()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sql_results "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(query: str, database: str) -> str:
+        normalized = normalize_sql(query)
+        return hashlib.sha256(f"{database}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, query: str, database: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a query, or None on a miss."""
+        key = self.make_key(query, database)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM sql_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= self.ttl_seconds:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, database: str, value: Dict[str, Any]) -> None:
+        """Store the result of a query."""
+        key = self.make_key(query, database)
+        created = time.time()
+        with self._lock:
+            self._store(key, value, created)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sql_results (key, value, created) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, default=str), created)
+                )
+                self._db.execute(
+                    "DELETE FROM sql_results WHERE created < ?", (created - self.ttl_seconds,)
+                )
+                self._db.commit()
+
+    def _store(self, key: str, value: Dict[str, Any], created: float) -> None:
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached result from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM sql_results")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+_cache: Optional[SQLResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_sql_result_cache() -> SQLResultCache:
+    """Return the process-wide SQL result cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = SQLResultCache(
+                max_entries=settings["SQL_CACHE_MAX_ENTRIES"],
+                ttl_seconds=settings["SQL_CACHE_TTL_SECONDS"],
+                disk_path=settings["SQL_CACHE_PATH"]
+            )
+        return _cache
@@ -0,0 +1,359 @@
+import difflib
+import threading
+from typing import List, Optional, Set, Tuple
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+from agent.schema_catalog import SchemaCatalog, get_schema_catalog
+from agent.sql_cache import tokenize_sql
+
+try:
+    import sqlglot
+    from sqlglot import exp
+except ImportError:  # pragma: no cover - optional dependency
+    sqlglot = None
+    exp = None
+
+# Athena engine v3 is Trino based; the Presto grammar covers what the agent writes
+_DIALECT = "presto"
+
+# Functions whose arguments use the FROM keyword
+_FROM_FUNCTIONS = ("extract", "trim", "substring", "position")
+
+# Keywords that end a FROM or WHERE clause
+_CLAUSE_END = ("where", "group", "having", "order", "limit", "offset", "fetch", "window",
+               "union", "intersect", "except")
+
+# Top-level keywords that mean a query is not a plain exploratory SELECT *
+_LIMITED = ("limit", "fetch", "offset", "group", "having", "union", "intersect", "except")
+
+# Aggregate functions; a SELECT * with one of them is not exploratory
+_AGGREGATES = ("count", "sum", "avg", "min", "max", "approx_distinct", "array_agg", "count_if", "max_by", "min_by")
+
+# Words that are values rather than column references
+_LITERAL_WORDS = ("null", "true", "false", "current_date", "current_time", "current_timestamp")
+
+
+class SQLValidationError(Exception):
+    """A query was rejected locally before being sent to Athena."""
+
+
+class SQLGuard:
+    """
+    Pre-flight checks of agent-generated SQL.
+
+    Statements are parsed locally, table and column names are checked against
+    the schema catalog, exploratory ``SELECT *`` queries without a LIMIT,
+    FETCH or OFFSET get one added, and cross joins are rejected. Problems are raised as
+    ``SQLValidationError`` with a message precise enough for the agent to fix
+    the query without an Athena round trip.
+
+    Parsing uses sqlglot when it is installed. Without it a token-based
+    fallback still catches broken quoting and parentheses, multiple
+    statements, unknown tables, cross joins (``CROSS JOIN`` and comma joins
+    without a column equality in WHERE) and missing LIMITs with the same rules
+    as the parsed check, but does not check column names. sqlglot is an
+    optional dependency (see requirements.txt).
+    """
+
+    def __init__(self, catalog: Optional[SchemaCatalog] = None, default_limit: int = 100):
+        """
+        Args:
+            catalog: Schema catalog used to validate names, None to skip name checks
+            default_limit: LIMIT added to exploratory SELECT * queries
+        """
+        self.logger = get_application_logger()
+        self.catalog = catalog
+        self.default_limit = default_limit
+
+    def validate(self, query: str) -> str:
+        """
+        Check a query and return the statement to run.
+
+        Returns:
+            The query itself, or a rewritten query when a LIMIT was added
+
+        Raises:
+            SQLValidationError: If the query must not be sent to Athena
+        """
+        if not query or not query.strip():
+            raise SQLValidationError("The query is empty")
+        if sqlglot is not None:
+            return self._validate_parsed(query)
+        return self._validate_tokens(query)
+
+    def _known_tables(self) -> Set[str]:
+        if self.catalog is None:
+            return set()
+        return {name.lower() for name in self.catalog.table_names()}
+
+    def _check_table(self, name: str, db: str, known: Set[str]) -> None:
+        if not known or (db and self.catalog is not None and db.lower() != self.catalog.database.lower()):
+            return
+        if name.lower() not in known:
+            suggestions = difflib.get_close_matches(name.lower(), known, n=3)
+            hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+            raise SQLValidationError(f"Table '{name}' does not exist.{hint}")
+
+    def _columns_of(self, table: str) -> Set[str]:
+        if self.catalog is None:
+            return set()
+        for name in self.catalog.table_names():
+            if name.lower() == table.lower():
+                return {c["name"].lower() for c in self.catalog.columns(name)}
+        return set()
+
+    def _validate_parsed(self, query: str) -> str:
+        try:
+            statements = [s for s in sqlglot.parse(query, read=_DIALECT) if s is not None]
+        except sqlglot.errors.ParseError as e:
+            raise SQLValidationError(f"Syntax error: {str(e)}")
+        if len(statements) != 1:
+            raise SQLValidationError("Send exactly one SQL statement per query")
+        tree = statements[0]
+
+        known = self._known_tables()
+        cte_names = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+        # Alias (or name) of every catalog table in the query, mapped to the table
+        sources = {}
+        opaque_sources = bool(cte_names) or any(True for _ in tree.find_all(exp.Subquery, exp.Unnest))
+        for table in tree.find_all(exp.Table):
+            if table.name.lower() in cte_names:
+                continue
+            if table.db and self.catalog is not None and table.db.lower() != self.catalog.database.lower():
+                # Tables of other databases are not in the catalog
+                opaque_sources = True
+                continue
+            self._check_table(table.name, table.db, known)
+            sources[table.alias_or_name.lower()] = table.name
+
+        self._check_joins(tree)
+        if known and not any(True for _ in tree.find_all(exp.Lambda)):
+            self._check_columns(tree, sources, opaque_sources)
+
+        if self._needs_limit(tree):
+            rewritten = tree.limit(self.default_limit).sql(dialect=_DIALECT)
+            self.logger.info(f"Added LIMIT {self.default_limit} to exploratory query")
+            return rewritten
+        return query
+
+    def _check_joins(self, tree) -> None:
+        for join in tree.find_all(exp.Join):
+            if isinstance(join.this, (exp.Unnest, exp.Lateral)):
+                continue
+            kind = (join.args.get("kind") or "").upper()
+            has_condition = join.args.get("on") is not None or join.args.get("using")
+            if kind == "CROSS":
+                raise SQLValidationError(
+                    "CROSS JOIN is not allowed; join the tables on a key with JOIN ... ON"
+                )
+            if not has_condition and not self._where_joins(join.parent_select):
+                raise SQLValidationError(
+                    f"Join with {join.this.sql(dialect=_DIALECT)} has no join condition and would "
+                    "produce a cross join; add an ON clause"
+                )
+
+    @staticmethod
+    def _where_joins(select) -> bool:
+        """True when a comma join is constrained by a column equality in WHERE."""
+        where = select.args.get("where") if select is not None else None
+        if where is None:
+            return False
+        return any(
+            isinstance(eq.left, exp.Column) and isinstance(eq.right, exp.Column)
+            for eq in where.find_all(exp.EQ)
+        )
+
+    def _check_columns(self, tree, sources: dict, opaque_sources: bool) -> None:
+        aliases = {alias.alias.lower() for alias in tree.find_all(exp.Alias)}
+        all_columns: Set[str] = set()
+        for table in sources.values():
+            all_columns |= self._columns_of(table)
+
+        for column in tree.find_all(exp.Column):
+            if isinstance(column.this, exp.Star):
+                continue
+            name = column.name.lower()
+            qualifier = column.table.lower()
+            if qualifier:
+                if qualifier not in sources:
+                    # Subquery alias or a struct field access
+                    continue
+                table = sources[qualifier]
+                columns = self._columns_of(table)
+                if columns and name not in columns:
+                    raise SQLValidationError(self._unknown_column(column.name, table, columns))
+            elif not opaque_sources and all_columns and name not in all_columns and name not in aliases:
+                tables = ", ".join(sorted(set(sources.values())))
+                raise SQLValidationError(self._unknown_column(column.name, tables, all_columns))
+
+    @staticmethod
+    def _unknown_column(name: str, table: str, columns: Set[str]) -> str:
+        suggestions = difflib.get_close_matches(name.lower(), columns, n=3)
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+        return f"Column '{name}' does not exist in {table}.{hint}"
+
+    @staticmethod
+    def _needs_limit(tree) -> bool:
+        """An exploratory query is a plain SELECT * without LIMIT/FETCH/OFFSET, grouping or aggregation."""
+        if not isinstance(tree, exp.Select) or tree.args.get("limit") is not None:
+            return False
+        if tree.args.get("offset") is not None or tree.args.get("having") is not None:
+            return False
+        if tree.args.get("group") is not None or tree.find(exp.AggFunc) is not None:
+            return False
+        return any(
+            isinstance(e, exp.Star) or (isinstance(e, exp.Column) and isinstance(e.this, exp.Star))
+            for e in tree.expressions
+        )
+
+    def _validate_tokens(self, query: str) -> str:
+        raw = tokenize_sql(query)
+        if sum(len(text) for _, text in raw) != len(query):
+            raise SQLValidationError("Syntax error: unterminated string literal or quoted identifier")
+        tokens: List[Tuple[str, str]] = [
+            (kind, text if kind in ("string", "ident") else text.lower())
+            for kind, text in raw if kind not in ("space", "line_comment", "block_comment")
+        ]
+        while tokens and tokens[-1][1] == ";":
+            tokens.pop()
+        if any(text == ";" for _, text in tokens):
+            raise SQLValidationError("Send exactly one SQL statement per query")
+
+        depth = 0
+        top_level_words = []
+        for _, text in tokens:
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+                if depth < 0:
+                    raise SQLValidationError("Syntax error: unbalanced parentheses")
+            elif depth == 0:
+                top_level_words.append(text)
+        if depth != 0:
+            raise SQLValidationError("Syntax error: unbalanced parentheses")
+
+        texts = [text for _, text in tokens]
+        cte_names = {
+            texts[i - 1].strip('"').lower()
+            for i in range(1, len(texts) - 1)
+            if texts[i] == "as" and texts[i + 1] == "("
+        }
+        known = self._known_tables()
+        # Word before each open parenthesis; FROM inside EXTRACT(... FROM x) is not a table
+        openers: List[str] = []
+        for i, text in enumerate(texts[:-1]):
+            if text == "(":
+                openers.append(texts[i - 1] if i else "")
+            elif text == ")" and openers:
+                openers.pop()
+            elif text == "cross" and texts[i + 1] == "join" and (i + 2 >= len(texts) or texts[i + 2] != "unnest"):
+                raise SQLValidationError("CROSS JOIN is not allowed; join the tables on a key with JOIN ... ON")
+            elif text in ("from", "join") and texts[i + 1] not in ("(", "unnest"):
+                if openers and openers[-1] in _FROM_FUNCTIONS:
+                    continue
+                name, db = texts[i + 1].strip('"'), ""
+                if i + 3 < len(texts) and texts[i + 2] == ".":
+                    name, db = texts[i + 3].strip('"'), name
+                if name.lower() not in cte_names:
+                    self._check_table(name, db, known)
+        self._check_comma_joins(tokens)
+
+        if self._is_exploratory(texts, top_level_words):
+            # Trailing comments and semicolons go, so the LIMIT is not commented out
+            end = len(raw)
+            while end and (raw[end - 1][0] in ("space", "line_comment", "block_comment") or raw[end - 1][1] == ";"):
+                end -= 1
+            self.logger.info(f"Added LIMIT {self.default_limit} to exploratory query")
+            return f"{''.join(text for _, text in raw[:end])} LIMIT {self.default_limit}"
+        return query
+
+    @staticmethod
+    def _is_exploratory(texts: List[str], top_level_words: List[str]) -> bool:
+        """Token version of ``_needs_limit``."""
+        if "select" not in top_level_words or any(word in _LIMITED for word in top_level_words):
+            return False
+        if any(text in _AGGREGATES and nxt == "(" for text, nxt in zip(texts, texts[1:])):
+            return False
+        # Select list of the main query; WITH clauses are inside parentheses and skipped
+        start = top_level_words.index("select") + 1
+        end = top_level_words.index("from", start) if "from" in top_level_words[start:] else len(top_level_words)
+        select_list = top_level_words[start:end]
+        return any(
+            text == "*" and (i == 0 or select_list[i - 1] in ("distinct", "all", ",", "."))
+            for i, text in enumerate(select_list)
+        )
+
+    @staticmethod
+    def _clause_end(texts: List[str], start: int) -> int:
+        """Index of the keyword or closing parenthesis that ends the clause starting at ``start``."""
+        depth = 0
+        for i in range(start, len(texts)):
+            if texts[i] == "(":
+                depth += 1
+            elif texts[i] == ")":
+                if depth == 0:
+                    return i
+                depth -= 1
+            elif depth == 0 and texts[i] in _CLAUSE_END:
+                return i
+        return len(texts)
+
+    def _check_comma_joins(self, tokens: List[Tuple[str, str]]) -> None:
+        """Token version of ``_check_joins`` for comma joins: WHERE must relate two columns."""
+        texts = [text for _, text in tokens]
+        for start, text in enumerate(texts):
+            if text != "from":
+                continue
+            end = self._clause_end(texts, start + 1)
+            depth = 0
+            comma_join = False
+            for i in range(start + 1, end):
+                if texts[i] == "(":
+                    depth += 1
+                elif texts[i] == ")":
+                    depth -= 1
+                elif depth == 0 and texts[i] == "," and i + 1 < end and texts[i + 1] != "unnest":
+                    comma_join = True
+            if not comma_join:
+                continue
+            if end < len(texts) and texts[end] == "where":
+                if self._has_column_equality(tokens, end + 1, self._clause_end(texts, end + 1)):
+                    continue
+            raise SQLValidationError(
+                "Comma join has no join condition and would produce a cross join; "
+                "join the tables on a key with JOIN ... ON"
+            )
+
+    @staticmethod
+    def _has_column_equality(tokens: List[Tuple[str, str]], start: int, end: int) -> bool:
+        def is_column(i: int) -> bool:
+            kind, text = tokens[i]
+            if kind == "ident":
+                return True
+            if kind != "word" or text[0].isdigit() or text in _LITERAL_WORDS:
+                return False
+            # A word followed by a string literal or a parenthesis is a typed literal or a function call
+            return i + 1 >= len(tokens) or tokens[i + 1][0] != "string" and tokens[i + 1][1] != "("
+
+        for i in range(start + 1, end - 1):
+            if tokens[i][1] != "=" or tokens[i - 1][1] in ("<", ">", "!"):
+                continue
+            right = i + 3 if i + 3 < end and tokens[i + 2][1] == "." else i + 1
+            if is_column(i - 1) and is_column(right):
+                return True
+        return False
+
+
+_guard: Optional[SQLGuard] = None
+_guard_lock = threading.Lock()
+
+
+def get_sql_guard() -> SQLGuard:
+    """Return the process-wide SQL guard bound to the schema catalog."""
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            _guard = SQLGuard(get_schema_catalog(), default_limit=get_settings()["SQL_GUARD_DEFAULT_LIMIT"])
+        return _guard
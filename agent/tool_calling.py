@@ -0,0 +1,167 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from llama_index.core.llms import ChatMessage, MessageRole
+from llama_index.core.tools import FunctionTool
+
+from config.settings import get_settings
+from core.admission import AdmissionRejected
+from core.logger import get_application_logger
+from core.tracing import span
+
+
+def run_in_context(fn, *args):
+    """Bind ``fn`` to a copy of the current context for running on another thread."""
+    # Timings, the active span and the turn's tool results live in context variables
+    return functools.partial(contextvars.copy_context().run, fn, *args)
+
+
+def in_context_async(fn: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """
+    Async twin of a sync tool for ``FunctionTool(async_fn=...)``.
+
+    llama-index otherwise runs sync tools through ``run_in_executor`` without
+    the caller's context, losing the turn's recorded results, timings and
+    parent span on the async agent path.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_tool_executor(), run_in_context(functools.partial(fn, *args, **kwargs)))
+    return wrapper
+
+
+class ToolCallingRunner:
+    """
+    Runs the agent with Converse native tool use instead of ReAct text parsing.
+
+    The model may return several toolUse blocks in one response; they are
+    independent by construction (none can see another's result), so all of
+    them run at once on the tool pool and their results go back in a single
+    message. A question that needs a schema lookup and a sample query then
+    costs one round trip instead of two ReAct iterations.
+    """
+
+    def __init__(self, llm: Any, tools: Sequence[FunctionTool], system_prompt: str,
+                 executor: ThreadPoolExecutor, max_iterations: int = 20):
+        """
+        Args:
+            llm: Function-calling LLM (BedrockConverse)
+            tools: Tools the model may call
+            system_prompt: Agent instructions sent as the system prompt
+            executor: Pool the tool calls run on
+            max_iterations: Maximum number of model round trips
+        """
+        self.logger = get_application_logger()
+        self.llm = llm
+        self.tools = list(tools)
+        self.system_prompt = system_prompt
+        self.executor = executor
+        self.max_iterations = max_iterations
+        self._tools_by_name = {tool.metadata.name: tool for tool in self.tools}
+
+    def _messages(self, history: List[ChatMessage], user_input: str, turn_context: str) -> List[ChatMessage]:
+        # Per-turn context follows the static prompt so the cacheable prefix stays unchanged
+        system = [ChatMessage(role=MessageRole.SYSTEM, content=self.system_prompt)]
+        if turn_context:
+            system.append(ChatMessage(role=MessageRole.SYSTEM, content=turn_context))
+        return [*system, *history, ChatMessage(role=MessageRole.USER, content=user_input)]
+
+    def _call_tool(self, tool_name: str, tool_kwargs: Dict[str, Any]) -> str:
+        tool = self._tools_by_name.get(tool_name)
+        if tool is None:
+            return f"Error: unknown tool {tool_name}"
+        try:
+            return str(tool.call(**tool_kwargs).content)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            # Same as ReAct: the model sees the error and can correct its call
+            return f"Error: {str(e)}"
+
+    @staticmethod
+    def _tool_message(tool_call: Any, output: str) -> ChatMessage:
+        return ChatMessage(
+            role=MessageRole.TOOL,
+            content=output,
+            additional_kwargs={"tool_call_id": tool_call.tool_id, "name": tool_call.tool_name}
+        )
+
+    def _call_tools(self, tool_calls: List[Any]) -> List[str]:
+        if len(tool_calls) == 1:
+            return [self._call_tool(tool_calls[0].tool_name, tool_calls[0].tool_kwargs)]
+        futures = [
+            self.executor.submit(run_in_context(self._call_tool, call.tool_name, call.tool_kwargs))
+            for call in tool_calls
+        ]
+        return [future.result() for future in futures]
+
+    def run(self, history: List[ChatMessage], user_input: str, turn_context: str = "") -> str:
+        """Run the tool-use loop to completion and return the model's final text."""
+        messages = self._messages(history, user_input, turn_context)
+        for iteration in range(1, self.max_iterations + 1):
+            with span("tool_calling.iteration", iteration=iteration) as iteration_span:
+                response = self.llm.chat_with_tools(
+                    self.tools, chat_history=messages, allow_parallel_tool_calls=True
+                )
+                tool_calls = self.llm.get_tool_calls_from_response(response, error_on_no_tool_call=False)
+                if not tool_calls:
+                    return response.message.content or ""
+                iteration_span.set_attribute("tool_calls", len(tool_calls))
+                messages.append(response.message)
+                outputs = self._call_tools(tool_calls)
+                messages.extend(self._tool_message(c, o) for c, o in zip(tool_calls, outputs))
+        raise ValueError(f"Reached max iterations ({self.max_iterations}) without a final answer")
+
+    async def astream(self, history: List[ChatMessage], user_input: str,
+                      turn_context: str = "") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async tool-use loop yielding ``thought``, ``tool_call`` and ``observation``
+        events, then one ``answer`` event with the model's final text.
+        """
+        loop = asyncio.get_running_loop()
+        messages = self._messages(history, user_input, turn_context)
+        for iteration in range(1, self.max_iterations + 1):
+            with span("tool_calling.iteration", iteration=iteration) as iteration_span:
+                response = await self.llm.achat_with_tools(
+                    self.tools, chat_history=messages, allow_parallel_tool_calls=True
+                )
+                tool_calls = self.llm.get_tool_calls_from_response(response, error_on_no_tool_call=False)
+                if not tool_calls:
+                    yield {"event": "answer", "data": response.message.content or ""}
+                    return
+                iteration_span.set_attribute("tool_calls", len(tool_calls))
+                if response.message.content:
+                    yield {"event": "thought", "data": response.message.content}
+                for call in tool_calls:
+                    yield {"event": "tool_call", "data": {"tool": call.tool_name, "input": call.tool_kwargs}}
+
+                messages.append(response.message)
+                outputs = await asyncio.gather(*(
+                    loop.run_in_executor(self.executor, run_in_context(self._call_tool, c.tool_name, c.tool_kwargs))
+                    for c in tool_calls
+                ))
+                for call, output in zip(tool_calls, outputs):
+                    messages.append(self._tool_message(call, output))
+                    yield {"event": "observation", "data": output}
+        raise ValueError(f"Reached max iterations ({self.max_iterations}) without a final answer")
+
+
+_tool_executor: Optional[ThreadPoolExecutor] = None
+_tool_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Return the process-wide pool for parallel tool calls and speculative prefetch."""
+    global _tool_executor
+    with _tool_executor_lock:
+        if _tool_executor is None:
+            _tool_executor = ThreadPoolExecutor(
+                max_workers=get_settings()["AGENT_TOOL_WORKERS"],
+                thread_name_prefix="agent-tool"
+            )
+        return _tool_executor
@@ -1,5 +1,14 @@
-from fastapi import FastAPI
+import math
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from backend.routers import agent, s3, knowledgebase, inventory, chart
+from services.aws.clients import get_client_registry
+from core.admission import AdmissionRejected
+from agent.session_store import get_session_persistence
+from agent.schema_catalog import get_schema_catalog
+from core.metrics import get_metrics_registry, start_request_timings
+from core.tracing import SPAN_KIND_SERVER, get_tracer
 
 app = FastAPI(title="Clearwater Post Trade Data API")
 
@@ -10,6 +19,72 @@ app.include_router(knowledgebase.router, prefix="/knowledgebase", tags=["Knowled
 app.include_router(inventory.router, prefix="/inventory", tags=["Inventory"])
 app.include_router(chart.router, prefix="/chart", tags=["Chart"])
 
+REQUEST_SECONDS = get_metrics_registry().histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "path", "status")
+)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Phases timed anywhere below this request add up in its RequestTimings
+    start_request_timings()
+    started = time.perf_counter()
+    with get_tracer().span(
+        f"{request.method} {request.url.path}",
+        kind=SPAN_KIND_SERVER,
+        traceparent=request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.target": request.url.path}
+    ) as request_span:
+        response = await call_next(request)
+        # Label by route template so ids in the URL do not create new series
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        request_span.name = f"{request.method} {path}"
+        request_span.set_attribute("http.route", path)
+        request_span.set_attribute("http.status_code", response.status_code)
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        path=path,
+        status=response.status_code
+    )
+    return response
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+@app.on_event("startup")
+def create_aws_clients():
+    # Build pooled AWS clients and Bedrock providers before the first request
+    get_client_registry().warm_up()
+
+@app.on_event("startup")
+def start_session_sweeper():
+    agent.session_agents.start_sweeper()
+
+@app.on_event("startup")
+def start_schema_catalog():
+    # Loads the stored snapshot and refreshes it in the background when stale
+    get_schema_catalog().start_refresher()
+
+@app.on_event("shutdown")
+def flush_traces():
+    get_tracer().flush()
+
+@app.on_event("shutdown")
+def flush_sessions():
+    persistence = get_session_persistence()
+    if persistence is not None:
+        persistence.close()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(get_metrics_registry().render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def root():
     return {"message": "Clearwater Post Trade Data API is running."}
@@ -1,12 +1,14 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class AgentQueryRequest(BaseModel):
     query: str
+    include_timings: bool = False
 
 class AgentQueryResponse(BaseModel):
     success: bool
     response: Any  # Accepts dict, str, etc.
+    timings: Optional[Dict[str, Any]] = None  # Per-phase breakdown when include_timings is set
 
 class AgentFeedbackRequest(BaseModel):
     response_id: str
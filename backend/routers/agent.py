@@ -1,40 +1,147 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from backend.models.schemas import AgentQueryRequest, AgentQueryResponse, AgentFeedbackRequest, AgentFeedbackResponse
 from agent.agent import BedrockAgent
 from core.logger import get_application_logger
-from typing import Dict
+from services.aws.clients import get_client_registry
+from agent.sql_cache import get_sql_result_cache
+from agent.semantic_cache import get_semantic_cache
+from agent.session_manager import SessionPool
+from agent.session_store import get_session_persistence
+from agent.result_store import get_result_store, ResultNotFound
+from config.settings import get_settings
+from core.admission import AdmissionRejected, get_admission_controller
+from core.resilience import get_hedged_caller
+from core.metrics import current_timings
 from pydantic import BaseModel
+from typing import Optional
+import json
 
 router = APIRouter()
 
-# Global session memory for agents
-session_agents: Dict[str, BedrockAgent] = {}
+def _create_agent(session_id: str) -> BedrockAgent:
+    return BedrockAgent(get_application_logger())
+
+def _release_agent(session_id: str, agent: BedrockAgent) -> None:
+    persistence = get_session_persistence()
+    if persistence is not None:
+        persistence.save(session_id, agent)
+    agent.close()
+
+# Bounded pool of per-session agents; idle and least recently used sessions are evicted
+_settings = get_settings()
+session_agents: SessionPool[BedrockAgent] = SessionPool(
+    _create_agent,
+    max_sessions=_settings["SESSION_MAX_AGENTS"],
+    idle_ttl=_settings["SESSION_IDLE_TTL_SECONDS"],
+    on_evict=_release_agent
+)
 
 def get_agent_for_session(session_id: str):
-    if session_id not in session_agents:
-        logger = get_application_logger()
-        session_agents[session_id] = BedrockAgent(logger)
-    return session_agents[session_id]
+    """Lease the session's agent; every call must be paired with ``release_agent_for_session``."""
+    agent = session_agents.acquire(session_id)
+    try:
+        persistence = get_session_persistence()
+        if persistence is not None:
+            # Pick up memory written by another worker or before a restart
+            persistence.refresh(session_id, agent)
+    except Exception:
+        session_agents.release(session_id)
+        raise
+    return agent
+
+def release_agent_for_session(session_id: str) -> None:
+    session_agents.release(session_id)
+
+def save_agent_for_session(session_id: str, agent: BedrockAgent) -> None:
+    persistence = get_session_persistence()
+    if persistence is not None:
+        persistence.save(session_id, agent)
 
 @router.get("/ping")
 def ping():
     return {"message": "Agent service is alive."}
 
+@router.get("/stats")
+def stats():
+    return {
+        "aws_pools": get_client_registry().pool_stats(),
+        "embedding_cache": get_client_registry().embedding_cache_stats(),
+        "sql_cache": get_sql_result_cache().stats(),
+        "semantic_cache": get_semantic_cache().stats(),
+        "admission": get_admission_controller().stats(),
+        "llm_resilience": get_hedged_caller().stats(),
+        "sessions": {"live": len(session_agents), "evictions": session_agents.evictions},
+    }
+
 class AgentQueryRequestWithSession(AgentQueryRequest):
     session_id: str
 
 @router.post("/query", response_model=AgentQueryResponse)
 def query_agent(request: AgentQueryRequestWithSession):
+    # A plain def runs in FastAPI's threadpool, so the blocking agent turn never holds the event loop
     try:
         agent = get_agent_for_session(request.session_id)
-        # Use generate_response for memory/context
-        response = agent.generate_response(request.query)
-        return AgentQueryResponse(success=response.get("success", False), response=response.get("response"))
+        try:
+            # Use generate_response for memory/context
+            response = agent.generate_response(request.query)
+            save_agent_for_session(request.session_id, agent)
+        finally:
+            release_agent_for_session(request.session_id)
+        timings = current_timings() if request.include_timings else None
+        return AgentQueryResponse(
+            success=response.get("success", False),
+            response=response.get("response"),
+            timings=timings.summary() if timings is not None else None
+        )
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger = get_application_logger()
         logger.error(f"Agent query failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _format_sse(event: dict) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+
+@router.post("/query/stream")
+async def stream_query_agent(request: AgentQueryRequestWithSession):
+    """Stream ReAct steps and final answer tokens as Server-Sent Events."""
+    # Once streaming starts the status code is fixed, so reject overload up front
+    get_admission_controller().check_capacity()
+    agent = await run_in_threadpool(get_agent_for_session, request.session_id)
+
+    async def events():
+        # The lease is held until the stream ends or the client disconnects
+        try:
+            async for event in agent.astream_events(request.query):
+                yield _format_sse(event)
+            await run_in_threadpool(save_agent_for_session, request.session_id, agent)
+        finally:
+            release_agent_for_session(request.session_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/results/{handle}")
+def get_result_page(handle: str, offset: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=10000)):
+    """Page through the full rows of a query result that was returned as a sample."""
+    try:
+        return get_result_store().page(handle, offset, limit)
+    except ResultNotFound:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+
+@router.post("/cache/invalidate")
+def invalidate_cache(database: Optional[str] = None):
+    """Drop cached answers, e.g. after the data in a database was reloaded."""
+    get_semantic_cache().invalidate(database)
+    get_sql_result_cache().clear()
+    return {"success": True}
+
 class AgentFeedbackRequestWithSession(AgentFeedbackRequest):
     session_id: str
 
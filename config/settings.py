@@ -1,4 +1,90 @@
+import json
+import os
+
+
 def get_settings():
     return {
-        "AWS_REGION": "eu-west-1"
-    }
\ No newline at end of file
+        "AWS_REGION": "eu-west-1",
+        "AWS_MAX_POOL_CONNECTIONS": int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50")),
+        # Set EMBEDDING_CACHE_PATH to an empty value to keep embeddings in memory only
+        "EMBEDDING_CACHE_PATH": os.getenv("EMBEDDING_CACHE_PATH", "./storage/embeddings.sqlite"),
+        "EMBEDDING_CACHE_SIZE": int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+        "ATHENA_MAX_ROWS": int(os.getenv("ATHENA_MAX_ROWS", "10000")),
+        "ATHENA_MAX_BYTES": int(os.getenv("ATHENA_MAX_BYTES", str(10 * 1024 * 1024))),
+        "ATHENA_RESULT_REUSE_MINUTES": int(os.getenv("ATHENA_RESULT_REUSE_MINUTES", "0")),
+        # Queries still running after this many seconds are stopped, 0 to wait indefinitely
+        "ATHENA_QUERY_TIMEOUT_SECONDS": float(os.getenv("ATHENA_QUERY_TIMEOUT_SECONDS", "300")),
+        "SQL_CACHE_MAX_ENTRIES": int(os.getenv("SQL_CACHE_MAX_ENTRIES", "256")),
+        "SQL_CACHE_TTL_SECONDS": float(os.getenv("SQL_CACHE_TTL_SECONDS", "300")),
+        "SQL_GUARD_DEFAULT_LIMIT": int(os.getenv("SQL_GUARD_DEFAULT_LIMIT", "100")),
+        "SQL_CACHE_PATH": os.getenv("SQL_CACHE_PATH"),
+        # Results with more rows are stored server-side; the agent only sees this many
+        "RESULT_SAMPLE_ROWS": int(os.getenv("RESULT_SAMPLE_ROWS", "20")),
+        "RESULT_STORE_DIR": os.getenv("RESULT_STORE_DIR", "./storage/results"),
+        "RESULT_TTL_SECONDS": float(os.getenv("RESULT_TTL_SECONDS", "3600")),
+        "LLM_MAX_IN_FLIGHT": int(os.getenv("LLM_MAX_IN_FLIGHT", "16")),
+        "LLM_MAX_QUEUE": int(os.getenv("LLM_MAX_QUEUE", "64")),
+        "LLM_QUEUE_TIMEOUT_SECONDS": float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30")),
+        # JSON object of per-model limits, e.g. {"model-id": {"rpm": 50, "tpm": 200000}}
+        "BEDROCK_MODEL_LIMITS": json.loads(os.getenv("BEDROCK_MODEL_LIMITS", "{}")),
+        "BEDROCK_DEFAULT_RPM": float(os.getenv("BEDROCK_DEFAULT_RPM", "0")),
+        "BEDROCK_DEFAULT_TPM": float(os.getenv("BEDROCK_DEFAULT_TPM", "0")),
+        # Hedged requests, per-call deadlines and circuit breaking for non-streaming LLM calls
+        "LLM_HEDGING_ENABLED": os.getenv("LLM_HEDGING_ENABLED", "true").lower() == "true",
+        "LLM_HEDGE_QUANTILE": float(os.getenv("LLM_HEDGE_QUANTILE", "0.95")),
+        "LLM_HEDGE_MIN_DELAY_SECONDS": float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", "2")),
+        # At most this share of calls is duplicated
+        "LLM_HEDGE_MAX_RATIO": float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1")),
+        # Secondary target for hedges and failover; unset means the same model and region
+        "LLM_HEDGE_MODEL": os.getenv("LLM_HEDGE_MODEL"),
+        "LLM_HEDGE_REGION": os.getenv("LLM_HEDGE_REGION"),
+        "LLM_CALL_DEADLINE_SECONDS": float(os.getenv("LLM_CALL_DEADLINE_SECONDS", "90")),
+        "LLM_BREAKER_ERROR_RATE": float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5")),
+        "LLM_BREAKER_MIN_CALLS": int(os.getenv("LLM_BREAKER_MIN_CALLS", "10")),
+        "LLM_BREAKER_OPEN_SECONDS": float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30")),
+        # Bedrock prompt caching of the static prompt prefix; models are matched by substring of the model ID
+        "PROMPT_CACHING_ENABLED": os.getenv("PROMPT_CACHING_ENABLED", "true").lower() == "true",
+        "PROMPT_CACHE_MODELS": [m.strip() for m in os.getenv(
+            "PROMPT_CACHE_MODELS",
+            "anthropic.claude-3-5-haiku,anthropic.claude-3-7-sonnet,anthropic.claude-sonnet-4,"
+            "anthropic.claude-opus-4,amazon.nova"
+        ).split(",")],
+        "SEMANTIC_CACHE_THRESHOLD": float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+        "SEMANTIC_CACHE_TTL_SECONDS": float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+        "SEMANTIC_CACHE_REFRESH_DATA": os.getenv("SEMANTIC_CACHE_REFRESH_DATA", "false").lower() == "true",
+        # "buffer" keeps the plain token-limited buffer, "summary" enables rolling summarization
+        "MEMORY_PRIMARY_MODE": os.getenv("MEMORY_PRIMARY_MODE", "buffer"),
+        "MEMORY_SUMMARY_MODEL": os.getenv("MEMORY_SUMMARY_MODEL", "anthropic.claude-3-haiku-20240307-v1:0"),
+        "MEMORY_KEEP_LAST_TURNS": int(os.getenv("MEMORY_KEEP_LAST_TURNS", "4")),
+        "MEMORY_TOKEN_BUDGET": int(os.getenv("MEMORY_TOKEN_BUDGET", "3000")),
+        "MEMORY_VECTOR_CAPACITY": int(os.getenv("MEMORY_VECTOR_CAPACITY", "256")),
+        # float32, float16 or int8
+        "MEMORY_VECTOR_DTYPE": os.getenv("MEMORY_VECTOR_DTYPE", "float32"),
+        "SESSION_MAX_AGENTS": int(os.getenv("SESSION_MAX_AGENTS", "200")),
+        "SESSION_IDLE_TTL_SECONDS": float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600")),
+        # sqlite, redis, memory or none
+        "SESSION_STORE": os.getenv("SESSION_STORE", "sqlite"),
+        "SESSION_STORE_URL": os.getenv("SESSION_STORE_URL"),
+        "SESSION_STORE_FLUSH_SECONDS": float(os.getenv("SESSION_STORE_FLUSH_SECONDS", "1")),
+        "INTENT_ROUTER_ENABLED": os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true",
+        # Small model for ambiguous intents and direct conversational answers
+        "INTENT_MODEL": os.getenv("INTENT_MODEL", "anthropic.claude-3-haiku-20240307-v1:0"),
+        "INTENT_MIN_SIMILARITY": float(os.getenv("INTENT_MIN_SIMILARITY", "0.45")),
+        "INTENT_MIN_MARGIN": float(os.getenv("INTENT_MIN_MARGIN", "0.05")),
+        "FAST_PATH_ENABLED": os.getenv("FAST_PATH_ENABLED", "true").lower() == "true",
+        "FAST_PATH_MODEL": os.getenv("FAST_PATH_MODEL", "anthropic.claude-3-sonnet-20240229-v1:0"),
+        # template or llm (one call to INTENT_MODEL)
+        "FAST_PATH_EXPLAIN": os.getenv("FAST_PATH_EXPLAIN", "template"),
+        # react parses Thought/Action text; tool_calling uses Converse tool use with parallel tool calls
+        "AGENT_MODE": os.getenv("AGENT_MODE", "react"),
+        "AGENT_TOOL_WORKERS": int(os.getenv("AGENT_TOOL_WORKERS", "8")),
+        # Token budget of one tool observation in the ReAct prompt
+        "OBSERVATION_TOKEN_BUDGET": int(os.getenv("OBSERVATION_TOKEN_BUDGET", "1500")),
+        "SCHEMA_CATALOG_REFRESH_SECONDS": float(os.getenv("SCHEMA_CATALOG_REFRESH_SECONDS", "3600")),
+        "SCHEMA_CATALOG_SAMPLE_ROWS": int(os.getenv("SCHEMA_CATALOG_SAMPLE_ROWS", "3")),
+        "SCHEMA_CATALOG_TOP_K": int(os.getenv("SCHEMA_CATALOG_TOP_K", "5")),
+        # json, otlp or none; the target is the JSON file or the OTLP/HTTP traces endpoint
+        "TRACING_EXPORTER": os.getenv("TRACING_EXPORTER", "none"),
+        "TRACING_TARGET": os.getenv("TRACING_TARGET"),
+        "TRACING_SAMPLE_RATIO": float(os.getenv("TRACING_SAMPLE_RATIO", "1.0")),
+    }
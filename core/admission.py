@@ -0,0 +1,302 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+
+T = TypeVar("T")
+
+THROTTLING_ERROR_CODES = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a call cannot be admitted; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """True for botocore errors that signal throttling or temporary overload."""
+    response = getattr(error, "response", None)
+    if not isinstance(response, dict):
+        return False
+    return response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for tokens-per-minute budgeting."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``per_minute / 60`` per second."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` tokens are available, 0 if they are now."""
+        self._refill(now)
+        # Requests larger than the bucket are admitted once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def charge(self, amount: float, now: float) -> None:
+        """Debit tokens used after the fact; the bucket may go negative and delays later calls."""
+        self._refill(now)
+        self.tokens -= amount
+
+
+class AdmissionController:
+    """
+    Central admission control for Bedrock LLM and embedding calls.
+
+    A call is admitted when the number of in-flight calls is below
+    ``max_in_flight`` and the per-model request and token buckets have room.
+    The token bucket is charged the estimated input tokens on admission and
+    the reported output tokens through ``charge`` once the call returns.
+    Callers wait in a bounded queue; when the queue is full, or the wait
+    exceeds ``queue_timeout``, ``AdmissionRejected`` is raised with a
+    Retry-After hint so the API layer can answer 429.
+
+    ``call``/``acall`` are the only retry layer for Bedrock: the clients make
+    one attempt each (see ``AWSClientRegistry``) and throttled calls are
+    retried here after releasing the slot, at most ``max_retries`` times.
+    """
+
+    def __init__(self,
+                 max_in_flight: int = 16,
+                 max_queue: int = 64,
+                 queue_timeout: float = 30.0,
+                 model_limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 default_rpm: float = 0,
+                 default_tpm: float = 0,
+                 max_retries: int = 2,
+                 base_backoff: float = 0.5):
+        """
+        Args:
+            max_in_flight: Maximum concurrent calls across all models
+            max_queue: Maximum number of callers waiting for admission
+            queue_timeout: Maximum seconds a caller waits before being rejected
+            model_limits: Per-model ``{"rpm": ..., "tpm": ...}`` limits
+            default_rpm: Requests per minute for models without limits, 0 for none
+            default_tpm: Tokens per minute for models without limits, 0 for none
+            max_retries: Retries of a throttled call
+            base_backoff: Base delay in seconds for jittered exponential backoff
+        """
+        self.logger = get_application_logger()
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.model_limits = model_limits or {}
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self._buckets: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self._cond = threading.Condition()
+
+    def _model_buckets(self, model: str) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        if model not in self._buckets:
+            limits = self.model_limits.get(model, {})
+            rpm = limits.get("rpm", self.default_rpm)
+            tpm = limits.get("tpm", self.default_tpm)
+            self._buckets[model] = (TokenBucket(rpm) if rpm else None, TokenBucket(tpm) if tpm else None)
+        return self._buckets[model]
+
+    def _try_admit(self, model: str, tokens: int) -> float:
+        """Admit the call if possible; otherwise return a wait hint. Caller holds the lock."""
+        if self.in_flight >= self.max_in_flight:
+            return 0.05
+        now = time.monotonic()
+        requests, token_bucket = self._model_buckets(model)
+        wait = max(
+            requests.wait_time(1, now) if requests else 0.0,
+            token_bucket.wait_time(tokens, now) if token_bucket else 0.0,
+        )
+        if wait > 0:
+            return wait
+        if requests:
+            requests.take(1)
+        if token_bucket:
+            token_bucket.take(tokens)
+        self.in_flight += 1
+        self.admitted += 1
+        return 0.0
+
+    def charge(self, model: str, tokens: int) -> None:
+        """
+        Debit tokens only known after a call, i.e. the output tokens reported
+        in the response usage, from the model's tokens-per-minute budget.
+        """
+        if tokens <= 0:
+            return
+        with self._cond:
+            _, token_bucket = self._model_buckets(model)
+            if token_bucket:
+                token_bucket.charge(tokens, time.monotonic())
+
+    def _enqueue(self) -> None:
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected("Too many pending model calls", self.retry_after())
+        self.waiting += 1
+
+    def retry_after(self) -> float:
+        """Estimate of when capacity frees up, used for the Retry-After header."""
+        return max(1.0, round(self.waiting / max(1, self.max_in_flight), 1))
+
+    def check_capacity(self) -> None:
+        """Raise AdmissionRejected right away if the wait queue is full."""
+        with self._cond:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected("Too many pending model calls", self.retry_after())
+
+    def _release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _timeout(self) -> AdmissionRejected:
+        self.rejected += 1
+        return AdmissionRejected("Timed out waiting for model capacity", self.retry_after())
+
+    @contextmanager
+    def admit(self, model: str, tokens: int = 1):
+        """Block until the call is admitted, then hold a slot for its duration."""
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            self._enqueue()
+            try:
+                while True:
+                    wait = self._try_admit(model, tokens)
+                    if wait == 0:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._timeout()
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self.waiting -= 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def aadmit(self, model: str, tokens: int = 1):
+        """Async variant of ``admit`` that waits without blocking the event loop."""
+        deadline = time.monotonic() + self.queue_timeout
+        with self._cond:
+            self._enqueue()
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(model, tokens)
+                if wait == 0:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._cond:
+                        raise self._timeout()
+                await asyncio.sleep(min(wait, remaining))
+        finally:
+            with self._cond:
+                self.waiting -= 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retrying callers from synchronizing
+        return random.uniform(0, self.base_backoff * (2 ** attempt))
+
+    def call(self, fn: Callable[[], T], model: str, tokens: int = 1) -> T:
+        """Run ``fn`` under admission control, retrying throttled calls with jitter."""
+        for attempt in range(self.max_retries + 1):
+            with self.admit(model, tokens):
+                try:
+                    return fn()
+                except Exception as e:
+                    if not is_throttling_error(e) or attempt == self.max_retries:
+                        raise
+                    self.throttled += 1
+            delay = self._backoff(attempt)
+            self.logger.warning(f"Bedrock throttled {model}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+    async def acall(self, fn: Callable[[], Awaitable[T]], model: str, tokens: int = 1) -> T:
+        """Async variant of ``call``."""
+        for attempt in range(self.max_retries + 1):
+            async with self.aadmit(model, tokens):
+                try:
+                    return await fn()
+                except Exception as e:
+                    if not is_throttling_error(e) or attempt == self.max_retries:
+                        raise
+                    self.throttled += 1
+            delay = self._backoff(attempt)
+            self.logger.warning(f"Bedrock throttled {model}, retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+            }
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide admission controller."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            settings = get_settings()
+            _controller = AdmissionController(
+                max_in_flight=settings["LLM_MAX_IN_FLIGHT"],
+                max_queue=settings["LLM_MAX_QUEUE"],
+                queue_timeout=settings["LLM_QUEUE_TIMEOUT_SECONDS"],
+                model_limits=settings["BEDROCK_MODEL_LIMITS"],
+                default_rpm=settings["BEDROCK_DEFAULT_RPM"],
+                default_tpm=settings["BEDROCK_DEFAULT_TPM"],
+            )
+        return _controller
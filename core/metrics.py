@@ -0,0 +1,246 @@
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts followed by sum and count
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        for key, entry in items:
+            for bound, count in zip(self.buckets, entry):
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {count}"
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {entry[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {entry[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {entry[-1]}"
+
+
+class MetricsRegistry:
+    """Named counters and histograms rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _registry
+
+
+PHASE_SECONDS = _registry.histogram(
+    "agent_phase_duration_seconds", "Time spent per request phase", ("phase", "name")
+)
+LLM_TOKENS = _registry.counter(
+    "llm_tokens_total", "Bedrock tokens by model and direction (input, output, cache_read, cache_write)",
+    ("model", "direction")
+)
+ATHENA_SCANNED_BYTES = _registry.counter(
+    "athena_data_scanned_bytes_total", "Bytes scanned by Athena queries"
+)
+
+
+class RequestTimings:
+    """Per-request breakdown of time and tokens, shared by every thread working on the request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Dict[str, float]] = {}
+        # Bedrock's input count excludes tokens read from or written to the prompt cache
+        self._tokens = {"input": 0, "output": 0, "cache_read": 0, "cache_write": 0}
+
+    def add(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._phases.setdefault(phase, {"count": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+
+    def add_tokens(self, input_tokens: int, output_tokens: int,
+                   cache_read_tokens: int = 0, cache_write_tokens: int = 0) -> None:
+        with self._lock:
+            self._tokens["input"] += input_tokens
+            self._tokens["output"] += output_tokens
+            self._tokens["cache_read"] += cache_read_tokens
+            self._tokens["cache_write"] += cache_write_tokens
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_seconds": round(time.perf_counter() - self.started, 4),
+                "phases": {
+                    phase: {"count": int(entry["count"]), "seconds": round(entry["seconds"], 4)}
+                    for phase, entry in sorted(self._phases.items())
+                },
+                "tokens": dict(self._tokens),
+            }
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> RequestTimings:
+    """Begin collecting timings for the request running in the current context."""
+    timings = RequestTimings()
+    _current_timings.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current_timings.get()
+
+
+def record_phase(phase: str, seconds: float, name: str = "") -> None:
+    """Record a phase duration in the histogram and the current request breakdown."""
+    PHASE_SECONDS.observe(seconds, phase=phase, name=name)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(f"{phase}:{name}" if name else phase, seconds)
+
+
+@contextmanager
+def timed(phase: str, name: str = "") -> Iterator[None]:
+    """Time the enclosed block as ``phase`` (optionally qualified by ``name``)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - started, name)
+
+
+def instrumented(phase: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator that times every call of a function as ``phase`` named after the function."""
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timed(phase, fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_tokens(model: str, input_tokens: int, output_tokens: int,
+                      cache_read_tokens: int = 0, cache_write_tokens: int = 0) -> None:
+    LLM_TOKENS.inc(input_tokens, model=model, direction="input")
+    LLM_TOKENS.inc(output_tokens, model=model, direction="output")
+    if cache_read_tokens or cache_write_tokens:
+        LLM_TOKENS.inc(cache_read_tokens, model=model, direction="cache_read")
+        LLM_TOKENS.inc(cache_write_tokens, model=model, direction="cache_write")
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add_tokens(input_tokens, output_tokens, cache_read_tokens, cache_write_tokens)
+
+
+def record_athena_statistics(statistics: Dict[str, Any]) -> None:
+    """Split an Athena query's time into queueing and execution from its Statistics block."""
+    if "QueryQueueTimeInMillis" in statistics:
+        record_phase("athena_queue", statistics["QueryQueueTimeInMillis"] / 1000)
+    if "EngineExecutionTimeInMillis" in statistics:
+        record_phase("athena_execution", statistics["EngineExecutionTimeInMillis"] / 1000)
+    if "DataScannedInBytes" in statistics:
+        ATHENA_SCANNED_BYTES.inc(statistics["DataScannedInBytes"])
@@ -0,0 +1,383 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, TypeVar
+
+from config.settings import get_settings
+from core.admission import AdmissionRejected, is_throttling_error
+from core.logger import get_application_logger
+from core.metrics import get_metrics_registry
+
+T = TypeVar("T")
+
+_metrics = get_metrics_registry()
+HEDGES = _metrics.counter("llm_hedges_total", "Hedged duplicate LLM requests sent", ("key",))
+HEDGE_WINS = _metrics.counter("llm_hedge_wins_total", "Calls answered first by the hedged request", ("key",))
+DEADLINES = _metrics.counter("llm_deadline_exceeded_total", "LLM calls that missed their deadline", ("key",))
+FAILOVERS = _metrics.counter("llm_failovers_total", "Calls sent to the secondary while the breaker was open", ("key",))
+BREAKER_OPENED = _metrics.counter("llm_circuit_opened_total", "Times a circuit breaker opened", ("key",))
+ORPHANED = _metrics.counter(
+    "llm_orphaned_calls_total", "Sync calls left running in the pool after a deadline or a lost race", ("key",)
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """No response arrived before the per-call deadline."""
+
+
+def is_service_failure(error: BaseException) -> bool:
+    """
+    Errors that say the service is unhealthy, as opposed to a bad request.
+
+    Throttling is not a failure: it is normal rate limiting, which the
+    admission controller backs off from, and a breaker opened by it would
+    turn every request into a 429 until the cooldown ends.
+    """
+    if isinstance(error, (DeadlineExceeded, asyncio.TimeoutError, ConnectionError)):
+        return True
+    if is_throttling_error(error):
+        return False
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0) >= 500
+    # Connection and read timeouts raised by botocore carry no response
+    return type(error).__module__.startswith(("botocore", "urllib3"))
+
+
+class LatencyTracker:
+    """Rolling window of successful call durations for one target."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float, min_samples: int = 20) -> Optional[float]:
+        """The ``q`` quantile, or None while there are fewer than ``min_samples`` samples."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    Error-rate circuit breaker.
+
+    The breaker opens when at least ``min_calls`` of the last ``window`` calls
+    were recorded and the share of failures reaches ``error_rate``. After
+    ``open_seconds`` one trial call is let through (half-open); its outcome
+    closes or re-opens the breaker.
+    """
+
+    def __init__(self, error_rate: float = 0.5, min_calls: int = 10, window: int = 50,
+                 open_seconds: float = 30.0):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return "open"
+            return "half_open"
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(1.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def acquire(self) -> Optional[bool]:
+        """None if no call may go to the protected target now, else whether this call is the half-open trial."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if time.monotonic() - self._opened_at < self.open_seconds or self._trial_running:
+                return None
+            self._trial_running = True
+            return True
+
+    def allow(self) -> bool:
+        """True if a call may go to the protected target now."""
+        return self.acquire() is not None
+
+    def abandon_trial(self) -> None:
+        """The trial call was cancelled before it finished; the next call becomes the trial."""
+        with self._lock:
+            self._trial_running = False
+
+    def record(self, success: bool) -> bool:
+        """Record an outcome; returns True when this outcome opened the breaker."""
+        with self._lock:
+            if self._opened_at is not None:
+                if not self._trial_running:
+                    return False
+                self._trial_running = False
+                if success:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = time.monotonic()
+                return False
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+
+class HedgedCaller:
+    """
+    Runs calls with a deadline, a hedged duplicate and a circuit breaker.
+
+    If the primary request has not answered after the target's observed
+    ``hedge_quantile`` latency, a duplicate goes to the secondary (another
+    region or model, or the same target again) and the first answer wins.
+    Hedges are capped at ``max_hedge_ratio`` of all calls so a slow backend
+    is not hit with twice the traffic. While a target's breaker is open,
+    calls go straight to the secondary, or are rejected with a Retry-After
+    hint when there is none.
+    """
+
+    def __init__(self, hedge_quantile: float = 0.95, min_hedge_delay: float = 1.0,
+                 max_hedge_ratio: float = 0.1, deadline: float = 90.0,
+                 breaker_error_rate: float = 0.5, breaker_min_calls: int = 10,
+                 breaker_open_seconds: float = 30.0, max_workers: int = 32):
+        """
+        Args:
+            hedge_quantile: Latency quantile after which a hedge is sent
+            min_hedge_delay: Lower bound of the hedge delay in seconds, also used until enough samples exist
+            max_hedge_ratio: Maximum share of calls that may be hedged
+            deadline: Seconds after which a call fails with DeadlineExceeded
+            breaker_error_rate: Failure share that opens a breaker
+            breaker_min_calls: Calls needed before a breaker can open
+            breaker_open_seconds: Seconds a breaker stays open before a trial call
+            max_workers: Threads running synchronous calls
+        """
+        self.logger = get_application_logger()
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.deadline = deadline
+        self.breaker_settings = dict(error_rate=breaker_error_rate, min_calls=breaker_min_calls,
+                                     open_seconds=breaker_open_seconds)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        # Sync calls still running after their caller gave up; hedging pauses while they hold half the pool
+        self.orphaned = 0
+        self.max_orphaned = max(1, max_workers // 2)
+        self._lock = threading.Lock()
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+
+    def _tracker(self, key: str) -> LatencyTracker:
+        with self._lock:
+            return self._latency.setdefault(key, LatencyTracker())
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(**self.breaker_settings)
+            return self._breakers[key]
+
+    def hedge_delay(self, key: str) -> float:
+        observed = self._tracker(key).quantile(self.hedge_quantile)
+        return max(self.min_hedge_delay, observed or 0.0)
+
+    def _count_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def _count_hedge_win(self, key: str) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+        HEDGE_WINS.inc(key=key)
+
+    def _may_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.max_hedge_ratio * self.calls or self.orphaned >= self.max_orphaned:
+                return False
+            self.hedges += 1
+            return True
+
+    def _record(self, key: str, started: float, error: Optional[BaseException]) -> None:
+        if error is None:
+            self._tracker(key).record(time.monotonic() - started)
+        if self.breaker(key).record(error is None or not is_service_failure(error)):
+            BREAKER_OPENED.inc(key=key)
+            self.logger.warning(f"Circuit breaker for {key} opened")
+
+    def _route(self, key: str, has_secondary: bool) -> Optional[bool]:
+        """
+        None to fail over, else whether the primary call is the breaker's half-open trial.
+        Raises when neither target may be called.
+        """
+        trial = self.breaker(key).acquire()
+        if trial is not None:
+            return trial
+        if has_secondary:
+            FAILOVERS.inc(key=key)
+            return None
+        raise AdmissionRejected(f"{key} is failing, circuit breaker open", self.breaker(key).retry_after())
+
+    def _orphan(self, key: str, futures: Set[Future]) -> None:
+        """Account for calls that keep running after the caller moved on; Future.cancel cannot stop them."""
+        running = [f for f in futures if not f.cancel()]
+        if not running:
+            return
+        with self._lock:
+            self.orphaned += len(running)
+        ORPHANED.inc(len(running), key=key)
+        for future in running:
+            future.add_done_callback(self._orphan_done)
+
+    def _orphan_done(self, future: Future) -> None:
+        with self._lock:
+            self.orphaned -= 1
+
+    def _submit(self, fn: Callable[[], T]) -> Future:
+        # Run in a copy of the caller's context so timings and spans nest correctly
+        context = contextvars.copy_context()
+        return self._pool.submit(context.run, fn)
+
+    def call(self, key: str, primary: Callable[[], T], secondary: Optional[Callable[[], T]] = None) -> T:
+        """Run ``primary`` with hedging, falling back to ``secondary`` (or ``primary`` again) as the hedge."""
+        if self._route(key, secondary is not None) is None:
+            return secondary()
+        self._count_call()
+        hedge = secondary or primary
+        started = time.monotonic()
+        deadline = started + self.deadline
+
+        primary_future = self._submit(primary)
+        primary_future.add_done_callback(lambda f: self._record(key, started, f.exception()))
+        pending = {primary_future}
+        done, _ = wait(pending, timeout=min(self.hedge_delay(key), self.deadline))
+        if not done and self._may_hedge():
+            HEDGES.inc(key=key)
+            pending.add(self._submit(hedge))
+
+        last_error: Optional[BaseException] = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary_future:
+                        self._count_hedge_win(key)
+                    # The primary's outcome is still recorded by its callback when it finishes
+                    self._orphan(key, pending)
+                    return future.result()
+                last_error = future.exception()
+        if last_error is not None and not pending:
+            raise last_error
+        DEADLINES.inc(key=key)
+        self._orphan(key, pending)
+        self.logger.warning(f"No response from {key} within {self.deadline:.0f}s; "
+                            f"{self.orphaned} calls still running in the pool")
+        raise DeadlineExceeded(f"No response from {key} within {self.deadline:.0f}s")
+
+    async def acall(self, key: str, primary: Callable[[], Awaitable[T]],
+                    secondary: Optional[Callable[[], Awaitable[T]]] = None) -> T:
+        """Async variant of ``call``; the losing request is cancelled."""
+        trial = self._route(key, secondary is not None)
+        if trial is None:
+            return await secondary()
+        self._count_call()
+        hedge = secondary or primary
+        started = time.monotonic()
+        deadline = started + self.deadline
+
+        primary_task = asyncio.ensure_future(primary())
+        primary_recorded = False
+        timed_out = False
+        pending = {primary_task}
+        last_error: Optional[BaseException] = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=min(self.hedge_delay(key), self.deadline))
+            if not done and self._may_hedge():
+                HEDGES.inc(key=key)
+                pending.add(asyncio.ensure_future(hedge()))
+
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if task is primary_task:
+                        self._record(key, started, error)
+                        primary_recorded = True
+                    if error is None:
+                        if task is not primary_task:
+                            self._count_hedge_win(key)
+                        return task.result()
+                    last_error = error
+        finally:
+            for task in pending:
+                task.cancel()
+            if not primary_recorded:
+                if timed_out:
+                    self._record(key, started, DeadlineExceeded())
+                elif trial:
+                    # Lost to the hedge or the caller was cancelled: no verdict, so free the trial slot
+                    self.breaker(key).abandon_trial()
+        if last_error is not None and not pending:
+            raise last_error
+        DEADLINES.inc(key=key)
+        raise DeadlineExceeded(f"No response from {key} within {self.deadline:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = {key: breaker.state for key, breaker in self._breakers.items()}
+            return {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "orphaned_running": self.orphaned,
+                "breakers": breakers,
+            }
+
+
+_caller: Optional[HedgedCaller] = None
+_caller_lock = threading.Lock()
+
+
+def get_hedged_caller() -> HedgedCaller:
+    """Return the process-wide hedged caller for LLM requests."""
+    global _caller
+    with _caller_lock:
+        if _caller is None:
+            settings = get_settings()
+            _caller = HedgedCaller(
+                hedge_quantile=settings["LLM_HEDGE_QUANTILE"],
+                min_hedge_delay=settings["LLM_HEDGE_MIN_DELAY_SECONDS"],
+                max_hedge_ratio=settings["LLM_HEDGE_MAX_RATIO"],
+                deadline=settings["LLM_CALL_DEADLINE_SECONDS"],
+                breaker_error_rate=settings["LLM_BREAKER_ERROR_RATE"],
+                breaker_min_calls=settings["LLM_BREAKER_MIN_CALLS"],
+                breaker_open_seconds=settings["LLM_BREAKER_OPEN_SECONDS"],
+            )
+        return _caller
@@ -0,0 +1,300 @@
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+
+SERVICE_NAME = "llamaindex-bot"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _attribute_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed operation in a trace, exported in the OTLP JSON span layout."""
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 sampled: bool, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = STATUS_OK
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = str(error)
+        self.attributes["exception.type"] = type(error).__name__
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled:
+            self.tracer.export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _attribute_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class SpanExporter:
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+
+class JsonFileExporter(SpanExporter):
+    """Appends one OTLP JSON span per line to a local file."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_otlp()) + "\n")
+
+
+class OTLPHttpExporter(SpanExporter):
+    """Posts spans to an OTLP/HTTP JSON endpoint such as a local OpenTelemetry collector."""
+
+    def __init__(self, endpoint: str = "http://localhost:4318/v1/traces", timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": [s.to_otlp() for s in spans]}],
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """
+    Creates spans and hands finished ones to an exporter in batches.
+
+    The active span is kept in a context variable, so spans opened in a
+    request, in the agent and in tools called from worker threads nest under
+    each other without being passed around. Export happens on a background
+    thread; a slow or unreachable collector never delays requests.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_ratio: float = 1.0,
+                 batch_size: int = 128, flush_interval: float = 2.0, max_queue: int = 10000):
+        """
+        Args:
+            exporter: Destination of finished spans, None to only propagate context
+            sample_ratio: Fraction of new traces that are exported
+            batch_size: Number of spans exported per batch
+            flush_interval: Maximum seconds a finished span waits for export
+            max_queue: Spans dropped beyond this many pending ones
+        """
+        self.logger = get_application_logger()
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._worker: Optional[threading.Thread] = None
+        if exporter is not None:
+            self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._worker.start()
+
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                   kind: int = SPAN_KIND_INTERNAL, parent: Optional[Span] = None,
+                   traceparent: Optional[str] = None) -> Span:
+        """Create a span under ``parent`` (default: the active span) without activating it."""
+        parent = parent or self.current_span()
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+        remote = _parse_traceparent(traceparent)
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+            return Span(self, name, trace_id, parent_id, sampled and self.exporter is not None, kind, attributes)
+        sampled = self.exporter is not None and random.random() < self.sample_ratio
+        return Span(self, name, os.urandom(16).hex(), None, sampled, kind, attributes)
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, traceparent: Optional[str] = None,
+             **attributes: Any) -> Iterator[Span]:
+        """Open a span, make it the active one for the enclosed block and end it afterwards."""
+        span = self.start_span(name, attributes, kind, traceparent=traceparent)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end()
+            try:
+                self._current.reset(token)
+            except ValueError:
+                # Async generators can be resumed from another context
+                self._current.set(None)
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.exporter.export(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                self.logger.warning(f"Could not export {len(batch)} spans: {str(e)}")
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Export spans still queued, e.g. at shutdown."""
+        if self.exporter is None:
+            return
+        batch: List[Span] = []
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            try:
+                self.exporter.export(batch)
+            except Exception as e:
+                self.logger.warning(f"Could not export {len(batch)} spans: {str(e)}")
+
+
+def _parse_traceparent(header: Optional[str]) -> Optional[tuple]:
+    """Parse a W3C ``traceparent`` header into (trace_id, parent_id, sampled)."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def create_exporter(kind: str, target: Optional[str] = None) -> Optional[SpanExporter]:
+    """
+    Build the span exporter selected by configuration.
+
+    Args:
+        kind: "json", "otlp" or "none"
+        target: JSON file path or OTLP/HTTP traces endpoint
+    """
+    if kind == "json":
+        return JsonFileExporter(target or "./storage/traces.jsonl")
+    if kind == "otlp":
+        return OTLPHttpExporter(target or "http://localhost:4318/v1/traces")
+    return None
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            settings = get_settings()
+            _tracer = Tracer(
+                create_exporter(settings["TRACING_EXPORTER"], settings["TRACING_TARGET"]),
+                sample_ratio=settings["TRACING_SAMPLE_RATIO"]
+            )
+        return _tracer
+
+
+def span(name: str, **attributes: Any):
+    """Open a span on the process-wide tracer; see ``Tracer.span``."""
+    return get_tracer().span(name, **attributes)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of ``span``; the tracer is looked up on each call."""
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with get_tracer().span(f"{name} {fn.__name__}"):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
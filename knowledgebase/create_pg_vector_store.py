@@ -1,5 +1,5 @@
 import os
-from llama_index.embeddings.bedrock import BedrockEmbedding
+from services.aws.clients import get_embed_model
 from llama_index.core import Settings
 from llama_index.vector_stores.postgres import PGVectorStore
 from sqlalchemy import make_url
@@ -38,13 +38,7 @@ class MarkdownS3ToPGVectorIndexer:
 
     def _initialize_bedrock_embedding(self):
         print("Initializing Bedrock embedding model...")
-        embed_model = BedrockEmbedding(
-            model_name=self.bedrock_model,
-            region_name=self.aws_region,
-            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY")
-        )
-        Settings.embed_model = embed_model
+        Settings.embed_model = get_embed_model(self.bedrock_model, self.aws_region)
 
     def _create_vector_store(self):
         print("Creating PGVectorStore instance...")
@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from pydantic import PrivateAttr
+
+
+class EmbeddingStore:
+    """SQLite table of float32 vectors keyed by content hash."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)",
+                [(key, len(vector), vector.astype(np.float32).tobytes()) for key, vector in items.items()]
+            )
+            self._db.commit()
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Content-addressed cache in front of another embedding model.
+
+    Vectors are keyed by a hash of the model name, embedding kind and text,
+    held in an in-process LRU and persisted to SQLite. Batch calls look every
+    text up first and send only the misses to the wrapped model, so
+    re-ingesting unchanged documents or rebuilding memory after a restart
+    costs no embedding calls.
+    """
+
+    _inner: BaseEmbedding = PrivateAttr()
+    _store: Optional[EmbeddingStore] = PrivateAttr(default=None)
+    _lru: "OrderedDict[str, np.ndarray]" = PrivateAttr()
+    _lru_size: int = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr()
+    _hits: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+
+    def __init__(self, inner: BaseEmbedding, store_path: Optional[str] = None,
+                 lru_size: int = 10000, **kwargs: Any):
+        """
+        Args:
+            inner: Embedding model that computes cache misses
+            store_path: SQLite file for the persistent tier, None for memory only
+            lru_size: Number of vectors kept in process memory
+        """
+        super().__init__(
+            model_name=inner.model_name,
+            embed_batch_size=inner.embed_batch_size,
+            **kwargs
+        )
+        self._inner = inner
+        self._store = EmbeddingStore(store_path) if store_path else None
+        self._lru = OrderedDict()
+        self._lru_size = lru_size
+        self._lock = threading.Lock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def inner(self) -> BaseEmbedding:
+        return self._inner
+
+    def _key(self, text: str, kind: str) -> str:
+        # The model name fixes the vector size; no model here is configured with another dimension
+        raw = f"{self.model_name}\x00{kind}\x00{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vector
+        missing = [key for key in keys if key not in found]
+        if missing and self._store is not None:
+            from_disk = self._store.get_many(missing)
+            self._remember(from_disk)
+            found.update(from_disk)
+        return found
+
+    def _remember(self, items: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._lru[key] = vector
+                self._lru.move_to_end(key)
+            while len(self._lru) > self._lru_size:
+                self._lru.popitem(last=False)
+
+    def _embed_many(self, texts: List[str], kind: str) -> List[Embedding]:
+        keys = [self._key(text, kind) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        # Only unique texts that are not cached go to the wrapped model
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                pending.setdefault(key, text)
+        # Embeddings are requested from the tool pool and prefetch threads at once
+        with self._lock:
+            self._hits += len(keys) - len(pending)
+            self._misses += len(pending)
+
+        if pending:
+            pending_texts = list(pending.values())
+            if kind == "query":
+                vectors = [self._inner.get_query_embedding(t) for t in pending_texts]
+            else:
+                vectors = self._inner.get_text_embedding_batch(pending_texts)
+            computed = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(pending.keys(), vectors)
+            }
+            self._remember(computed)
+            if self._store is not None:
+                self._store.put_many(computed)
+            found.update(computed)
+
+        return [found[key].tolist() for key in keys]
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._embed_many([query], "query")[0]
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return await asyncio.to_thread(self._get_query_embedding, query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._embed_many([text], "text")[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        return self._embed_many(texts, "text")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, lru_entries = self._hits, self._misses, len(self._lru)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "lru_entries": lru_entries,
+        }
@@ -1,16 +1,23 @@
-from llama_index.core.memory import ChatMemoryBuffer, VectorMemory, SimpleComposableMemory
-from llama_index.embeddings.bedrock import BedrockEmbedding
-from typing import List, Dict, Optional
+from llama_index.core.memory import BaseMemory, ChatMemoryBuffer, SimpleComposableMemory
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.llms import ChatMessage
+from llamaIndex.summary_memory import RollingSummaryMemory
+from llamaIndex.vector_memory import TurnVectorMemory
+from services.aws.clients import get_embed_model, get_llm
+from config.settings import get_settings
+from typing import List, Dict, Optional, Tuple
 import logging
 
 class Logger:
     def get_logger(self):
         logger = logging.getLogger(__name__)
         logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        # One AgentMemory is created per session; only attach the handler once
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
         return logger
 
 class AgentMemory:
@@ -21,29 +28,40 @@ class AgentMemory:
         self.logger.info("Initializing agent memory")
         self.embedding_model = 'amazon.titan-embed-text-v2:0'  # Fixed typo in model name
         self.region_name = "us-east-1"
-        self.chat_memory_buffer = ChatMemoryBuffer.from_defaults()
+        self.chat_memory_buffer = self._create_primary_memory()
         # Initialize embeddings and vector memory at creation time
         self._embed_model = None
         self._vector_memory = None
         self._composable_memory = None
 
-    def embeddings(self) -> BedrockEmbedding:
+    def _create_primary_memory(self) -> BaseMemory:
+        """Create the primary chat memory selected by MEMORY_PRIMARY_MODE"""
+        settings = get_settings()
+        if settings["MEMORY_PRIMARY_MODE"] == "summary":
+            return RollingSummaryMemory.from_defaults(
+                llm=get_llm(settings["MEMORY_SUMMARY_MODEL"]),
+                keep_last_turns=settings["MEMORY_KEEP_LAST_TURNS"],
+                token_budget=settings["MEMORY_TOKEN_BUDGET"],
+            )
+        return ChatMemoryBuffer.from_defaults()
+
+    def embeddings(self) -> BaseEmbedding:
         """Initialize and return the embedding model"""
         if self._embed_model is None:
             self.logger.info("Initializing embedding model")
-            self._embed_model = BedrockEmbedding(
-                model_name=self.embedding_model,
-                region_name=self.region_name
-            )
+            self._embed_model = get_embed_model(self.embedding_model, self.region_name)
         return self._embed_model
 
-    def vector_memory(self) -> VectorMemory:
+    def vector_memory(self) -> TurnVectorMemory:
         """Initialize and return the vector memory"""
         if self._vector_memory is None:
             self.logger.info("Initializing vector memory")
-            self._vector_memory = VectorMemory.from_defaults(
+            settings = get_settings()
+            self._vector_memory = TurnVectorMemory.from_defaults(
                 embed_model=self.embeddings(),
-                retriever_kwargs={'similarity_top_k': 5},
+                similarity_top_k=5,
+                capacity=settings["MEMORY_VECTOR_CAPACITY"],
+                dtype=settings["MEMORY_VECTOR_DTYPE"],
             )
         return self._vector_memory
 
@@ -57,6 +75,42 @@ class AgentMemory:
             )
         return self._composable_memory
 
+    def checkpoint(self) -> Tuple[int, int]:
+        """
+        Record the current memory position, typically at the start of a turn
+        Returns:
+            Tuple[int, int]: Primary and secondary memory lengths to pass to rollback
+        """
+        return len(self.chat_memory_buffer.get_all()), self.vector_memory().checkpoint()
+
+    def rollback(self, checkpoint: Tuple[int, int]) -> bool:
+        """
+        Drop everything added to memory after a checkpoint
+        Args:
+            checkpoint: Value returned by checkpoint()
+        Returns:
+            bool: True if messages were removed, False otherwise
+        """
+        primary_length, secondary_length = checkpoint
+        removed = self._pop_primary(len(self.chat_memory_buffer.get_all()) - primary_length)
+        self.vector_memory().rollback(secondary_length)
+        return removed > 0
+
+    def _pop_primary(self, n: int) -> int:
+        if isinstance(self.chat_memory_buffer, RollingSummaryMemory):
+            n = min(max(0, n), len(self.chat_memory_buffer.get_all()))
+            self.chat_memory_buffer.truncate(n)
+            return n
+        # Popping from the tail of the chat store keeps the rest of the history untouched
+        chat_store = self.chat_memory_buffer.chat_store
+        key = self.chat_memory_buffer.chat_store_key
+        removed = 0
+        for _ in range(max(0, n)):
+            if chat_store.delete_last_message(key) is None:
+                break
+            removed += 1
+        return removed
+
     def remove_last_n(self, n: int = 2) -> bool:
         """
         Remove last n messages from composable memory
@@ -66,25 +120,20 @@ class AgentMemory:
             bool: True if messages were removed, False otherwise
         """
         try:
-            memory = self.composable_memory()
-            current_messages = memory.get()
-            
-            if len(current_messages) >= n:
-                self.logger.info(f"Removing last {n} messages from memory")
-                # Create new memory instance
-                new_memory = SimpleComposableMemory(
-                    primary_memory=self.chat_memory_buffer,
-                    secondary_memory_sources=[self.vector_memory()]
-                )
-                
-                # Re-add all messages except the last n
-                for msg in current_messages[:-n]:
-                    new_memory.put(msg)
-                
-                # Update the composable memory reference
-                self._composable_memory = new_memory
-                return True
-            return False
+            messages = self.chat_memory_buffer.get_all()
+            if len(messages) < n:
+                return False
+            self.logger.info(f"Removing last {n} messages from memory")
+            removed = messages[-n:]
+            self._pop_primary(n)
+            # Drop the matching vectors instead of re-embedding the surviving history
+            vector_memory = self.vector_memory()
+            stored = vector_memory.get_all()
+            matching = 0
+            while matching < len(stored) and stored[-1 - matching] in removed:
+                matching += 1
+            vector_memory.truncate(matching)
+            return True
         except Exception as e:
             self.logger.error(f"Error removing messages: {str(e)}")
             return False
@@ -92,6 +141,40 @@ class AgentMemory:
     def clear_memory(self) -> None:
         """Completely clear the agent's memory"""
         self.logger.info("Clearing all memory")
+        # Reset in place: the agent holds a reference to the composable memory
+        self.chat_memory_buffer.reset()
+        # Note: Vector memory persists as it's based on embeddings
+
+    def to_state(self) -> Dict:
+        """
+        Serializable snapshot of the chat history and memory vectors
+        Returns:
+            Dict: JSON-compatible state for a session store
+        """
+        if isinstance(self.chat_memory_buffer, RollingSummaryMemory):
+            primary = self.chat_memory_buffer.to_state()
+        else:
+            primary = {"messages": [m.model_dump(mode="json") for m in self.chat_memory_buffer.get_all()]}
+        return {"primary": primary, "vector": self.vector_memory().to_state()}
+
+    def load_state(self, state: Dict) -> None:
+        """
+        Restore a snapshot taken by to_state, in place
+        Args:
+            state: Value returned by to_state
+        """
+        primary = state.get("primary", {})
+        if isinstance(self.chat_memory_buffer, RollingSummaryMemory):
+            self.chat_memory_buffer.load_state(primary)
+        else:
+            self.chat_memory_buffer.set([ChatMessage.model_validate(m) for m in primary.get("messages", [])])
+        self.vector_memory().load_state(state.get("vector", {}))
+
+    def close(self) -> None:
+        """Free all memory held by this instance, including stored vectors"""
+        self.logger.info("Releasing agent memory")
+        if self._vector_memory is not None:
+            self._vector_memory.reset()
+        self._vector_memory = None
         self._composable_memory = None
-        self.chat_memory_buffer = ChatMemoryBuffer.from_defaults()
-        # Note: Vector memory persists as it's based on embeddings
\ No newline at end of file
+        self.chat_memory_buffer.reset()
\ No newline at end of file
@@ -0,0 +1,232 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from llama_index.core.llms import ChatMessage, MessageRole
+from llama_index.core.memory.types import BaseMemory
+from llama_index.core.utils import get_tokenizer
+from pydantic import Field, PrivateAttr
+
+from core.logger import get_application_logger
+from core.metrics import get_metrics_registry, timed
+
+SUMMARY_PROMPT = (
+    "Update the running summary of a conversation between a user and a SQL data assistant. "
+    "Keep table names, column names, filters, SQL decisions and user preferences; drop small talk. "
+    "Answer with the updated summary only.\n\n"
+    "Current summary:\n{summary}\n\nNew messages:\n{messages}"
+)
+
+# Summaries are produced off the request path on a small shared pool
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-summary")
+
+_metrics = get_metrics_registry()
+TOKENS_SAVED = _metrics.counter(
+    "memory_tokens_saved_total", "Chat history tokens replaced by the running summary, counted once per summary"
+)
+SUMMARIES = _metrics.counter("memory_summaries_total", "Running summaries written by the rolling summary memory")
+TRUNCATED = _metrics.counter(
+    "memory_truncated_messages_total", "Messages shortened to fit the memory token budget", ("kind",)
+)
+
+TRUNCATION_MARKER = " ...[truncated]"
+
+
+class RollingSummaryMemory(BaseMemory):
+    """
+    Primary chat memory that keeps recent turns verbatim and summarizes the rest.
+
+    The last ``keep_last_turns`` user turns are returned as-is. Older messages
+    are folded into a running summary by a background task, so no request
+    waits for summarization. ``get`` never returns more than ``token_budget``
+    tokens: verbatim messages beyond the budget are dropped oldest first, and
+    a summary or newest message that alone exceeds it is cut down to fit.
+    Dropped messages are queued for the next summary, so nothing falls out of
+    both the summary and the window. Savings and truncations are reported in
+    the process-wide metrics.
+    """
+
+    llm: Any = Field(description="LLM used to write the summary")
+    keep_last_turns: int = Field(default=4)
+    token_budget: int = Field(default=3000)
+
+    _messages: List[ChatMessage] = PrivateAttr(default_factory=list)
+    _summary: str = PrivateAttr(default="")
+    _summarized_upto: int = PrivateAttr(default=0)
+    # Messages before this index no longer fit the budget and must be summarized
+    _budget_cut: int = PrivateAttr(default=0)
+    _pending: bool = PrivateAttr(default=False)
+    _generation: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.RLock)
+    _tokenizer: Callable[[str], List] = PrivateAttr(default_factory=get_tokenizer)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "RollingSummaryMemory"
+
+    @classmethod
+    def from_defaults(cls, llm: Any = None, keep_last_turns: int = 4,
+                      token_budget: int = 3000, **kwargs: Any) -> "RollingSummaryMemory":
+        return cls(llm=llm, keep_last_turns=keep_last_turns, token_budget=token_budget)
+
+    def _count(self, message: ChatMessage) -> int:
+        return len(self._tokenizer(str(message.content or "")))
+
+    def _fit(self, message: ChatMessage, budget: int, kind: str) -> Optional[ChatMessage]:
+        """Cut a message down to ``budget`` tokens, or None if nothing useful fits."""
+        text = str(message.content or "")
+        cost = len(self._tokenizer(text))
+        if cost <= budget:
+            return message
+        room = budget - len(self._tokenizer(TRUNCATION_MARKER))
+        if room <= 0:
+            return None
+        # Start from the proportional length and shorten until the tokenizer agrees
+        end = len(text) * room // cost
+        while end > 0 and len(self._tokenizer(text[:end])) > room:
+            end = end * 9 // 10
+        if end <= 0:
+            return None
+        TRUNCATED.inc(kind=kind)
+        return message.model_copy(update={"content": text[:end] + TRUNCATION_MARKER})
+
+    def _summary_message(self) -> Optional[ChatMessage]:
+        if not self._summary:
+            return None
+        return ChatMessage(role=MessageRole.SYSTEM, content=f"Summary of the earlier conversation:\n{self._summary}")
+
+    def get(self, input: Optional[str] = None, **kwargs: Any) -> List[ChatMessage]:
+        with self._lock:
+            recent = self._messages[self._summarized_upto:]
+            total = len(self._messages)
+            summary = self._summary_message()
+
+        if summary is not None:
+            summary = self._fit(summary, self.token_budget, "summary")
+        summary_tokens = self._count(summary) if summary is not None else 0
+        budget = self.token_budget - summary_tokens
+        kept: List[ChatMessage] = []
+        used = 0
+        for message in reversed(recent):
+            cost = self._count(message)
+            if used + cost > budget:
+                if not kept:
+                    # The newest message alone is over budget: keep the part that fits
+                    message = self._fit(message, budget, "message")
+                    if message is not None:
+                        kept.append(message)
+                        used += self._count(message)
+                break
+            kept.append(message)
+            used += cost
+        kept.reverse()
+        # Tool and assistant messages must not lead the history; dropping them only lowers the total
+        while len(kept) > 1 and kept[0].role != MessageRole.USER:
+            used -= self._count(kept.pop(0))
+
+        if len(kept) < len(recent):
+            with self._lock:
+                self._budget_cut = max(self._budget_cut, total - len(kept))
+            self._maybe_compact()
+        return ([summary] if summary is not None else []) + kept
+
+    def get_all(self) -> List[ChatMessage]:
+        with self._lock:
+            return list(self._messages)
+
+    def put(self, message: ChatMessage) -> None:
+        with self._lock:
+            self._messages.append(message)
+        self._maybe_compact()
+
+    def set(self, messages: List[ChatMessage]) -> None:
+        with self._lock:
+            upto = self._summarized_upto
+            # The agent runner re-sets the full history plus the new turn; the
+            # summary stays valid as long as the summarized prefix is unchanged
+            if len(messages) < upto or messages[:upto] != self._messages[:upto]:
+                self._invalidate_summary()
+            self._messages = list(messages)
+        self._maybe_compact()
+
+    def truncate(self, n: int) -> None:
+        """Drop the ``n`` most recent messages."""
+        with self._lock:
+            if n <= 0:
+                return
+            self._messages = self._messages[:-n]
+            self._budget_cut = min(self._budget_cut, len(self._messages))
+            if len(self._messages) < self._summarized_upto:
+                self._invalidate_summary()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._messages = []
+            self._invalidate_summary()
+
+    def _invalidate_summary(self) -> None:
+        self._summary = ""
+        self._summarized_upto = 0
+        self._budget_cut = 0
+        # Results of a summary started before this point are discarded
+        self._generation += 1
+
+    def _compaction_cut(self) -> int:
+        """Index of the first message that must stay verbatim."""
+        user_turns = [i for i, m in enumerate(self._messages) if m.role == MessageRole.USER]
+        if len(user_turns) <= self.keep_last_turns:
+            return 0
+        return user_turns[-self.keep_last_turns]
+
+    def _maybe_compact(self) -> None:
+        with self._lock:
+            if self._pending or self.llm is None:
+                return
+            cut = max(self._compaction_cut(), min(self._budget_cut, len(self._messages)))
+            if cut <= self._summarized_upto:
+                return
+            self._pending = True
+            job = (self._generation, self._summary, self._messages[self._summarized_upto:cut], cut)
+        _summary_executor.submit(self._compact, *job)
+
+    def _compact(self, generation: int, summary: str, messages: List[ChatMessage], cut: int) -> None:
+        succeeded = False
+        try:
+            transcript = "\n".join(f"{m.role.value}: {m.content}" for m in messages if m.content)
+            prompt = SUMMARY_PROMPT.format(summary=summary or "(none)", messages=transcript)
+            with timed("memory", "summary"):
+                new_summary = str(self.llm.complete(prompt)).strip()
+            with self._lock:
+                if generation == self._generation and len(self._messages) >= cut:
+                    self._summary = new_summary
+                    self._summarized_upto = cut
+                    SUMMARIES.inc()
+                    # Tokens the folded messages cost every later prompt, less what the summary grew by
+                    folded = sum(self._count(m) for m in messages)
+                    grown = len(self._tokenizer(new_summary)) - len(self._tokenizer(summary))
+                    TOKENS_SAVED.inc(max(0, folded - grown))
+            succeeded = True
+        except Exception as e:
+            get_application_logger().warning(f"Could not summarize memory: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending = False
+        if succeeded:
+            # More turns may have arrived while the summary was generated
+            self._maybe_compact()
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializable snapshot of the messages and the running summary."""
+        with self._lock:
+            return {
+                "messages": [m.model_dump(mode="json") for m in self._messages],
+                "summary": self._summary,
+                "summarized_upto": self._summarized_upto,
+            }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._invalidate_summary()
+            self._messages = [ChatMessage.model_validate(m) for m in state.get("messages", [])]
+            self._summary = state.get("summary", "")
+            self._summarized_upto = min(state.get("summarized_upto", 0), len(self._messages))
@@ -0,0 +1,257 @@
+import base64
+import hashlib
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.llms import ChatMessage, MessageRole
+from llama_index.core.memory.types import BaseMemory
+from pydantic import Field, PrivateAttr
+
+from core.metrics import timed
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+
+def _message_key(message: ChatMessage) -> str:
+    raw = f"{message.role}\x00{message.content or ''}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _encode(array: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode("ascii")
+
+
+def _decode(data: str, dtype: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.dtype(dtype))
+
+
+def _importance(message: ChatMessage) -> float:
+    # Conversation turns matter more than tool chatter when space runs out
+    if message.role in (MessageRole.USER, MessageRole.ASSISTANT):
+        return 1.0
+    return 0.5
+
+
+class TurnVectorMemory(BaseMemory):
+    """
+    Secondary vector memory that supports cheap rollback.
+
+    Each message is embedded once when it is first stored and kept in insertion
+    order, so rolling back the latest turn only drops entries from the tail.
+    Messages that are already stored are skipped, which makes the repeated
+    ``set``/``put_messages`` calls done by the agent runner idempotent.
+
+    Embeddings live in one preallocated matrix of ``capacity`` rows stored as
+    float32, float16 or int8 (with a per-row scale). Retrieval is a single
+    matrix-vector product followed by ``argpartition``. When the matrix is
+    full, the entry with the lowest importance weighted by recency is evicted.
+
+    Snapshots hold the messages and their small per-row bookkeeping, not the
+    matrix: vectors are rebuilt on load through the embedding model, whose
+    content-addressed cache makes that a local lookup.
+    """
+
+    embed_model: Any = Field(description="Embedding model used for messages and queries")
+    similarity_top_k: int = Field(default=5)
+    capacity: int = Field(default=256, description="Maximum number of stored messages")
+    dtype: str = Field(default="float32", description="Storage type: float32, float16 or int8")
+    recency_decay: float = Field(default=0.98, description="Per-message decay of an entry's importance")
+
+    _messages: List[ChatMessage] = PrivateAttr(default_factory=list)
+    _keys: List[str] = PrivateAttr(default_factory=list)
+    _stored: Set[str] = PrivateAttr(default_factory=set)
+    _matrix: Optional[np.ndarray] = PrivateAttr(default=None)
+    _scales: Optional[np.ndarray] = PrivateAttr(default=None)
+    _importance: Optional[np.ndarray] = PrivateAttr(default=None)
+    _positions: Optional[np.ndarray] = PrivateAttr(default=None)
+    _count: int = PrivateAttr(default=0)
+    _next_position: int = PrivateAttr(default=0)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "TurnVectorMemory"
+
+    @classmethod
+    def from_defaults(cls, embed_model: Optional[BaseEmbedding] = None,
+                      similarity_top_k: int = 5, capacity: int = 256,
+                      dtype: str = "float32", **kwargs: Any) -> "TurnVectorMemory":
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported vector dtype {dtype}, expected one of {SUPPORTED_DTYPES}")
+        return cls(embed_model=embed_model, similarity_top_k=similarity_top_k,
+                   capacity=capacity, dtype=dtype)
+
+    def _embed(self, text: str) -> np.ndarray:
+        return self._normalize(self.embed_model.get_text_embedding(text))
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _allocate(self, dim: int) -> None:
+        self._matrix = np.zeros((self.capacity, dim), dtype=np.dtype(self.dtype))
+        self._scales = np.ones(self.capacity, dtype=np.float32)
+        self._importance = np.zeros(self.capacity, dtype=np.float32)
+        self._positions = np.zeros(self.capacity, dtype=np.int64)
+
+    def _write_row(self, row: int, vector: np.ndarray) -> None:
+        if self.dtype == "int8":
+            scale = float(np.abs(vector).max()) or 1.0
+            self._matrix[row] = np.round(vector / scale * 127).astype(np.int8)
+            self._scales[row] = scale / 127
+        else:
+            self._matrix[row] = vector
+
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        rows = self._matrix[:self._count]
+        if self.dtype == "float32":
+            return rows @ query
+        scores = rows.astype(np.float32) @ query
+        return scores * self._scales[:self._count] if self.dtype == "int8" else scores
+
+    def put(self, message: ChatMessage) -> None:
+        if not message.content:
+            return
+        key = _message_key(message)
+        if key in self._stored:
+            return
+        vector = self._embed(str(message.content))
+        if self._matrix is None:
+            self._allocate(len(vector))
+        if self._count == self.capacity:
+            self._evict()
+
+        row = self._count
+        self._write_row(row, vector)
+        self._importance[row] = _importance(message)
+        self._positions[row] = self._next_position
+        self._next_position += 1
+        self._count += 1
+        self._messages.append(message)
+        self._keys.append(key)
+        self._stored.add(key)
+
+    def _evict(self) -> None:
+        """Remove the entry with the lowest recency-weighted importance."""
+        count = self._count
+        age = self._next_position - self._positions[:count]
+        weight = self._importance[:count] * np.power(self.recency_decay, age)
+        victim = int(np.argmin(weight))
+        # Shift the following rows down to keep insertion order for rollback
+        for array in (self._matrix, self._scales, self._importance, self._positions):
+            array[victim:count - 1] = array[victim + 1:count]
+        self._count -= 1
+        del self._messages[victim]
+        self._stored.discard(self._keys.pop(victim))
+
+    def put_messages(self, messages: List[ChatMessage]) -> None:
+        for message in messages:
+            self.put(message)
+
+    def get(self, input: Optional[str] = None, **kwargs: Any) -> List[ChatMessage]:
+        """Return the stored messages most similar to ``input``, oldest first."""
+        if not input or not self._count:
+            return []
+        with timed("memory", "vector_get"):
+            query = np.asarray(self.embed_model.get_query_embedding(input), dtype=np.float32)
+            scores = self._scores(query)
+            k = min(self.similarity_top_k, self._count)
+            top = np.argpartition(-scores, k - 1)[:k]
+        # Retrieved entries become more important, so they survive eviction longer
+        self._importance[top] += 0.1
+        return [self._messages[i] for i in np.sort(top)]
+
+    def get_all(self) -> List[ChatMessage]:
+        return list(self._messages)
+
+    def set(self, messages: List[ChatMessage]) -> None:
+        self.put_messages(messages)
+
+    def checkpoint(self) -> int:
+        """Position to which ``rollback`` can return."""
+        return self._next_position
+
+    def rollback(self, checkpoint: int) -> None:
+        """Drop every entry stored after ``checkpoint``."""
+        while self._count and self._positions[self._count - 1] >= checkpoint:
+            self._pop()
+
+    def truncate(self, n: int) -> None:
+        """Drop the ``n`` most recently stored entries."""
+        for _ in range(min(n, self._count)):
+            self._pop()
+
+    def _pop(self) -> None:
+        self._count -= 1
+        self._messages.pop()
+        self._stored.discard(self._keys.pop())
+
+    def to_state(self) -> Dict[str, Any]:
+        """
+        Serializable snapshot of the stored messages with their importance and
+        positions; the vectors are not included (a few KB instead of the matrix).
+        """
+        count = self._count
+        state: Dict[str, Any] = {
+            "next_position": self._next_position,
+            "messages": [m.model_dump(mode="json") for m in self._messages],
+        }
+        if count:
+            state.update({
+                "importance": _encode(self._importance[:count]),
+                "positions": _encode(self._positions[:count]),
+            })
+        return state
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """Restore a snapshot taken by ``to_state``, embedding the messages in one cached batch."""
+        self.reset()
+        messages = [ChatMessage.model_validate(m) for m in state.get("messages", [])]
+        next_position = state.get("next_position", 0)
+        count = min(len(messages), self.capacity)
+        if not count:
+            self._next_position = next_position
+            return
+        messages = messages[-count:]
+        if "matrix" in state and state.get("dtype") == self.dtype:
+            # Snapshots written before vectors were left out
+            self._allocate(state["dim"])
+            self._matrix[:count] = _decode(state["matrix"], self.dtype).reshape(-1, state["dim"])[-count:]
+            self._scales[:count] = _decode(state["scales"], "float32")[-count:]
+        else:
+            with timed("memory", "vector_load"):
+                embeddings = self.embed_model.get_text_embedding_batch([str(m.content) for m in messages])
+            vectors = [self._normalize(e) for e in embeddings]
+            self._allocate(len(vectors[0]))
+            for row, vector in enumerate(vectors):
+                self._write_row(row, vector)
+        if "importance" in state and "positions" in state:
+            self._importance[:count] = _decode(state["importance"], "float32")[-count:]
+            self._positions[:count] = _decode(state["positions"], "int64")[-count:]
+        else:
+            self._importance[:count] = [_importance(m) for m in messages]
+            self._positions[:count] = np.arange(count)
+        self._count = count
+        self._next_position = max(next_position, int(self._positions[count - 1]) + 1)
+        self._messages = messages
+        self._keys = [_message_key(m) for m in self._messages]
+        self._stored = set(self._keys)
+
+    def nbytes(self) -> int:
+        """Bytes held by the embedding storage."""
+        if self._matrix is None:
+            return 0
+        return self._matrix.nbytes + self._scales.nbytes + self._importance.nbytes + self._positions.nbytes
+
+    def reset(self) -> None:
+        self._messages = []
+        self._keys = []
+        self._stored = set()
+        self._matrix = None
+        self._scales = None
+        self._importance = None
+        self._positions = None
+        self._count = 0
+        self._next_position = 0
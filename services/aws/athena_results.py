@@ -0,0 +1,238 @@
+import csv
+import io
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from core.logger import get_application_logger
+from services.aws.clients import get_client
+
+
+def _to_bool(value: str) -> bool:
+    return value.lower() == 'true'
+
+
+# Athena ColumnInfo types that are coerced; everything else stays a string
+_COERCERS: Dict[str, Callable[[str], Any]] = {
+    'boolean': _to_bool,
+    'tinyint': int,
+    'smallint': int,
+    'integer': int,
+    'int': int,
+    'bigint': int,
+    'float': float,
+    'real': float,
+    'double': float,
+    'decimal': Decimal,
+}
+
+_STRING_TYPES = ('varchar', 'char', 'string')
+
+
+def _coercer(column_type: str) -> Optional[Callable[[str], Any]]:
+    return _COERCERS.get(column_type.lower())
+
+
+def _parse_s3_uri(uri: str) -> Tuple[str, str]:
+    parsed = urlparse(uri)
+    return parsed.netloc, parsed.path.lstrip('/')
+
+
+class AthenaResult:
+    """
+    Lazily iterated result set of a finished Athena query.
+
+    Rows are produced as tuples in column order. Iteration stops once the row
+    or byte cap is reached and ``truncated`` is set, so callers can tell a
+    capped result from a complete one.
+    """
+
+    def __init__(self, columns: List[str], types: List[str], row_source: Iterator[List[Optional[str]]],
+                 max_rows: Optional[int], max_bytes: Optional[int]):
+        self.columns = columns
+        self.types = types
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.truncated = False
+        self.row_count = 0
+        self.byte_count = 0
+        self._row_source = row_source
+        self._coercers = [_coercer(t) for t in types]
+        self._nullable_empty = [t.lower() not in _STRING_TYPES for t in types]
+
+    def _coerce(self, raw: List[Optional[str]]) -> Tuple[Any, ...]:
+        values = []
+        for value, coerce, empty_is_null in zip(raw, self._coercers, self._nullable_empty):
+            if value is None or (value == '' and empty_is_null):
+                values.append(None)
+            elif coerce is None:
+                values.append(value)
+            else:
+                try:
+                    values.append(coerce(value))
+                except (ValueError, ArithmeticError):
+                    values.append(value)
+        return tuple(values)
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        for raw in self._row_source:
+            if self.max_rows is not None and self.row_count >= self.max_rows:
+                self.truncated = True
+                break
+            size = sum(len(v) if isinstance(v, str) else 8 for v in raw if v is not None)
+            if self.max_bytes is not None and self.byte_count + size > self.max_bytes:
+                self.truncated = True
+                break
+            self.row_count += 1
+            self.byte_count += size
+            yield self._coerce(raw)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialize the (capped) result as a list of dicts."""
+        return [dict(zip(self.columns, row)) for row in self]
+
+
+class AthenaResultReader:
+    """
+    Reads Athena query results page by page.
+
+    Small results are read through ``get_query_results`` following NextToken
+    lazily. Results whose output file is larger than ``s3_threshold_bytes`` are
+    streamed straight from the query OutputLocation in S3, which avoids the
+    1000-row page limit and the per-cell JSON envelope of the API.
+    """
+
+    def __init__(self,
+                 athena_client: Any,
+                 s3_client: Optional[Any] = None,
+                 max_rows: Optional[int] = 10000,
+                 max_bytes: Optional[int] = 10 * 1024 * 1024,
+                 page_size: int = 1000,
+                 s3_threshold_bytes: Optional[int] = 1024 * 1024):
+        """
+        Args:
+            athena_client: boto3 Athena client
+            s3_client: boto3 S3 client, created on demand when omitted
+            max_rows: Maximum number of rows returned, None for no cap
+            max_bytes: Maximum number of cell bytes returned, None for no cap
+            page_size: MaxResults passed to get_query_results
+            s3_threshold_bytes: Output size from which results are read from S3,
+                None to always use the API
+        """
+        self.logger = get_application_logger()
+        self.athena_client = athena_client
+        self._s3_client = s3_client
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.page_size = page_size
+        self.s3_threshold_bytes = s3_threshold_bytes
+
+    @property
+    def s3_client(self) -> Any:
+        if self._s3_client is None:
+            self._s3_client = get_client('s3', self.athena_client.meta.region_name)
+        return self._s3_client
+
+    def read(self, execution: Dict[str, Any]) -> AthenaResult:
+        """
+        Open the result of a succeeded query execution.
+
+        Args:
+            execution: ``QueryExecution`` description of a succeeded query
+
+        Returns:
+            AthenaResult iterating over the coerced rows
+        """
+        query_execution_id = execution['QueryExecutionId']
+        output_location = execution.get('ResultConfiguration', {}).get('OutputLocation')
+        if output_location and self._should_read_from_s3(output_location):
+            self.logger.debug(f"Reading results of {query_execution_id} from {output_location}")
+            return self._read_from_s3(query_execution_id, output_location)
+        return self._read_from_api(query_execution_id)
+
+    def _should_read_from_s3(self, output_location: str) -> bool:
+        if self.s3_threshold_bytes is None:
+            return False
+        if output_location.endswith('.parquet'):
+            return True
+        if not output_location.endswith('.csv'):
+            return False
+        bucket, key = _parse_s3_uri(output_location)
+        try:
+            head = self.s3_client.head_object(Bucket=bucket, Key=key)
+        except Exception as e:
+            self.logger.warning(f"Could not inspect {output_location}: {str(e)}")
+            return False
+        return head['ContentLength'] >= self.s3_threshold_bytes
+
+    def _column_info(self, query_execution_id: str) -> Tuple[List[str], List[str], Dict[str, Any]]:
+        first_page = self.athena_client.get_query_results(
+            QueryExecutionId=query_execution_id, MaxResults=self.page_size
+        )
+        column_info = first_page['ResultSet']['ResultSetMetadata']['ColumnInfo']
+        return [c['Name'] for c in column_info], [c['Type'] for c in column_info], first_page
+
+    def _read_from_api(self, query_execution_id: str) -> AthenaResult:
+        columns, types, first_page = self._column_info(query_execution_id)
+
+        def pages() -> Iterator[List[Optional[str]]]:
+            page = first_page
+            # The first row of the first page repeats the column names
+            skip_header = True
+            while True:
+                rows = page['ResultSet']['Rows']
+                if skip_header:
+                    rows = rows[1:]
+                    skip_header = False
+                for row in rows:
+                    yield [item.get('VarCharValue') for item in row['Data']]
+                next_token = page.get('NextToken')
+                if not next_token:
+                    return
+                page = self.athena_client.get_query_results(
+                    QueryExecutionId=query_execution_id,
+                    MaxResults=self.page_size,
+                    NextToken=next_token
+                )
+
+        return AthenaResult(columns, types, pages(), self.max_rows, self.max_bytes)
+
+    def _read_from_s3(self, query_execution_id: str, output_location: str) -> AthenaResult:
+        bucket, key = _parse_s3_uri(output_location)
+        if output_location.endswith('.parquet'):
+            return self._read_parquet(bucket, key)
+
+        # Column types still come from the API; only the first page is fetched
+        columns, types, _ = self._column_info(query_execution_id)
+
+        def rows() -> Iterator[List[Optional[str]]]:
+            body = self.s3_client.get_object(Bucket=bucket, Key=key)['Body']
+            lines = (line.decode('utf-8') for line in body.iter_lines(keepends=True))
+            reader = csv.reader(lines)
+            next(reader, None)
+            try:
+                for row in reader:
+                    yield row
+            finally:
+                body.close()
+
+        return AthenaResult(columns, types, rows(), self.max_rows, self.max_bytes)
+
+    def _read_parquet(self, bucket: str, key: str) -> AthenaResult:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("pyarrow is required to read Parquet query output")
+
+        body = self.s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+        parquet_file = pq.ParquetFile(io.BytesIO(body))
+        columns = parquet_file.schema_arrow.names
+        # Parquet values are already typed, so they pass through uncoerced
+        types = ['varchar'] * len(columns)
+
+        def rows() -> Iterator[List[Any]]:
+            for batch in parquet_file.iter_batches():
+                for record in batch.to_pylist():
+                    yield [record[c] for c in columns]
+
+        return AthenaResult(columns, types, rows(), self.max_rows, self.max_bytes)
@@ -0,0 +1,267 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+from services.aws.clients import get_client
+
+TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELLED")
+
+# BatchGetQueryExecution accepts at most 50 ids per call
+_BATCH_SIZE = 50
+
+# Extra seconds a synchronous caller waits for submission and StopQueryExecution
+_SYNC_GRACE = 10.0
+
+
+class AthenaQueryError(Exception):
+    """Raised when an Athena query ends in a FAILED or CANCELLED state."""
+
+    def __init__(self, query_execution_id: str, state: str, reason: str):
+        super().__init__(f"Query failed: {reason}")
+        self.query_execution_id = query_execution_id
+        self.state = state
+        self.reason = reason
+
+
+class AthenaExecutor:
+    """
+    Asynchronous Athena query executor.
+
+    All in-flight queries are tracked on a single event loop and polled together
+    with ``batch_get_query_execution``, so waiting on many queries costs one
+    API call per polling tick instead of one blocked thread per query. The
+    polling interval starts small and backs off exponentially while nothing
+    changes, and resets whenever a new query is submitted.
+    """
+
+    def __init__(self,
+                 database: str = "athena_db",
+                 output_location: str = "s3://bedrock-350474408512-us-east-1",
+                 region_name: str = "us-east-1",
+                 client: Optional[Any] = None,
+                 initial_poll_interval: float = 0.1,
+                 max_poll_interval: float = 2.0,
+                 backoff_factor: float = 1.5,
+                 result_reuse_minutes: int = 0,
+                 query_timeout: Optional[float] = None):
+        """
+        Args:
+            database: Default Athena database for query execution
+            output_location: S3 location where Athena writes results
+            region_name: AWS region of the Athena workgroup
+            client: Optional pre-built boto3 Athena client
+            initial_poll_interval: First polling delay in seconds
+            max_poll_interval: Upper bound for the polling delay in seconds
+            backoff_factor: Multiplier applied to the delay after each idle poll
+            result_reuse_minutes: Let Athena reuse results of identical queries up to
+                this age, 0 to disable
+            query_timeout: Default seconds ``run_sync`` waits before stopping a query,
+                None to wait indefinitely
+        """
+        self.logger = get_application_logger()
+        self.database = database
+        self.output_location = output_location
+        self.region_name = region_name
+        self.client = client or get_client('athena', region_name)
+        self.initial_poll_interval = initial_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backoff_factor = backoff_factor
+        self.result_reuse_minutes = result_reuse_minutes
+        self.query_timeout = query_timeout
+
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    async def _call(self, method: str, **kwargs) -> Dict[str, Any]:
+        """Run a blocking boto3 call off the event loop."""
+        loop = asyncio.get_running_loop()
+        fn = getattr(self.client, method)
+        return await loop.run_in_executor(None, lambda: fn(**kwargs))
+
+    async def start(self, query: str, database: Optional[str] = None) -> str:
+        """
+        Submit a query to Athena.
+
+        Args:
+            query: SQL text to execute
+            database: Database override, defaults to the executor database
+
+        Returns:
+            The QueryExecutionId of the submitted query
+        """
+        params = {
+            'QueryString': query,
+            'QueryExecutionContext': {'Database': database or self.database},
+            'ResultConfiguration': {'OutputLocation': self.output_location},
+        }
+        if self.result_reuse_minutes > 0:
+            params['ResultReuseConfiguration'] = {
+                'ResultReuseByAgeConfiguration': {
+                    'Enabled': True,
+                    'MaxAgeInMinutes': self.result_reuse_minutes
+                }
+            }
+        response = await self._call('start_query_execution', **params)
+        return response['QueryExecutionId']
+
+    async def wait(self, query_execution_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait for a query to reach a terminal state.
+
+        Args:
+            query_execution_id: Id returned by ``start``
+            timeout: Optional number of seconds to wait before cancelling the query
+
+        Returns:
+            The ``QueryExecution`` description of a succeeded query
+
+        Raises:
+            AthenaQueryError: If the query failed or was cancelled
+            asyncio.TimeoutError: If the timeout elapsed; the query is stopped
+        """
+        future = self._pending.get(query_execution_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[query_execution_id] = future
+        self._ensure_poller()
+        self._wakeup.set()
+
+        try:
+            execution = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await self.cancel(query_execution_id)
+            raise
+
+        state = execution['Status']['State']
+        if state != 'SUCCEEDED':
+            reason = execution['Status'].get('StateChangeReason', 'Unknown')
+            raise AthenaQueryError(query_execution_id, state, reason)
+        return execution
+
+    async def run(self, query: str, database: Optional[str] = None,
+                  timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Submit a query and wait for it to finish."""
+        query_execution_id = await self.start(query, database)
+        return await self.wait(query_execution_id, timeout)
+
+    async def cancel(self, query_execution_id: str) -> None:
+        """Stop a running query and release its waiter."""
+        self.logger.info(f"Stopping Athena query {query_execution_id}")
+        try:
+            await self._call('stop_query_execution', QueryExecutionId=query_execution_id)
+        except Exception as e:
+            self.logger.warning(f"Could not stop query {query_execution_id}: {str(e)}")
+        future = self._pending.pop(query_execution_id, None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    def _ensure_poller(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll_loop())
+
+    async def _poll_loop(self) -> None:
+        """Poll every pending query in batches until none are left."""
+        interval = self.initial_poll_interval
+        while self._pending:
+            self._wakeup.clear()
+            ids = list(self._pending)
+            changed = False
+            for i in range(0, len(ids), _BATCH_SIZE):
+                try:
+                    response = await self._call(
+                        'batch_get_query_execution', QueryExecutionIds=ids[i:i + _BATCH_SIZE]
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Athena status poll failed: {str(e)}")
+                    continue
+                for execution in response.get('QueryExecutions', []):
+                    if execution['Status']['State'] in TERMINAL_STATES:
+                        future = self._pending.pop(execution['QueryExecutionId'], None)
+                        if future is not None and not future.done():
+                            future.set_result(execution)
+                        changed = True
+                for unprocessed in response.get('UnprocessedQueryExecutionIds', []):
+                    future = self._pending.pop(unprocessed['QueryExecutionId'], None)
+                    if future is not None and not future.done():
+                        future.set_exception(AthenaQueryError(
+                            unprocessed['QueryExecutionId'], 'FAILED',
+                            unprocessed.get('ErrorMessage', 'Unknown')
+                        ))
+
+            interval = self.initial_poll_interval if changed else min(
+                interval * self.backoff_factor, self.max_poll_interval
+            )
+            try:
+                # A newly submitted query wakes the poller and resets the backoff
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+                interval = self.initial_poll_interval
+            except asyncio.TimeoutError:
+                pass
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the background event loop used by the synchronous wrapper."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="athena-executor", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def run_sync(self, query: str, database: Optional[str] = None,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Blocking wrapper around ``run`` for synchronous callers such as FunctionTool.
+
+        The caller thread only waits on a future; the polling itself happens on
+        the shared background loop together with every other in-flight query.
+        ``timeout`` defaults to ``query_timeout``; when it elapses, or the wait
+        is interrupted, the coroutine is cancelled, which stops the query.
+
+        Raises:
+            AthenaQueryError: If the query failed, was cancelled or timed out
+        """
+        if timeout is None:
+            timeout = self.query_timeout
+        started = time.monotonic()
+        future = asyncio.run_coroutine_threadsafe(
+            self.run(query, database, timeout), self._ensure_loop()
+        )
+        try:
+            execution = future.result(timeout + _SYNC_GRACE if timeout else None)
+        except (asyncio.TimeoutError, concurrent.futures.TimeoutError):
+            # A no-op when ``wait`` already stopped the query itself
+            future.cancel()
+            raise AthenaQueryError("", "CANCELLED", f"Query timed out after {timeout:g}s and was stopped")
+        except BaseException:
+            future.cancel()
+            raise
+        self.logger.debug(f"Athena query finished in {time.monotonic() - started:.2f}s")
+        return execution
+
+
+_executor: Optional[AthenaExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_athena_executor() -> AthenaExecutor:
+    """Return the process-wide Athena executor."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = AthenaExecutor(
+                result_reuse_minutes=get_settings()["ATHENA_RESULT_REUSE_MINUTES"],
+                query_timeout=get_settings()["ATHENA_QUERY_TIMEOUT_SECONDS"] or None
+            )
+        return _executor
@@ -0,0 +1,147 @@
+from typing import Any, List, Optional, Sequence, Union
+
+from llama_index.core.base.llms.types import (
+    ChatMessage, ChatResponse, ChatResponseAsyncGen, ChatResponseGen
+)
+from llama_index.embeddings.bedrock import BedrockEmbedding
+from llama_index.llms.bedrock_converse import BedrockConverse
+
+from config.settings import get_settings
+from core.admission import estimate_tokens, get_admission_controller
+from core.metrics import record_llm_tokens, timed
+from core.resilience import get_hedged_caller
+
+
+def _message_tokens(messages: Sequence[ChatMessage]) -> int:
+    return estimate_tokens("".join(str(m.content or "") for m in messages))
+
+
+def _record_usage(model: str, response: ChatResponse) -> None:
+    """
+    Count the tokens reported by Converse (``usage``) or a stream's final
+    metadata event, and charge the output tokens to the model's TPM budget.
+    """
+    raw = response.raw if isinstance(response.raw, dict) else {}
+    usage = raw.get("usage") or raw.get("metadata", {}).get("usage")
+    if usage:
+        record_llm_tokens(
+            model, usage.get("inputTokens", 0), usage.get("outputTokens", 0),
+            usage.get("cacheReadInputTokens", 0), usage.get("cacheWriteInputTokens", 0)
+        )
+        get_admission_controller().charge(model, usage.get("outputTokens", 0))
+
+
+class GuardedBedrockConverse(BedrockConverse):
+    """
+    BedrockConverse whose calls go through the process-wide admission controller.
+
+    Every chat entry point (and everything built on it: complete, tool calling,
+    structured prediction) waits for an in-flight slot and rate-limit budget,
+    and throttled calls are retried with jittered backoff. Non-streaming calls
+    also run under the hedged caller: a per-call deadline, a duplicate request
+    to the secondary target when the first is slower than the model's p95,
+    and failover while the circuit breaker is open.
+    """
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "Guarded_Bedrock_Converse_LLM"
+
+    def _resilience_key(self) -> str:
+        return f"{self.model}@{self.region_name}"
+
+    def _secondary(self) -> Optional["GuardedBedrockConverse"]:
+        """The hedge and failover target, None when LLM_HEDGE_MODEL/REGION are unset."""
+        settings = get_settings()
+        model = settings["LLM_HEDGE_MODEL"] or self.model
+        region = settings["LLM_HEDGE_REGION"] or self.region_name
+        if (model, region) == (self.model, self.region_name):
+            return None
+        # Imported here because the client registry builds instances of this class
+        from services.aws.clients import get_llm
+        return get_llm(model, region)
+
+    def _admitted_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        # Bound through super() so the llama-index instrumentation wrappers see the instance
+        parent = super()
+        with timed("llm", self.model):
+            response = get_admission_controller().call(
+                lambda: parent.chat(messages, **kwargs),
+                self.model, _message_tokens(messages)
+            )
+        _record_usage(self.model, response)
+        return response
+
+    async def _admitted_achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        parent = super()
+        with timed("llm", self.model):
+            response = await get_admission_controller().acall(
+                lambda: parent.achat(messages, **kwargs),
+                self.model, _message_tokens(messages)
+            )
+        _record_usage(self.model, response)
+        return response
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        if not get_settings()["LLM_HEDGING_ENABLED"]:
+            return self._admitted_chat(messages, **kwargs)
+        secondary = self._secondary()
+        return get_hedged_caller().call(
+            self._resilience_key(),
+            lambda: self._admitted_chat(messages, **kwargs),
+            (lambda: secondary._admitted_chat(messages, **kwargs)) if secondary else None
+        )
+
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseGen:
+        controller = get_admission_controller()
+        parent = super()
+
+        def gen() -> ChatResponseGen:
+            # The slot is held until the stream is fully consumed
+            with timed("llm", self.model), controller.admit(self.model, _message_tokens(messages)):
+                for chunk in parent.stream_chat(messages, **kwargs):
+                    _record_usage(self.model, chunk)
+                    yield chunk
+
+        return gen()
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        if not get_settings()["LLM_HEDGING_ENABLED"]:
+            return await self._admitted_achat(messages, **kwargs)
+        secondary = self._secondary()
+        return await get_hedged_caller().acall(
+            self._resilience_key(),
+            lambda: self._admitted_achat(messages, **kwargs),
+            (lambda: secondary._admitted_achat(messages, **kwargs)) if secondary else None
+        )
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseAsyncGen:
+        controller = get_admission_controller()
+        parent = super()
+
+        async def gen() -> ChatResponseAsyncGen:
+            with timed("llm", self.model):
+                async with controller.aadmit(self.model, _message_tokens(messages)):
+                    stream = await parent.astream_chat(messages, **kwargs)
+                    async for chunk in stream:
+                        _record_usage(self.model, chunk)
+                        yield chunk
+
+        return gen()
+
+
+class GuardedBedrockEmbedding(BedrockEmbedding):
+    """BedrockEmbedding whose API calls go through the admission controller."""
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "GuardedBedrockEmbedding"
+
+    def _get_embedding(self, payload: Union[str, List[str]], type: str) -> Any:
+        text = payload if isinstance(payload, str) else "".join(payload)
+        parent = super()
+        with timed("embedding", self.model_name):
+            return get_admission_controller().call(
+                lambda: parent._get_embedding(payload, type),
+                self.model_name, estimate_tokens(text)
+            )
@@ -0,0 +1,267 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+import botocore.session
+from botocore.config import Config
+
+try:
+    from aiobotocore.session import get_session as get_aio_session
+except ImportError:
+    get_aio_session = None
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+from core.metrics import get_metrics_registry
+from core.tracing import SPAN_KIND_CLIENT, get_tracer
+from llamaIndex.embedding_cache import CachedEmbedding
+from services.aws.bedrock import GuardedBedrockConverse, GuardedBedrockEmbedding
+from services.aws.prompt_cache import get_prompt_cache_policy
+
+DEFAULT_REGION = "us-east-1"
+DEFAULT_LLM_MODEL = "anthropic.claude-3-sonnet-20240229-v1:0"
+DEFAULT_EMBED_MODEL = "amazon.titan-embed-text-v2:0"
+
+AWS_CALL_SECONDS = get_metrics_registry().histogram(
+    "aws_api_call_duration_seconds", "Duration of AWS API calls, retries included", ("service", "operation")
+)
+
+
+class _PoolMonitor:
+    """Tracks in-flight requests per AWS service to detect connection pool saturation."""
+
+    def __init__(self, max_pool_connections: int):
+        self.max_pool_connections = max_pool_connections
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _service(self, model: Any) -> str:
+        return model.service_model.service_name if model is not None else "unknown"
+
+    def before_call(self, model=None, context=None, **kwargs) -> None:
+        service = self._service(model)
+        with self._lock:
+            stats = self._stats.setdefault(
+                service, {"in_flight": 0, "peak_in_flight": 0, "calls": 0, "saturated_calls": 0}
+            )
+            stats["in_flight"] += 1
+            stats["calls"] += 1
+            stats["peak_in_flight"] = max(stats["peak_in_flight"], stats["in_flight"])
+            if stats["in_flight"] > self.max_pool_connections:
+                stats["saturated_calls"] += 1
+        if context is not None:
+            context["pool_monitor_service"] = service
+            context["pool_monitor_started"] = time.perf_counter()
+
+    def after_call(self, model=None, context=None, **kwargs) -> None:
+        if context is None or "pool_monitor_service" not in context:
+            return
+        service = context.pop("pool_monitor_service")
+        started = context.pop("pool_monitor_started")
+        with self._lock:
+            self._stats[service]["in_flight"] -= 1
+        AWS_CALL_SECONDS.observe(
+            time.perf_counter() - started,
+            service=service,
+            operation=model.name if model is not None else "unknown"
+        )
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                service: dict(stats, max_pool_connections=self.max_pool_connections)
+                for service, stats in self._stats.items()
+            }
+
+
+def _start_api_span(model=None, context=None, **kwargs) -> None:
+    """Open a client span for an AWS call made while a traced operation is active."""
+    tracer = get_tracer()
+    if context is None or model is None or tracer.current_span() is None:
+        # Background polling outside any request is not traced
+        return
+    service = model.service_model.service_name
+    context["trace_span"] = tracer.start_span(
+        f"{service}.{model.name}",
+        {"rpc.system": "aws-api", "rpc.service": service, "rpc.method": model.name},
+        kind=SPAN_KIND_CLIENT
+    )
+
+
+def _end_api_span(context=None, http_response=None, parsed=None, exception=None, **kwargs) -> None:
+    span = context.pop("trace_span", None) if context is not None else None
+    if span is None:
+        return
+    if http_response is not None:
+        span.set_attribute("http.status_code", http_response.status_code)
+    if isinstance(parsed, dict):
+        metadata = parsed.get("ResponseMetadata", {})
+        span.set_attribute("aws.request_id", metadata.get("RequestId"))
+        span.set_attribute("aws.retry_attempts", metadata.get("RetryAttempts"))
+    if exception is not None:
+        span.record_error(exception)
+    span.end()
+
+
+class AWSClientRegistry:
+    """
+    Process-wide registry of boto3 clients and Bedrock providers.
+
+    All clients come from one botocore session with a keep-alive connection
+    pool sized by ``AWS_MAX_POOL_CONNECTIONS``. boto3 clients are thread-safe,
+    so a single instance per (service, region) is shared by every request.
+    LLM and embedding objects are cached per model in the same way and go
+    through the admission controller in ``core.admission``; embedding models
+    are additionally wrapped in a persistent content-addressed cache.
+
+    BedrockConverse makes its async calls through aioboto3, which cannot use
+    a plain botocore session, so LLMs get the pooled sync client plus a
+    separate aiobotocore session carrying the same event handlers.
+
+    Retries of Bedrock calls are owned by the admission controller, which
+    backs off outside its in-flight slot; bedrock-runtime clients therefore
+    make a single attempt. Other services keep botocore's adaptive retries.
+    """
+
+    def __init__(self, max_pool_connections: int = 50, max_attempts: int = 4,
+                 embedding_cache_path: Optional[str] = None, embedding_cache_size: int = 10000):
+        """
+        Args:
+            max_pool_connections: Size of each client's HTTP connection pool
+            max_attempts: Total attempts for botocore's adaptive retry mode, except bedrock-runtime
+            embedding_cache_path: SQLite file backing the embedding cache, None for memory only
+            embedding_cache_size: Number of embeddings kept in process memory
+        """
+        self.logger = get_application_logger()
+        self.config = Config(
+            max_pool_connections=max_pool_connections,
+            tcp_keepalive=True,
+            retries={"mode": "adaptive", "max_attempts": max_attempts},
+        )
+        # Admission retries throttled Bedrock calls; botocore retrying inside each attempt would multiply them
+        self.bedrock_config = self.config.merge(Config(retries={"mode": "standard", "max_attempts": 1}))
+        self.embedding_cache_path = embedding_cache_path
+        self.embedding_cache_size = embedding_cache_size
+        self.monitor = _PoolMonitor(max_pool_connections)
+        self.botocore_session = botocore.session.get_session()
+        self._register_handlers(self.botocore_session)
+        self.session = boto3.Session(botocore_session=self.botocore_session)
+        self.aio_session = None
+        if get_aio_session is not None:
+            self.aio_session = get_aio_session()
+            self._register_handlers(self.aio_session)
+        # Client creation on a shared session is not thread-safe
+        self._lock = threading.RLock()
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._llms: Dict[Tuple[str, str], Any] = {}
+        self._embed_models: Dict[Tuple[str, str], Any] = {}
+
+    def _register_handlers(self, session: Any) -> None:
+        """Pool monitoring, tracing and prompt caching hooks; aiobotocore runs plain handlers too."""
+        session.register("before-call.*.*", self.monitor.before_call)
+        session.register("after-call.*.*", self.monitor.after_call)
+        session.register("after-call-error.*.*", self.monitor.after_call)
+        session.register("before-call.*.*", _start_api_span)
+        session.register("after-call.*.*", _end_api_span)
+        session.register("after-call-error.*.*", _end_api_span)
+        # Converse requests get cache points after their static prefix
+        prompt_cache = get_prompt_cache_policy()
+        session.register("before-parameter-build.bedrock-runtime.Converse",
+                         prompt_cache.before_parameter_build)
+        session.register("before-parameter-build.bedrock-runtime.ConverseStream",
+                         prompt_cache.before_parameter_build)
+
+    def client(self, service_name: str, region_name: str = DEFAULT_REGION) -> Any:
+        """Return the shared boto3 client for a service and region."""
+        key = (service_name, region_name)
+        with self._lock:
+            if key not in self._clients:
+                self.logger.info(f"Creating pooled {service_name} client for {region_name}")
+                self._clients[key] = self.session.client(
+                    service_name,
+                    region_name=region_name,
+                    config=self.bedrock_config if service_name == "bedrock-runtime" else self.config
+                )
+            return self._clients[key]
+
+    def llm(self, model: str = DEFAULT_LLM_MODEL, region_name: str = DEFAULT_REGION) -> Any:
+        """Return the shared BedrockConverse instance for a model."""
+        key = (model, region_name)
+        with self._lock:
+            if key not in self._llms:
+                self.logger.info(f"Creating shared Bedrock LLM {model}")
+                self._llms[key] = GuardedBedrockConverse(
+                    model=model,
+                    region_name=region_name,
+                    # Sync calls share the pooled client; the session only backs aioboto3
+                    client=self.client("bedrock-runtime", region_name),
+                    botocore_session=self.aio_session,
+                    botocore_config=self.bedrock_config,
+                )
+            return self._llms[key]
+
+    def embed_model(self, model_name: str = DEFAULT_EMBED_MODEL, region_name: str = DEFAULT_REGION) -> Any:
+        """Return the shared BedrockEmbedding instance for a model."""
+        key = (model_name, region_name)
+        with self._lock:
+            if key not in self._embed_models:
+                self.logger.info(f"Creating shared Bedrock embedding model {model_name}")
+                bedrock_embedding = GuardedBedrockEmbedding(
+                    model_name=model_name,
+                    region_name=region_name,
+                    botocore_session=self.botocore_session,
+                    botocore_config=self.bedrock_config,
+                )
+                self._embed_models[key] = CachedEmbedding(
+                    bedrock_embedding,
+                    store_path=self.embedding_cache_path,
+                    lru_size=self.embedding_cache_size
+                )
+            return self._embed_models[key]
+
+    def warm_up(self) -> None:
+        """Create the commonly used clients ahead of the first request."""
+        for service_name in ("athena", "s3", "bedrock-runtime"):
+            self.client(service_name)
+        self.llm()
+        self.embed_model()
+
+    def embedding_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit and miss counts of every embedding cache."""
+        with self._lock:
+            return {name: model.stats() for (name, _), model in self._embed_models.items()}
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """In-flight, peak and saturated call counts per service."""
+        return self.monitor.snapshot()
+
+
+_registry: Optional[AWSClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> AWSClientRegistry:
+    """Return the process-wide AWS client registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            settings = get_settings()
+            _registry = AWSClientRegistry(
+                max_pool_connections=settings["AWS_MAX_POOL_CONNECTIONS"],
+                embedding_cache_path=settings["EMBEDDING_CACHE_PATH"] or None,
+                embedding_cache_size=settings["EMBEDDING_CACHE_SIZE"]
+            )
+        return _registry
+
+
+def get_client(service_name: str, region_name: str = DEFAULT_REGION) -> Any:
+    return get_client_registry().client(service_name, region_name)
+
+
+def get_llm(model: str = DEFAULT_LLM_MODEL, region_name: str = DEFAULT_REGION) -> Any:
+    return get_client_registry().llm(model, region_name)
+
+
+def get_embed_model(model_name: str = DEFAULT_EMBED_MODEL, region_name: str = DEFAULT_REGION) -> Any:
+    return get_client_registry().embed_model(model_name, region_name)
@@ -0,0 +1,127 @@
+"""
+Local stand-in for the Bedrock Converse API to check that requests are cache-friendly.
+
+Usage:
+    python -m services.aws.fake_bedrock [--port 8089]
+    AWS_ENDPOINT_URL_BEDROCK_RUNTIME=http://localhost:8089 uvicorn backend.main:app
+
+Every Converse request is answered with a fixed final answer. The server
+hashes the part of the request before its last cache point (tools, then
+system blocks) and logs whether that prefix was seen before. Its usage block
+reports cache reads and writes the way Bedrock does, so the token metrics can
+be checked end to end. Streaming (ConverseStream) is not supported.
+"""
+import argparse
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Set, Tuple
+from urllib.parse import unquote
+
+DEFAULT_REPLY = 'Final Answer: {"sql_query": "", "data": [], "explanation": "Reply from the fake Bedrock endpoint"}'
+
+
+def _tokens(value: Any) -> int:
+    # Same four-characters-per-token estimate as the admission controller
+    return len(json.dumps(value, separators=(",", ":"))) // 4
+
+
+def cacheable_prefix(body: Dict[str, Any]) -> Tuple[List[Any], List[Any]]:
+    """
+    Split a Converse request into what Bedrock would cache and the rest.
+
+    The cache prefix runs in the order tools, system, messages up to the last
+    cache point; only tools and system blocks are considered here.
+    """
+    sections = [
+        *((block, "tools") for block in body.get("toolConfig", {}).get("tools", [])),
+        *((block, "system") for block in body.get("system", [])),
+    ]
+    last = max((i for i, (block, _) in enumerate(sections) if "cachePoint" in block), default=-1)
+    prefix = [block for block, _ in sections[:last + 1]]
+    rest = [block for block, _ in sections[last + 1:]] + body.get("messages", [])
+    return prefix, rest
+
+
+class FakeBedrock:
+    """Prefix bookkeeping shared by the request handlers."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self._seen: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def converse(self, model_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        prefix, rest = cacheable_prefix(body)
+        digest = hashlib.sha256(json.dumps(prefix, separators=(",", ":")).encode("utf-8")).hexdigest()
+        with self._lock:
+            hit = bool(prefix) and digest in self._seen
+            if prefix:
+                self._seen.add(digest)
+        prefix_tokens = _tokens(prefix) if prefix else 0
+        status = "no cache point" if not prefix else ("hit" if hit else "write")
+        print(f"{model_id}: prefix {digest[:12]} ({prefix_tokens} tokens) {status}", flush=True)
+
+        input_tokens = _tokens(rest)
+        output_tokens = len(self.reply) // 4
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": self.reply}]}},
+            "stopReason": "end_turn",
+            "usage": {
+                "inputTokens": input_tokens,
+                "outputTokens": output_tokens,
+                "totalTokens": input_tokens + output_tokens + prefix_tokens,
+                "cacheReadInputTokens": prefix_tokens if hit else 0,
+                "cacheWriteInputTokens": 0 if hit else prefix_tokens,
+            },
+            "metrics": {"latencyMs": 1},
+        }
+
+
+def _handler(fake: FakeBedrock):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 3 or parts[0] != "model" or parts[2] != "converse":
+                self._send(404, {"message": f"Unsupported operation {self.path}"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            self._send(200, fake.converse(unquote(parts[1]), body))
+
+        def _send(self, status: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def make_server(port: int, reply: str = DEFAULT_REPLY) -> ThreadingHTTPServer:
+    """Fake endpoint bound to localhost; port 0 picks a free port."""
+    return ThreadingHTTPServer(("127.0.0.1", port), _handler(FakeBedrock(reply)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="Text of every answer")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.reply)
+    print(f"Fake Bedrock Converse endpoint on http://127.0.0.1:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from config.settings import get_settings
+from core.logger import get_application_logger
+
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+
+class PromptCachePolicy:
+    """
+    Marks the static prefix of Converse requests for Bedrock prompt caching.
+
+    Registered as a ``before-parameter-build`` handler on the shared botocore
+    session, so it sees the final request parameters of every Converse call
+    whatever built them. It appends a cache point to the tool list and splits
+    the system prompt after the longest registered static prefix (the agent
+    instructions with the tool descriptions), leaving per-turn content such as
+    retrieved memories after the cache point. Requests for models without
+    prompt caching are left untouched.
+    """
+
+    def __init__(self, model_patterns: Sequence[str], enabled: bool = True):
+        """
+        Args:
+            model_patterns: Substrings of the model IDs that support prompt caching
+            enabled: False to never add cache points
+        """
+        self.logger = get_application_logger()
+        self.model_patterns = [p for p in model_patterns if p]
+        self.enabled = enabled
+        self._prefixes: List[str] = []
+        self._lock = threading.Lock()
+
+    def register_static_prefix(self, text: str) -> None:
+        """Declare text that starts system prompts and never changes between calls."""
+        if not text:
+            return
+        with self._lock:
+            if text not in self._prefixes:
+                self._prefixes.append(text)
+                # Longest first so the most specific prefix wins
+                self._prefixes.sort(key=len, reverse=True)
+
+    def supports(self, model_id: str) -> bool:
+        return self.enabled and any(pattern in model_id for pattern in self.model_patterns)
+
+    def _static_prefix(self, text: str) -> Optional[str]:
+        with self._lock:
+            return next((p for p in self._prefixes if text.startswith(p)), None)
+
+    def mark_system(self, system: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert a cache point after the static prefix of the first system text block."""
+        if any("cachePoint" in block for block in system):
+            return system
+        for i, block in enumerate(system):
+            text = block.get("text")
+            if text is None:
+                continue
+            prefix = self._static_prefix(text)
+            if prefix is None:
+                return system
+            rest = text[len(prefix):]
+            marked = [{"text": prefix}, dict(CACHE_POINT)]
+            if rest:
+                marked.append({"text": rest})
+            return system[:i] + marked + system[i + 1:]
+        return system
+
+    @staticmethod
+    def mark_tools(tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not tools or any("cachePoint" in tool for tool in tools):
+            return tools
+        return tools + [dict(CACHE_POINT)]
+
+    def before_parameter_build(self, params: Dict[str, Any], **kwargs) -> None:
+        if not self.supports(params.get("modelId", "")):
+            return
+        if params.get("system"):
+            params["system"] = self.mark_system(params["system"])
+        tool_config = params.get("toolConfig")
+        if tool_config and tool_config.get("tools"):
+            tool_config["tools"] = self.mark_tools(tool_config["tools"])
+
+
+_policy: Optional[PromptCachePolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_prompt_cache_policy() -> PromptCachePolicy:
+    """Return the process-wide prompt caching policy."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            settings = get_settings()
+            _policy = PromptCachePolicy(
+                settings["PROMPT_CACHE_MODELS"],
+                enabled=settings["PROMPT_CACHING_ENABLED"]
+            )
+        return _policy
@@ -63,6 +63,13 @@ class StreamlitApp:
         else:
             return {"success": False, "response": f"Error: {response.text}"}
 
+    def fetch_result(self, handle, offset=0, limit=1000):
+        url = f"{API_BASE_URL}/agent/results/{handle}"
+        response = requests.get(url, params={"offset": offset, "limit": limit})
+        if response.ok:
+            return response.json()
+        return None
+
     def send_feedback(self, response_id, feedback, rating):
         url = f"{API_BASE_URL}/agent/feedback"
         response = requests.post(url, json={"response_id": response_id, "feedback": feedback, "rating": rating, "session_id": self.session_id})
@@ -169,6 +176,13 @@ class StreamlitApp:
                     sql_query = content.get("sql_query", "")
                     data = content.get("data", "")
                     explanation = content.get("explanation", "")
+                    result_handle = content.get("result_handle")
+                    if result_handle:
+                        # Only a sample came with the answer; load the stored rows
+                        page = self.fetch_result(result_handle)
+                        if page:
+                            data = page["rows"]
+                            st.caption(f"Showing {len(data)} of {page['row_count']} rows")
                     if sql_query:
                         st.markdown(f"**SQL Query:**\n```sql\n{sql_query}\n```")
                     if isinstance(data, list) and data and isinstance(data[0], dict):
@@ -0,0 +1,55 @@
+"""Smoke test of GuardedBedrockConverse through the llama-index instrumentation dispatcher."""
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("llama_index.llms.bedrock_converse")
+
+from llama_index.core.llms import ChatMessage, MessageRole
+
+from services.aws.bedrock import GuardedBedrockConverse
+from services.aws.clients import AWSClientRegistry
+from services.aws.fake_bedrock import make_server
+
+REPLY = "Hello from the fake endpoint"
+
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    server = make_server(0, REPLY)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("AWS_ENDPOINT_URL_BEDROCK_RUNTIME", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    try:
+        yield
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def llm(endpoint):
+    return GuardedBedrockConverse(model="anthropic.claude-3-haiku-20240307-v1:0", region_name="us-east-1")
+
+
+def test_chat_and_complete(llm):
+    messages = [ChatMessage(role=MessageRole.USER, content="Hi")]
+    assert llm.chat(messages).message.content == REPLY
+    assert llm.complete("Hi").text == REPLY
+
+
+def test_achat(llm):
+    messages = [ChatMessage(role=MessageRole.USER, content="Hi")]
+    response = asyncio.run(llm.achat(messages))
+    assert response.message.content == REPLY
+
+
+def test_registry_llm_sync_and_async(endpoint):
+    # The registry shares its pooled client for sync calls and an aiobotocore session for async ones
+    llm = AWSClientRegistry().llm("anthropic.claude-3-haiku-20240307-v1:0", "us-east-1")
+    messages = [ChatMessage(role=MessageRole.USER, content="Hi")]
+    assert llm.chat(messages).message.content == REPLY
+    assert asyncio.run(llm.achat(messages)).message.content == REPLY
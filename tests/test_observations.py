@@ -0,0 +1,28 @@
+"""Per-turn tool results must survive llama-index's async tool dispatch."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from llama_index.core.tools import FunctionTool
+
+from agent.observations import find_result, record_result, start_turn
+from agent.tool_calling import in_context_async
+
+
+def run_query(query: str) -> str:
+    record_result(query, SimpleNamespace(sql_query=query, data=[{"n": 1}]))
+    return "ok"
+
+
+def test_async_tool_call_records_result():
+    tool = FunctionTool.from_defaults(fn=run_query, async_fn=in_context_async(run_query), name="run_query")
+
+    async def turn():
+        start_turn()
+        await tool.acall(query="SELECT 1")
+        return find_result("SELECT 1")
+
+    assert asyncio.run(turn()) is not None
@@ -0,0 +1,37 @@
+"""Near-identical questions that differ in a literal must not share a cached answer."""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("boto3")
+
+from agent.semantic_cache import SemanticAnswerCache
+
+
+class ConstantEmbedding:
+    """Embeds every question to the same vector, i.e. perfect similarity."""
+
+    def get_query_embedding(self, question):
+        return [1.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def cache():
+    return SemanticAnswerCache(embed_model=ConstantEmbedding(), threshold=0.92)
+
+
+def test_different_literal_is_a_miss(cache):
+    cache.store("trades for account 1234", "db", {"data": [{"account": 1234}]})
+    cached, _ = cache.lookup("trades for account 5678", "db")
+    assert cached is None
+
+
+def test_same_literals_are_a_hit(cache):
+    cache.store("trades for account 1234 since '2024-01-01'", "db", {"data": [{"account": 1234}]})
+    cached, _ = cache.lookup("show the trades of account 1234 since '2024-01-01'", "db")
+    assert cached == {"data": [{"account": 1234}]}
+
+
+def test_scope_is_respected(cache):
+    cache.store("total volume", "db", {"data": []}, scope="session-a")
+    assert cache.lookup("total volume", "db", scope="session-b")[0] is None
+    assert cache.lookup("total volume", "db", scope="session-a")[0] is not None
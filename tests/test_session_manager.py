@@ -0,0 +1,29 @@
+"""Session pool leases, eviction and idle expiry."""
+import time
+
+from agent.session_manager import SessionPool
+
+
+def test_idle_sessions_behind_a_long_request_expire():
+    evicted = []
+    pool = SessionPool(lambda sid: sid, idle_ttl=0.05, on_evict=lambda sid, value: evicted.append(sid))
+    pool.acquire("long")
+    pool.acquire("idle")
+    pool.release("idle")
+    time.sleep(0.1)
+    # The long request finishes after the other session went idle
+    pool.release("long")
+
+    assert pool.sweep() == 1
+    assert evicted == ["idle"]
+    assert "long" in pool
+
+
+def test_leased_sessions_are_not_evicted_for_capacity():
+    pool = SessionPool(lambda sid: sid, max_sessions=1)
+    pool.acquire("a")
+    with pool.lease("b"):
+        assert "a" in pool and "b" in pool
+    pool.release("a")
+    pool.acquire("c")
+    assert "c" in pool and "a" not in pool and "b" not in pool
@@ -0,0 +1,74 @@
+"""Write-behind session persistence must not lose history across agents of one session."""
+from agent.session_store import InMemoryKeyValue, KeyValueSessionStore, SessionPersistence, SQLiteSessionStore
+
+import pytest
+
+
+class FakeMemory:
+    def __init__(self):
+        self.messages = []
+
+    def to_state(self):
+        return {"messages": list(self.messages)}
+
+    def load_state(self, state):
+        self.messages = list(state["messages"])
+
+
+class FakeAgent:
+    def __init__(self):
+        self.memory_version = 0
+        self.agent_memory = FakeMemory()
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def persistence(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite"))
+    else:
+        store = KeyValueSessionStore(InMemoryKeyValue())
+    persistence = SessionPersistence(store, flush_interval=3600)
+    yield persistence
+    persistence.close()
+
+
+def test_reacquired_session_keeps_pending_history(persistence):
+    first = FakeAgent()
+    persistence.refresh("s", first)
+    first.agent_memory.messages.append("turn 1")
+    persistence.save("s", first)
+    persistence.flush()
+    first.agent_memory.messages.append("turn 2")
+    # Evicted before the writer ran; a new agent picks the session up
+    persistence.save("s", first)
+
+    second = FakeAgent()
+    persistence.refresh("s", second)
+    assert second.agent_memory.messages == ["turn 1", "turn 2"]
+    second.agent_memory.messages.append("turn 3")
+    persistence.save("s", second)
+    persistence.flush()
+
+    version, state = persistence.store.load("s")
+    assert state["messages"] == ["turn 1", "turn 2", "turn 3"]
+    assert version == second.memory_version
+    assert persistence.conflicts == 0
+
+
+def test_concurrent_write_is_reported_and_reloaded(persistence):
+    a, b = FakeAgent(), FakeAgent()
+    a.agent_memory.messages.append("from a")
+    persistence.save("s", a)
+    persistence.flush()
+    persistence.refresh("s", b)
+
+    a.agent_memory.messages.append("a again")
+    persistence.save("s", a)
+    persistence.flush()
+    b.agent_memory.messages.append("from b")
+    persistence.save("s", b)
+    persistence.flush()
+
+    assert persistence.conflicts == 1
+    persistence.refresh("s", b)
+    assert b.agent_memory.messages == ["from a", "a again"]
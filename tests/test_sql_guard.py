@@ -0,0 +1,56 @@
+"""The token fallback and the sqlglot check must agree on which queries get a LIMIT."""
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("boto3")
+
+from agent import sql_guard
+from agent.sql_guard import SQLGuard, SQLValidationError
+
+
+@pytest.fixture(params=["tokens", "sqlglot"])
+def guard(request, monkeypatch):
+    if request.param == "tokens":
+        monkeypatch.setattr(sql_guard, "sqlglot", None)
+    else:
+        pytest.importorskip("sqlglot")
+    return SQLGuard(None, default_limit=100)
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM trades WHERE amount > 10 FETCH FIRST 5 ROWS ONLY",
+    "SELECT * FROM trades OFFSET 10",
+    "SELECT * FROM trades LIMIT 5",
+    "SELECT * FROM trades UNION SELECT * FROM old_trades",
+    "SELECT account, count(*) FROM trades GROUP BY account",
+    "SELECT count(*) FROM trades",
+])
+def test_limited_queries_are_unchanged(guard, query):
+    assert guard.validate(query) == query
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM trades",
+    "SELECT * FROM trades -- note",
+    "SELECT DISTINCT * FROM trades;",
+    "WITH t AS (SELECT * FROM trades) SELECT * FROM t",
+])
+def test_exploratory_queries_get_a_limit(guard, query):
+    rewritten = guard.validate(query)
+    assert rewritten.upper().endswith("LIMIT 100")
+    assert "--" not in rewritten
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT a.x FROM a, b",
+    "SELECT a.x FROM a, b WHERE a.x = 1",
+    "SELECT a.x FROM a CROSS JOIN b",
+])
+def test_cross_joins_are_rejected(guard, query):
+    with pytest.raises(SQLValidationError):
+        guard.validate(query)
+
+
+def test_comma_join_with_predicate_is_allowed(guard):
+    query = "SELECT a.x FROM a, b WHERE a.id = b.id"
+    assert guard.validate(query) == query